@@ -0,0 +1,91 @@
+"""
+Compare incremental changeset aggregation with rebuilding from all diffs.
+
+Parses a series of synthetic augmented diffs, then after each diff either
+regroups the changes of all diffs so far by ``attribs["changeset"]``, or
+adds the new diff to a ChangesetAggregator. Reports the time per diff over
+the whole series and for the last diff. Run from the repository root:
+
+    python benchmarks/bench_aggregate.py [--diffs N] [--changes N]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import AugmentedDiff  # noqa: E402
+from osmdiff.aggregate import ChangesetAggregator  # noqa: E402
+
+
+def make_diff(sequence_number: int, count: int, rng: random.Random) -> AugmentedDiff:
+    parts = ['<osm version="0.6" generator="Overpass API">']
+    for i in range(count):
+        changeset = rng.randrange(500)
+        meta = (
+            f'changeset="{changeset}" uid="{changeset % 200}" user="u{changeset % 200}" '
+            f'timestamp="2024-01-01T{sequence_number // 60 % 24:02d}:{sequence_number % 60:02d}:00Z"'
+        )
+        lat, lon = rng.uniform(-80, 80), rng.uniform(-170, 170)
+        old = f'<node id="{i}" version="1" lat="{lat:.5f}" lon="{lon:.5f}" {meta}><tag k="shop" v="deli"/></node>'
+        new = f'<node id="{i}" version="2" lat="{lat:.5f}" lon="{lon:.5f}" {meta}><tag k="shop" v="cafe"/></node>'
+        parts.append(f'<action type="modify"><old>{old}</old><new>{new}</new></action>')
+    parts.append("</osm>")
+    adiff = AugmentedDiff(sequence_number=sequence_number)
+    adiff._parse_stream(io.BytesIO("".join(parts).encode()))
+    return adiff
+
+
+def rebuild(diffs: list) -> dict:
+    """Group all changes by changeset, as done without the aggregator."""
+    stats = defaultdict(lambda: {"changes": 0, "tags_modified": 0})
+    for adiff in diffs:
+        for change in adiff.modify:
+            old, new = change["old"], change["new"]
+            summary = stats[new.attribs["changeset"]]
+            summary["changes"] += 1
+            summary["tags_modified"] += sum(
+                1 for k, v in new.tags.items() if old.tags.get(k, v) != v
+            )
+    return stats
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--diffs", type=int, default=60)
+    argparser.add_argument("--changes", type=int, default=2000)
+    args = argparser.parse_args()
+
+    rng = random.Random(0)
+    diffs = [make_diff(n, args.changes, rng) for n in range(args.diffs)]
+    print(f"{args.diffs} diffs of {args.changes} changes")
+
+    t0 = time.perf_counter()
+    for n in range(1, len(diffs) + 1):
+        t1 = time.perf_counter()
+        stats = rebuild(diffs[:n])
+    last = time.perf_counter() - t1
+    total = time.perf_counter() - t0
+    print(f"rebuild:      {total / len(diffs) * 1000:7.1f} ms/diff, last {last * 1000:7.1f} ms")
+
+    aggregator = ChangesetAggregator()
+    t0 = time.perf_counter()
+    for adiff in diffs:
+        t1 = time.perf_counter()
+        aggregator.add(adiff)
+    last = time.perf_counter() - t1
+    total = time.perf_counter() - t0
+    print(f"incremental:  {total / len(diffs) * 1000:7.1f} ms/diff, last {last * 1000:7.1f} ms")
+
+    assert {int(k): v["changes"] for k, v in stats.items()} == {
+        k: s.changes for k, s in aggregator.changesets.items()
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark the XML parser backends.
+
+Parses ``tests/data/test_osmchange.xml`` with every available backend in
+``osmdiff.backends`` and reports objects per second. Run from the
+repository root:
+
+    python benchmarks/bench_backends.py [--repeat N] [--rounds N]
+
+``--repeat`` concatenates the test diff N times to simulate a larger file;
+the best of ``--rounds`` runs is reported.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff.backends import BACKENDS  # noqa: E402
+from osmdiff.stream import CHUNK_SIZE  # noqa: E402
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "test_osmchange.xml")
+
+
+def build_body(repeat: int) -> bytes:
+    with open(DATA, "rb") as fh:
+        xml = fh.read()
+    start = xml.index(b">", xml.index(b"<osmChange")) + 1
+    end = xml.rindex(b"</osmChange>")
+    return xml[:start] + xml[start:end] * repeat + xml[end:]
+
+
+def run(backend, body: bytes) -> int:
+    chunks = (body[i : i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+    return sum(1 for event in backend().parse(chunks) if event[0] == "object")
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--repeat", type=int, default=5)
+    argparser.add_argument("--rounds", type=int, default=3)
+    args = argparser.parse_args()
+
+    body = build_body(args.repeat)
+    print(f"document: {len(body) / 2**20:.1f} MiB")
+    for name, backend in BACKENDS.items():
+        if not backend.available():
+            print(f"{name:<6} not available")
+            continue
+        best = float("inf")
+        for _ in range(args.rounds):
+            t0 = time.perf_counter()
+            count = run(backend, body)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:<6} objects={count:<7} {count / best:>10,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
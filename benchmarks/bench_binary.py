@@ -0,0 +1,82 @@
+"""
+Compare parsing an osmChange diff with loading its binary dump.
+
+Parses ``tests/data/test_osmchange.xml``, repeated to simulate a larger
+file, writes it with `OSMChange.dump` and reports the file sizes and the
+time to parse the XML, to load the dump lazily, to load it and decode every
+object, and to access a single object of a lazily loaded dump. Run from the
+repository root:
+
+    python benchmarks/bench_binary.py [--repeat N] [--rounds N]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import OSMChange  # noqa: E402
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "test_osmchange.xml")
+
+
+def build_body(repeat: int) -> bytes:
+    with open(DATA, "rb") as fh:
+        xml = fh.read()
+    start = xml.index(b">", xml.index(b"<osmChange")) + 1
+    end = xml.rindex(b"</osmChange>")
+    return xml[:start] + xml[start:end] * repeat + xml[end:]
+
+
+def best(rounds: int, func) -> float:
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--repeat", type=int, default=5)
+    argparser.add_argument("--rounds", type=int, default=3)
+    args = argparser.parse_args()
+
+    body = build_body(args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = os.path.join(tmp, "diff.osc")
+        dump_path = os.path.join(tmp, "diff.osmdiff")
+        with open(xml_path, "wb") as fh:
+            fh.write(body)
+
+        osmchange = OSMChange.from_xml_file(xml_path)
+        count = sum(len(osmchange.actions[a]) for a in ("create", "modify", "delete"))
+        osmchange.dump(dump_path)
+        size = os.path.getsize(dump_path)
+        print(f"objects: {count}")
+        print(f"xml:     {len(body) / 2**20:8.2f} MiB")
+        print(f"xml.gz:  {len(gzip.compress(body)) / 2**20:8.2f} MiB")
+        print(f"binary:  {size / 2**20:8.2f} MiB")
+
+        def decode_all():
+            loaded = OSMChange.load(dump_path, lazy=False)
+            for obj in loaded.modify:  # Touch the decoded objects
+                obj.id
+
+        parse = best(args.rounds, lambda: OSMChange.from_xml_file(xml_path))
+        lazy = best(args.rounds, lambda: OSMChange.load(dump_path))
+        full = best(args.rounds, decode_all)
+        single = best(args.rounds, lambda: OSMChange.load(dump_path).modify[-1])
+        print(f"parse xml:          {parse * 1000:9.2f} ms")
+        print(f"load (lazy):        {lazy * 1000:9.2f} ms  {parse / lazy:7.1f}x")
+        print(f"load (decode all):  {full * 1000:9.2f} ms  {parse / full:7.1f}x")
+        print(f"load + one object:  {single * 1000:9.2f} ms  {parse / single:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
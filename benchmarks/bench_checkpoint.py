@@ -0,0 +1,50 @@
+"""
+Measure the cost of recording checkpoints with and without batched commits.
+
+Saves the checkpoint of one consumer after every diff, as a continuous
+consumer does, into a JSON file and a SQLite database, committing every
+diff or in batches. Each commit is synced to disk, so the results depend on
+the file system. Run from the repository root:
+
+    python benchmarks/bench_checkpoint.py [--diffs N] [--dir PATH]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff.checkpoint import FileCheckpointStore, SQLiteCheckpointStore  # noqa: E402
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--diffs", type=int, default=2000)
+    argparser.add_argument("--dir", help="Directory for the stores")
+    args = argparser.parse_args()
+
+    print(f"{'store':<24} {'per diff':>10} {'diffs/s':>10}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for name, store_class, suffix in (
+            ("file", FileCheckpointStore, ".json"),
+            ("sqlite", SQLiteCheckpointStore, ".db"),
+        ):
+            for commit_every in (1, 10, 100):
+                path = os.path.join(directory, f"{name}{commit_every}{suffix}")
+                store = store_class(path, commit_every=commit_every)
+                t0 = time.perf_counter()
+                for sequence_number in range(args.diffs):
+                    store.save("default", sequence_number)
+                store.close()
+                per_diff = (time.perf_counter() - t0) / args.diffs
+                print(
+                    f"{name + f' commit_every={commit_every}':<24} "
+                    f"{per_diff * 1e6:>7.0f} us {1 / per_diff:>10.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compare ways of finding what changed in the modifications of a diff.
+
+Builds a synthetic augmented diff of creations, modifications and
+deletions, then computes tag and geometry changes of the modifications:
+by parsing the whole diff and comparing ``old`` and ``new`` in Python, with
+`AugmentedDiff.deltas` on the parsed diff, and with
+`AugmentedDiff.iter_deltas` while streaming. Reports the time and the peak
+memory traced by tracemalloc. Run from the repository root:
+
+    python benchmarks/bench_delta.py [--changes N] [--repeat N]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import AugmentedDiff  # noqa: E402
+
+
+def make_diff(count: int, rng: random.Random) -> bytes:
+    parts = ['<osm version="0.6" generator="Overpass API">']
+    for i in range(count):
+        lat, lon = rng.uniform(-80, 80), rng.uniform(-170, 170)
+        tags = '<tag k="shop" v="deli"/><tag k="name" v="Corner"/>'
+        old = f'<node id="{i}" version="1" lat="{lat:.5f}" lon="{lon:.5f}" changeset="1">{tags}</node>'
+        kind = i % 4
+        if kind == 0:
+            parts.append(f'<action type="create">{old}</action>')
+        elif kind == 1:
+            gone = f'<node id="{i}" version="2" visible="false" changeset="2"/>'
+            parts.append(f'<action type="delete"><old>{old}</old><new>{gone}</new></action>')
+        else:
+            if kind == 2:
+                lat += 0.001
+                tags = tags.replace("deli", "cafe")
+            new = f'<node id="{i}" version="2" lat="{lat:.5f}" lon="{lon:.5f}" changeset="2">{tags}</node>'
+            parts.append(f'<action type="modify"><old>{old}</old><new>{new}</new></action>')
+    parts.append("</osm>")
+    return "".join(parts).encode()
+
+
+def python_deltas(data: bytes) -> list:
+    """Parse the whole diff and compare the versions, as done without deltas."""
+    adiff = AugmentedDiff()
+    adiff._parse_stream(io.BytesIO(data))
+    changes = []
+    for change in adiff.modify:
+        old, new = change["old"], change["new"]
+        old_tags, new_tags = old.tags, new.tags
+        changes.append(
+            (
+                new.id,
+                {k: v for k, v in new_tags.items() if k not in old_tags},
+                {k: v for k, v in old_tags.items() if k not in new_tags},
+                {
+                    k: (old_tags[k], v)
+                    for k, v in new_tags.items()
+                    if k in old_tags and old_tags[k] != v
+                },
+                (old.lon, old.lat) != (new.lon, new.lat),
+            )
+        )
+    return changes
+
+
+def parsed_deltas(data: bytes) -> list:
+    adiff = AugmentedDiff()
+    adiff._parse_stream(io.BytesIO(data))
+    return adiff.deltas()
+
+
+def streamed_deltas(data: bytes) -> list:
+    return list(AugmentedDiff().iter_deltas(io.BytesIO(data)))
+
+
+def measure(function, data: bytes, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = function(data)
+        best = min(best, time.perf_counter() - t0)
+    del result
+    tracemalloc.start()
+    result = function(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--changes", type=int, default=40000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+
+    data = make_diff(args.changes, random.Random(0))
+    print(f"{args.changes} changes, {len(data) / 1e6:.1f} MB")
+
+    results = {}
+    for name, function in [
+        ("python", python_deltas),
+        ("deltas", parsed_deltas),
+        ("iter_deltas", streamed_deltas),
+    ]:
+        best, peak, results[name] = measure(function, data, args.repeat)
+        print(f"{name:12s} {best * 1000:8.1f} ms  peak {peak / 1e6:7.1f} MB")
+
+    assert [c[0] for c in results["python"]] == [d.id for d in results["deltas"]]
+    assert [d.to_dict() for d in results["deltas"]] == [
+        d.to_dict() for d in results["iter_deltas"]
+    ]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare one fetcher per region with a Dispatcher fanning out one diff.
+
+Builds a synthetic augmented diff with changes spread over the globe and
+delivers it to a grid of regional subscriptions, either by parsing the diff
+once per region with a bbox Filter, as separate ContinuousAugmentedDiff
+instances would, or by parsing it once and dispatching it. Downloads are
+left out: separate fetchers would also download the diff once per region.
+Run from the repository root:
+
+    python benchmarks/bench_dispatch.py [--objects N] [--regions N]
+"""
+
+import argparse
+import io
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import AugmentedDiff  # noqa: E402
+from osmdiff.dispatch import Dispatcher  # noqa: E402
+from osmdiff.filters import Filter  # noqa: E402
+
+
+def make_diff(count: int) -> bytes:
+    rng = random.Random(0)
+    parts = ['<osm version="0.6" generator="Overpass API">']
+    for i in range(count):
+        lon, lat = rng.uniform(-180, 180), rng.uniform(-85, 85)
+        node = (
+            f'<node id="{i}" version="2" lat="{lat:.7f}" lon="{lon:.7f}">'
+            '<tag k="amenity" v="cafe"/></node>'
+        )
+        if i % 2:
+            parts.append(f'<action type="create">{node}</action>')
+        else:
+            parts.append(
+                f'<action type="modify"><old>{node}</old><new>{node}</new></action>'
+            )
+    parts.append("</osm>")
+    return "".join(parts).encode()
+
+
+def make_regions(count: int) -> list:
+    side = math.ceil(math.sqrt(count))
+    width, height = 360 / side, 170 / side
+    return [
+        (-180 + x * width, -85 + y * height, -180 + (x + 1) * width, -85 + (y + 1) * height)
+        for x in range(side)
+        for y in range(side)
+    ][:count]
+
+
+def parse(body: bytes, filter=None) -> AugmentedDiff:
+    adiff = AugmentedDiff(sequence_number=1, filter=filter)
+    adiff._parse_stream(io.BytesIO(body))
+    return adiff
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--objects", type=int, default=20_000)
+    argparser.add_argument("--regions", type=int, default=16)
+    args = argparser.parse_args()
+
+    body = make_diff(args.objects)
+    regions = make_regions(args.regions)
+    print(f"{args.objects} changes, {len(regions)} regions")
+
+    t0 = time.perf_counter()
+    separate = [len(parse(body, Filter(bbox=region)).create) for region in regions]
+    print(f"one parse per region:     {time.perf_counter() - t0:8.3f} s")
+
+    counts = [0] * len(regions)
+    dispatcher = Dispatcher()
+    for i, region in enumerate(regions):
+
+        def count(diff, changes, i=i):
+            counts[i] = sum(action == "create" for action, _, _ in changes)
+
+        dispatcher.subscribe(Filter(bbox=region), callback=count)
+    t0 = time.perf_counter()
+    adiff = parse(body)
+    t1 = time.perf_counter()
+    dispatcher.dispatch(adiff)
+    t2 = time.perf_counter()
+    print(
+        f"one parse and dispatch:   {t2 - t0:8.3f} s "
+        f"(parse {t1 - t0:.3f} s, dispatch {t2 - t1:.3f} s)"
+    )
+
+    # Nodes on region edges match both regions either way
+    assert counts == separate
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure parsing throughput with filters of different selectivity.
+
+Writes a synthetic osmChange file of nodes spread over the globe and parses
+it with bbox filters keeping about 100%, 10%, 1% and 0.1% of them, reporting
+the time and throughput of each. Run from the repository root:
+
+    python benchmarks/bench_filters.py [--objects N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import OSMChange  # noqa: E402
+from osmdiff.filters import Filter  # noqa: E402
+
+
+def write_document(path: str, count: int) -> None:
+    with open(path, "w") as fh:
+        fh.write('<osmChange version="0.6"><modify>\n')
+        for i in range(count):
+            lat = (i * 7919 % 1000) / 10
+            lon = (i * 104729 % 1000) / 10
+            fh.write(
+                f'<node id="{i}" version="2" timestamp="2024-01-01T00:00:00Z" '
+                f'uid="{i % 500}" user="user{i % 500}" changeset="{i // 100}" '
+                f'lat="{lat}" lon="{lon}"><tag k="amenity" v="cafe"/></node>\n'
+            )
+        fh.write("</modify></osmChange>\n")
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--objects", type=int, default=500_000)
+    args = argparser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "diff.osc")
+        write_document(path, args.objects)
+        size = os.path.getsize(path) / 2**20
+        print(f"document: {size:.0f} MiB, {args.objects} objects")
+
+        for label, filter in [
+            ("no filter", None),
+            ("bbox 100%", Filter(bbox=(0, 0, 100, 100))),
+            ("bbox 10%", Filter(bbox=(0, 0, 100, 10))),
+            ("bbox 1%", Filter(bbox=(0, 0, 10, 10))),
+            ("bbox 0.1%", Filter(bbox=(0, 0, 10, 1))),
+            ("tags 0%", Filter(tags={"shop": None})),
+        ]:
+            t0 = time.perf_counter()
+            kept = len(OSMChange.from_xml_file(path, filter=filter).modify)
+            elapsed = time.perf_counter() - t0
+            print(
+                f"{label:10s} {kept:8d} kept {elapsed:7.2f} s "
+                f"{size / elapsed:6.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Measure building a DiffIndex and looking objects up in it.
+
+Writes a synthetic osmChange file with unique ids, indexes it and reports the
+indexing throughput and the average time of a lookup against the time of a
+full parse. Run from the repository root:
+
+    python benchmarks/bench_index.py [--objects N] [--lookups N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import OSMChange  # noqa: E402
+from osmdiff.index import DiffIndex  # noqa: E402
+
+
+def write_document(path: str, count: int) -> None:
+    with open(path, "w") as fh:
+        fh.write('<osmChange version="0.6"><modify>\n')
+        for i in range(count):
+            if i % 10:
+                fh.write(
+                    f'<node id="{i}" version="2" timestamp="2024-01-01T00:00:00Z" '
+                    f'uid="{i % 500}" user="user{i % 500}" changeset="{i // 100}" '
+                    f'lat="{i % 90}.1234567" lon="{i % 180}.7654321"/>\n'
+                )
+            else:
+                nds = "".join(f'<nd ref="{i + j}"/>' for j in range(8))
+                fh.write(
+                    f'<way id="{i}" version="2" timestamp="2024-01-01T00:00:00Z" '
+                    f'uid="{i % 500}" user="user{i % 500}" changeset="{i // 100}">'
+                    f'{nds}<tag k="highway" v="residential"/></way>\n'
+                )
+        fh.write("</modify></osmChange>\n")
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--objects", type=int, default=1_000_000)
+    argparser.add_argument("--lookups", type=int, default=1000)
+    args = argparser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "diff.osc")
+        write_document(path, args.objects)
+        size = os.path.getsize(path) / 2**20
+        print(f"document: {size:.0f} MiB, {args.objects} objects")
+
+        t0 = time.perf_counter()
+        OSMChange.from_xml_file(path)
+        parse = time.perf_counter() - t0
+        print(f"full parse:   {parse:8.2f} s")
+
+        t0 = time.perf_counter()
+        DiffIndex.build(path)
+        build = time.perf_counter() - t0
+        print(f"build index:  {build:8.2f} s  {size / build:6.0f} MiB/s")
+
+        ids = [random.randrange(args.objects) for _ in range(args.lookups)]
+        t0 = time.perf_counter()
+        with DiffIndex(path) as index:
+            opened = time.perf_counter() - t0
+            for i in ids:
+                index.lookup("way" if i % 10 == 0 else "node", i)
+        lookup = (time.perf_counter() - t0 - opened) / len(ids)
+        print(f"open index:   {opened * 1000:8.2f} ms")
+        print(f"lookup:       {lookup * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
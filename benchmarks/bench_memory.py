@@ -0,0 +1,92 @@
+"""
+Measure the memory used per parsed OSM object.
+
+Parses an osmChange document and reports the bytes retained per object
+(nodes, ways and relations, including way nodes, relation members and tags)
+for the current classes, and for a dictionary-based layout equivalent to the
+one osmdiff used before the classes switched to ``__slots__`` and typed
+fields.
+
+Usage:
+    python benchmarks/bench_memory.py [--objects N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff.backends import get_backend  # noqa: E402
+
+
+class LegacyObject:
+    """Per-instance __dict__ with tags, attribs and nodes/members as before."""
+
+    def __init__(self, attrib):
+        self.tags = {}
+        self.attribs = dict(attrib)
+        self.bounds = None
+        self.osmtype = "n"
+        self.nodes = []
+
+
+def make_document(count: int) -> bytes:
+    parts = ['<osmChange version="0.6"><modify>']
+    for i in range(count):
+        if i % 10:
+            parts.append(
+                f'<node id="{i}" version="2" timestamp="2024-01-01T00:00:00Z" '
+                f'uid="{i % 500}" user="user{i % 500}" changeset="{i // 100}" '
+                f'lat="{i % 90}.1234567" lon="{i % 180}.7654321"/>'
+            )
+        else:
+            nds = "".join(f'<nd ref="{i + j}"/>' for j in range(8))
+            parts.append(
+                f'<way id="{i}" version="2" timestamp="2024-01-01T00:00:00Z" '
+                f'uid="{i % 500}" user="user{i % 500}" changeset="{i // 100}">'
+                f'{nds}<tag k="highway" v="residential"/></way>'
+            )
+    parts.append("</modify></osmChange>")
+    return "".join(parts).encode()
+
+
+def to_legacy(obj):
+    legacy = LegacyObject(obj.attribs)
+    legacy.tags = dict(obj.tags)
+    for nd in getattr(obj, "nodes", ()):
+        legacy.nodes.append(LegacyObject(nd.attribs))
+    return legacy
+
+
+def measure(document: bytes, legacy: bool) -> float:
+    gc.collect()
+    tracemalloc.start()
+    objects = []
+    for event in get_backend()().parse([document]):
+        if event[0] == "object":
+            objects.append(to_legacy(event[1]) if legacy else event[1])
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(objects)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=50_000)
+    args = parser.parse_args()
+
+    document = make_document(args.objects)
+    legacy = measure(document, legacy=True)
+    current = measure(document, legacy=False)
+    print(f"{'layout':<10} {'bytes/object':>14}")
+    print(f"{'dict':<10} {legacy:>14,.0f}")
+    print(f"{'slots':<10} {current:>14,.0f}")
+    print(f"reduction: {1 - current / legacy:.0%}")
+
+
+if __name__ == "__main__":
+    main()
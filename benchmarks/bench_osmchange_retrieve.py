@@ -0,0 +1,126 @@
+"""
+Benchmark OSMChange retrieval: buffered download vs. streaming decode.
+
+Serves a gzipped copy of ``tests/data/test_osmchange.xml`` through a fake
+HTTP response and compares the old approach (read the whole body, gunzip it,
+parse it into lists) with ``retrieve(stream=True)`` and ``iter_changes()``,
+which decompress and parse the body chunk by chunk.
+
+Each mode runs in a fresh interpreter so peak RSS is not shared between
+them. Run from the repository root:
+
+    python benchmarks/bench_osmchange_retrieve.py [--repeat N]
+
+``--repeat`` concatenates the test diff N times to simulate a larger file.
+"""
+
+import argparse
+import gzip
+import io
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import OSMChange  # noqa: E402
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "test_osmchange.xml")
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body: bytes):
+        self.raw = io.BytesIO(body)
+
+    @property
+    def content(self) -> bytes:
+        return self.raw.read()
+
+    def close(self) -> None:
+        pass
+
+
+class FakeSession:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def get(self, url, **kwargs) -> FakeResponse:
+        return FakeResponse(self.body)
+
+
+def build_body(repeat: int) -> bytes:
+    with open(DATA, "rb") as fh:
+        xml = fh.read()
+    start = xml.index(b">", xml.index(b"<osmChange")) + 1
+    end = xml.rindex(b"</osmChange>")
+    body = xml[:start] + xml[start:end] * repeat + xml[end:]
+    return gzip.compress(body)
+
+
+def run_buffered(body: bytes):
+    """The pre-streaming implementation: buffer, gunzip, parse into lists."""
+    t0 = time.perf_counter()
+    r = FakeResponse(body)
+    content = r.content
+    fh = gzip.GzipFile(fileobj=io.BytesIO(content))
+    oc = OSMChange()
+    oc._parse_xml(ElementTree.iterparse(fh, events=("start", "end")))
+    first = time.perf_counter() - t0  # nothing is available before parsing ends
+    count = len(oc.create) + len(oc.modify) + len(oc.delete)
+    return first, time.perf_counter() - t0, count
+
+
+def run_streaming(body: bytes):
+    t0 = time.perf_counter()
+    first = None
+    count = 0
+    oc = OSMChange(sequence_number=1, session=FakeSession(body))
+    oc.retrieve(stream=True)
+    for _ in oc.iter_changes():
+        if first is None:
+            first = time.perf_counter() - t0
+        count += 1
+    return first, time.perf_counter() - t0, count
+
+
+def measure(mode: str, repeat: int) -> None:
+    body = build_body(repeat)
+    run = run_buffered if mode == "buffered" else run_streaming
+    tracemalloc.start()
+    first, total, count = run(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+    print(
+        f"{mode:<10} objects={count:<7} first_object={first * 1000:8.2f} ms "
+        f"total={total * 1000:8.2f} ms heap_peak={peak / 2**20:7.2f} MiB "
+        f"max_rss={rss_kb / 1024:7.2f} MiB"
+    )
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--repeat", type=int, default=1)
+    argparser.add_argument("--mode", choices=("buffered", "streaming"))
+    args = argparser.parse_args()
+    if args.mode:
+        measure(args.mode, args.repeat)
+        return
+    print(f"gzipped body: {len(build_body(args.repeat)) / 2**10:.0f} KiB")
+    for mode in ("buffered", "streaming"):
+        subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--repeat", str(args.repeat)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure catch-up throughput of ContinuousAugmentedDiff with prefetching.
+
+Serves augmented diffs from a local HTTP server that adds a fixed latency to
+every response, starts the iterator some sequences behind the newest one and
+reports how long it takes to catch up with different prefetch depths. Run
+from the repository root:
+
+    python benchmarks/bench_prefetch.py [--diffs N] [--latency SECONDS]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import ContinuousAugmentedDiff  # noqa: E402
+from osmdiff.config import API_CONFIG, BACKFILL_CONFIG  # noqa: E402
+
+NEWEST = 1000
+
+
+def make_diff(count: int) -> bytes:
+    nodes = "".join(
+        f'<node id="{i}" version="1" lat="{i % 90}.5" lon="{i % 180}.5">'
+        '<tag k="amenity" v="cafe"/></node>'
+        for i in range(count)
+    )
+    return (
+        "<osm version='0.6'><meta osm_base='2024-01-01T00:00:00Z'/>"
+        f"<action type='create'>{nodes}</action></osm>"
+    ).encode()
+
+
+def serve(body: bytes, latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            data = str(NEWEST).encode() if self.path == "/state" else body
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--diffs", type=int, default=40)
+    argparser.add_argument("--latency", type=float, default=0.1)
+    argparser.add_argument("--objects", type=int, default=2000)
+    args = argparser.parse_args()
+
+    server = serve(make_diff(args.objects), args.latency)
+    url = f"http://127.0.0.1:{server.server_port}"
+    API_CONFIG["overpass"]["state_url"] = url + "/state"
+    BACKFILL_CONFIG["default_host_limit"] = 16
+    print(f"{args.diffs} diffs, {args.latency * 1000:.0f} ms latency")
+
+    for depth in (1, 2, 4, 8, 16):
+        fetcher = ContinuousAugmentedDiff(
+            base_url=url + "/adiff?id={sequence_number}",
+            min_interval=30,
+            prefetch=depth,
+        )
+        fetcher._current_sequence = NEWEST - args.diffs + 1
+        t0 = time.perf_counter()
+        for _ in range(args.diffs):
+            next(fetcher)
+        elapsed = time.perf_counter() - t0
+        fetcher.close()
+        print(f"prefetch={depth:<3d} {elapsed:6.2f} s  {args.diffs / elapsed:6.1f} diffs/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
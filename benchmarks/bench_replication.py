@@ -0,0 +1,120 @@
+"""
+Measure the overhead of following minutely replication with ContinuousOSMChange.
+
+Serves a replication tree of gzipped OSMChange files from a local HTTP server
+that adds a fixed latency to every response. Reports the time to parse the
+state file, the processing time of a single diff once caught up (download of
+a local file, decompression and parsing), and the catch-up throughput with
+different prefetch depths. Run from the repository root:
+
+    python benchmarks/bench_replication.py [--objects N] [--latency SECONDS]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff import ContinuousOSMChange  # noqa: E402
+from osmdiff.config import BACKFILL_CONFIG  # noqa: E402
+from osmdiff.osmchange import parse_state  # noqa: E402
+
+NEWEST = 6000000
+STATE = (
+    b"#Mon Jan 01 00:01:02 UTC 2024\n"
+    b"sequenceNumber=%d\n"
+    b"timestamp=2024-01-01T00\\:01\\:00Z\n" % NEWEST
+)
+
+
+def make_diff(count: int) -> bytes:
+    nodes = "".join(
+        f'<node id="{i}" version="2" changeset="1" uid="1" user="u" '
+        f'timestamp="2024-01-01T00:00:00Z" lat="{i % 90}.5" lon="{i % 180}.5">'
+        '<tag k="amenity" v="cafe"/></node>'
+        for i in range(count)
+    )
+    xml = f"<osmChange version='0.6'><modify>{nodes}</modify></osmChange>"
+    return gzip.compress(xml.encode())
+
+
+def serve(body: bytes, latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            data = STATE if self.path.endswith("state.txt") else body
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timeit(function, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--diffs", type=int, default=30)
+    argparser.add_argument("--latency", type=float, default=0.1)
+    argparser.add_argument(
+        "--objects", type=int, default=10000, help="Objects per minutely diff"
+    )
+    args = argparser.parse_args()
+
+    print(f"state file: {timeit(lambda: parse_state(STATE), 10000) * 1e6:.1f} us")
+
+    body = make_diff(args.objects)
+    server = serve(body, args.latency)
+    url = f"http://127.0.0.1:{server.server_port}"
+    BACKFILL_CONFIG["default_host_limit"] = 16
+    print(
+        f"{args.objects} objects per diff ({len(body) // 1024} KiB gzipped), "
+        f"{args.latency * 1000:.0f} ms latency"
+    )
+
+    # One diff at a time, as when following replication
+    fetcher = ContinuousOSMChange(url=url, min_interval=30)
+    fetcher._current_sequence = NEWEST - args.diffs + 1
+    next(fetcher)  # Includes the state check
+    t0 = time.perf_counter()
+    for _ in range(args.diffs - 1):
+        next(fetcher)
+    per_diff = (time.perf_counter() - t0) / (args.diffs - 1)
+    print(
+        f"per diff: {per_diff * 1000:.0f} ms, "
+        f"{(per_diff - args.latency) * 1000:.0f} ms without the latency"
+    )
+
+    for depth in (0, 2, 4, 8):
+        fetcher = ContinuousOSMChange(url=url, min_interval=30, prefetch=depth)
+        fetcher._current_sequence = NEWEST - args.diffs + 1
+        t0 = time.perf_counter()
+        for _ in range(args.diffs):
+            next(fetcher)
+        elapsed = time.perf_counter() - t0
+        fetcher.close()
+        print(
+            f"catch-up prefetch={depth:<2d} {elapsed:6.2f} s "
+            f"{args.diffs / elapsed:6.1f} diffs/s"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare fixed-interval polling with the adaptive PollScheduler.
+
+Simulates a server that publishes a sequence every period, each one a random
+delay after the minute, and a client checking its state. Reports how long
+new sequences take to be noticed and how many state requests are made per
+hour, for fixed intervals and for the scheduler. Run from the repository
+root:
+
+    python benchmarks/bench_schedule.py [--hours N] [--period SECONDS] [--spread SECONDS]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff.schedule import PollScheduler  # noqa: E402
+
+START = 1_700_000_000.0
+
+
+class Server:
+    """Publishes sequence n at ``START + n * period + delay``."""
+
+    def __init__(self, period: float, delay: float, spread: float, seed: int) -> None:
+        self.period = period
+        self.delay = delay
+        self.spread = spread
+        self.published = {}
+        self._rng = random.Random(seed)
+
+    def publish_time(self, n: int) -> float:
+        if n not in self.published:
+            offset = self.delay + self._rng.uniform(-self.spread, self.spread)
+            self.published[n] = START + n * self.period + offset
+        return self.published[n]
+
+    def state(self, now: float) -> dict:
+        n = int((now - START) // self.period) + 1
+        while self.publish_time(n) > now:
+            n -= 1
+        return {"sequence_number": n, "timestamp": None}
+
+
+def simulate(server: Server, hours: float, next_check, start: float) -> tuple:
+    """Run checks for some hours, next_check(state, now) gives the next check."""
+    now = START + start
+    end = now + hours * 3600
+    checks = 0
+    latencies = []
+    known = None
+    while now < end:
+        state = server.state(now)
+        checks += 1
+        if known is not None:
+            for n in range(known + 1, state["sequence_number"] + 1):
+                latencies.append(now - server.publish_time(n))
+        known = state["sequence_number"]
+        now = next_check(state, now)
+    return latencies, checks / hours
+
+
+def report(name: str, latencies: list, per_hour: float) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(
+        f"{name:<22} {statistics.mean(latencies):>7.1f} s {p95:>7.1f} s "
+        f"{per_hour:>10.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=6)
+    parser.add_argument("--runs", type=int, default=10, help="Start times")
+    parser.add_argument("--period", type=float, default=60)
+    parser.add_argument("--delay", type=float, default=20, help="Publish delay")
+    parser.add_argument("--spread", type=float, default=3, help="Delay variation")
+    args = parser.parse_args()
+
+    print(f"{'polling':<22} {'latency':>9} {'p95':>9} {'checks/h':>10}")
+    policies = [(f"every {i} s", None, i) for i in (15, 30, 60)]
+    policies.append(("PollScheduler", PollScheduler, None))
+    for name, scheduler_class, interval in policies:
+        latencies, per_hour = [], 0.0
+        # Average over start times, fixed intervals depend on their phase
+        for run in range(args.runs):
+            server = Server(args.period, args.delay, args.spread, seed=run)
+            if scheduler_class is None:
+
+                def next_check(state, now, i=interval):
+                    return now + i
+
+            else:
+                scheduler = scheduler_class(period=args.period)
+                scheduler._random.seed(run)
+
+                def next_check(state, now, scheduler=scheduler):
+                    scheduler.observe(state, now)
+                    return now + scheduler.delay(now)
+
+            start = 120 + run * args.period / args.runs
+            run_latencies, run_per_hour = simulate(
+                server, args.hours, next_check, start
+            )
+            latencies += run_latencies
+            per_hour += run_per_hour / args.runs
+        report(name, latencies, per_hour)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure building a SpatialIndex and assigning changes to regions.
+
+Indexes synthetic changes spread over the globe and assigns them to a grid
+of regional bounding boxes with `query_regions`, one `query_bbox` per region
+and a nested loop over changes and regions. Run from the repository root:
+
+    python benchmarks/bench_spatial.py [--objects N] [--regions N]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff.spatial import SpatialIndex  # noqa: E402
+
+
+def make_entries(count: int) -> list:
+    rng = random.Random(0)
+    entries = []
+    for i in range(count):
+        lon, lat = rng.uniform(-180, 179.9), rng.uniform(-85, 84.9)
+        size = 0.0 if i % 10 else rng.uniform(0, 0.1)  # Nodes and some ways
+        entries.append((i, (lon, lat, lon + size, lat + size)))
+    return entries
+
+
+def make_regions(count: int) -> list:
+    side = math.ceil(math.sqrt(count))
+    width, height = 360 / side, 170 / side
+    return [
+        (-180 + x * width, -85 + y * height, -180 + (x + 1) * width, -85 + (y + 1) * height)
+        for x in range(side)
+        for y in range(side)
+    ][:count]
+
+
+def nested_loop(entries: list, regions: list) -> list:
+    found = [[] for _ in regions]
+    for item, (minlon, minlat, maxlon, maxlat) in entries:
+        for r, (rminlon, rminlat, rmaxlon, rmaxlat) in enumerate(regions):
+            if minlon <= rmaxlon and maxlon >= rminlon and minlat <= rmaxlat and maxlat >= rminlat:
+                found[r].append(item)
+    return found
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--objects", type=int, default=100_000)
+    argparser.add_argument("--regions", type=int, default=400)
+    args = argparser.parse_args()
+
+    entries = make_entries(args.objects)
+    regions = make_regions(args.regions)
+    print(f"{args.objects} objects, {len(regions)} regions")
+
+    t0 = time.perf_counter()
+    index = SpatialIndex(entries)
+    print(f"build:          {time.perf_counter() - t0:8.3f} s")
+
+    t0 = time.perf_counter()
+    bulk = index.query_regions(regions)
+    print(f"query_regions:  {time.perf_counter() - t0:8.3f} s")
+
+    t0 = time.perf_counter()
+    single = [index.query_bbox(region) for region in regions]
+    print(f"query_bbox:     {time.perf_counter() - t0:8.3f} s")
+
+    t0 = time.perf_counter()
+    loop = nested_loop(entries, regions)
+    print(f"nested loop:    {time.perf_counter() - t0:8.3f} s")
+
+    assert bulk == single == loop
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measure the memory used by tags with interning and shared tag mappings.
+
+Parses a synthetic building import, ways with a handful of repeated tags,
+and reports the bytes retained per way for tags with private string copies
+(as before interning), with interned strings, and with shared FrozenTags
+(``PARSER_CONFIG["share_tags"]``), along with the time to compare the tags
+of neighbouring ways. Run from the repository root:
+
+    python benchmarks/bench_tags.py [--objects N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from osmdiff.backends import get_backend  # noqa: E402
+from osmdiff.config import PARSER_CONFIG  # noqa: E402
+
+
+def make_document(count: int) -> bytes:
+    parts = ['<osmChange version="0.6"><create>']
+    for i in range(count):
+        nds = "".join(f'<nd ref="{i * 5 + j}"/>' for j in range(5))
+        parts.append(
+            f'<way id="{i}" version="1" changeset="{i // 1000}">{nds}'
+            '<tag k="building" v="yes"/><tag k="source" v="BAG"/>'
+            f'<tag k="start_date" v="{1900 + i % 120}"/></way>'
+        )
+    parts.append("</create></osmChange>")
+    return "".join(parts).encode()
+
+
+def copy_strings(tags: dict) -> dict:
+    """Give tags private string copies, as parsing did before interning."""
+    return {k.encode().decode(): v.encode().decode() for k, v in tags.items()}
+
+
+def measure(document: bytes, mode: str) -> tuple:
+    PARSER_CONFIG["share_tags"] = mode == "shared"
+    gc.collect()
+    tracemalloc.start()
+    objects = []
+    for event in get_backend()().parse([document]):
+        if event[0] == "object":
+            obj = event[1]
+            if mode == "copied":
+                obj.tags = copy_strings(obj.tags)
+            objects.append(obj)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for a, b in zip(objects, objects[1:]):
+        a.tags == b.tags
+    compare = time.perf_counter() - t0
+    return size / len(objects), compare
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argparser.add_argument("--objects", type=int, default=100_000)
+    args = argparser.parse_args()
+
+    document = make_document(args.objects)
+    print(f"{'tags':<10} {'bytes/way':>10} {'compare':>10}")
+    for mode in ("copied", "interned", "shared"):
+        size, compare = measure(document, mode)
+        print(f"{mode:<10} {size:>10,.0f} {compare:>9.3f}s")
+    PARSER_CONFIG["share_tags"] = False
+
+
+if __name__ == "__main__":
+    main()
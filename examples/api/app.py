@@ -34,8 +34,21 @@ async def read_item(item_id: int, q: Optional[str] = None):
 @app.get("/adiff/{sequence_number}")
 async def get_augmented_diff(sequence_number: int):
     adiff = AugmentedDiff(sequence_number=sequence_number)
-    adiff.retrieve()
-    return {"create": adiff._create, "modify": adiff._modify, "delete": adiff._delete}
+    await adiff.aretrieve(auto_increment=False)
+    return {
+        "create": [o.to_dict() for o in adiff.create],
+        "modify": [
+            {"old": a["old"].to_dict(), "new": a["new"].to_dict()}
+            for a in adiff.modify
+        ],
+        "delete": [
+            {
+                "old": a["old"].to_dict() if a["old"] else None,
+                "new": a["new"].to_dict() if a["new"] else None,
+            }
+            for a in adiff.delete
+        ],
+    }
 
 
 if __name__ == "__main__":
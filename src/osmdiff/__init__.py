@@ -7,6 +7,6 @@ includes a parser for the OpenStreetMap changeset API.
 
 from .augmenteddiff import AugmentedDiff, ContinuousAugmentedDiff
 from .osm import Node, Relation, Way
-from .osmchange import OSMChange
+from .osmchange import ContinuousOSMChange, OSMChange
 
 __version__ = "0.4.6"
@@ -0,0 +1,455 @@
+"""
+Running per-changeset and per-user statistics over successive diffs.
+
+Statistics such as the number of objects a changeset touched, its tag
+changes or its bounding box span several diffs, since a changeset stays
+open for up to a day. A `ChangesetAggregator` updates its summaries with
+the changes of each diff, so following replication costs one pass over the
+new changes instead of a rebuild from every diff seen so far:
+
+```python
+from osmdiff import ContinuousAugmentedDiff
+from osmdiff.aggregate import ChangesetAggregator
+
+aggregator = ChangesetAggregator(window=3600)
+for adiff in ContinuousAugmentedDiff():
+    for summary in aggregator.add(adiff):
+        store(summary.to_dict())  # Idle for an hour, most likely closed
+```
+
+Augmented diffs give the old version of modified and deleted objects, so
+tag changes are counted for them. OSMChange files only have the new
+version: creations count their tags as added, and tag changes of
+modifications are not counted.
+
+Summaries count changes, that is object versions: an object modified twice
+in a changeset counts as two modifications. Objects without a changeset
+id, such as objects parsed without metadata, are left out.
+"""
+
+import heapq
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from osmdiff.augmenteddiff import AugmentedDiff
+from osmdiff.spatial import envelope
+
+ACTIONS = ("create", "modify", "delete")
+TYPES = ("node", "way", "relation")
+_TYPE_INDEX = {"n": 0, "w": 1, "r": 2}
+
+
+def tag_changes(old, new) -> Tuple[int, int, int]:
+    """Count the tags added, removed and modified between two versions.
+
+    Args:
+        old: Tags of the old version
+        new: Tags of the new version
+
+    Returns:
+        tuple: Number of keys added, removed, and with a new value
+    """
+    if old is new:  # Shared tags, see osmdiff.osm.tags
+        return 0, 0, 0
+    added = modified = 0
+    for key, value in new.items():
+        previous = old.get(key)
+        if previous is None:
+            added += 1
+        elif previous != value:
+            modified += 1
+    removed = len(old) - (len(new) - added)
+    return added, removed, modified
+
+
+class Summary:
+    """Counters shared by changeset and user summaries.
+
+    Attributes:
+        counts: Number of changes per action and element type, see `count`
+        tags_added: Tag keys added to existing or new objects
+        tags_removed: Tag keys removed, including the tags of deleted objects
+        tags_modified: Tags whose value changed
+        first_timestamp: Earliest change, in epoch seconds
+        last_timestamp: Latest change, in epoch seconds
+        first_sequence: Sequence number of the first diff with a change
+        last_sequence: Sequence number of the last diff with a change
+    """
+
+    __slots__ = (
+        "counts",
+        "tags_added",
+        "tags_removed",
+        "tags_modified",
+        "first_timestamp",
+        "last_timestamp",
+        "first_sequence",
+        "last_sequence",
+    )
+
+    _FIELDS = __slots__[1:]
+
+    def __init__(self) -> None:
+        self.counts = array("L", [0]) * (len(ACTIONS) * len(TYPES))
+        self.tags_added = self.tags_removed = self.tags_modified = 0
+        self.first_timestamp = self.last_timestamp = None
+        self.first_sequence = self.last_sequence = None
+
+    def _record(
+        self,
+        index: int,
+        tags: Tuple[int, int, int],
+        timestamp: Optional[int],
+        sequence_number: Optional[int],
+    ) -> None:
+        self.counts[index] += 1
+        self.tags_added += tags[0]
+        self.tags_removed += tags[1]
+        self.tags_modified += tags[2]
+        if timestamp is not None:
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+        if sequence_number is not None:
+            if self.first_sequence is None:
+                self.first_sequence = sequence_number
+            self.last_sequence = sequence_number
+
+    def count(self, action: Optional[str] = None, type: Optional[str] = None) -> int:
+        """Number of changes of an action and element type.
+
+        Args:
+            action: "create", "modify" or "delete", None for all
+            type: "node", "way" or "relation", None for all
+        """
+        actions = range(len(ACTIONS)) if action is None else [ACTIONS.index(action)]
+        types = range(len(TYPES)) if type is None else [TYPES.index(type)]
+        return sum(self.counts[a * len(TYPES) + t] for a in actions for t in types)
+
+    @property
+    def changes(self) -> int:
+        """Total number of changes."""
+        return sum(self.counts)
+
+    def to_dict(self) -> dict:
+        """Export the summary as a JSON-serializable dictionary."""
+        data = {
+            "counts": {
+                action: {
+                    type: self.counts[a * len(TYPES) + t]
+                    for t, type in enumerate(TYPES)
+                }
+                for a, action in enumerate(ACTIONS)
+            }
+        }
+        for field in self._FIELDS:
+            data[field] = getattr(self, field)
+        return data
+
+    def _load(self, data: dict) -> None:
+        for a, action in enumerate(ACTIONS):
+            for t, type in enumerate(TYPES):
+                self.counts[a * len(TYPES) + t] = data["counts"][action][type]
+        for field in self._FIELDS:
+            setattr(self, field, data[field])
+
+
+class ChangesetSummary(Summary):
+    """Running statistics of a changeset.
+
+    Attributes:
+        id: Changeset id
+        uid: User id of the author
+        user: User name of the author
+        bbox: ``[minlon, minlat, maxlon, maxlat]`` of the old and new
+            versions of the changed objects, None if none had coordinates
+    """
+
+    __slots__ = ("id", "uid", "user", "bbox")
+
+    def __init__(
+        self, id: int, uid: Optional[int] = None, user: Optional[str] = None
+    ) -> None:
+        super().__init__()
+        self.id = id
+        self.uid = uid
+        self.user = user
+        self.bbox = None
+
+    def _extend(self, env: Optional[tuple]) -> None:
+        if env is None:
+            return
+        bbox = self.bbox
+        if bbox is None:
+            self.bbox = list(env)
+            return
+        if env[0] < bbox[0]:
+            bbox[0] = env[0]
+        if env[1] < bbox[1]:
+            bbox[1] = env[1]
+        if env[2] > bbox[2]:
+            bbox[2] = env[2]
+        if env[3] > bbox[3]:
+            bbox[3] = env[3]
+
+    def to_dict(self) -> dict:
+        """Export the summary as a JSON-serializable dictionary."""
+        data = {"id": self.id, "uid": self.uid, "user": self.user}
+        data.update(super().to_dict())
+        data["bbox"] = None if self.bbox is None else list(self.bbox)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChangesetSummary":
+        """Restore a summary exported with `to_dict`."""
+        summary = cls(data["id"], data["uid"], data["user"])
+        summary._load(data)
+        summary.bbox = None if data["bbox"] is None else list(data["bbox"])
+        return summary
+
+    def __repr__(self) -> str:
+        return f"ChangesetSummary({self.id}, {self.user}, {self.changes} changes)"
+
+
+class UserSummary(Summary):
+    """Running statistics of a user.
+
+    Attributes:
+        uid: User id
+        user: Latest user name
+        changesets: Number of changesets seen
+    """
+
+    __slots__ = ("uid", "user", "changesets")
+
+    def __init__(self, uid: int, user: Optional[str] = None) -> None:
+        super().__init__()
+        self.uid = uid
+        self.user = user
+        self.changesets = 0
+
+    def to_dict(self) -> dict:
+        """Export the summary as a JSON-serializable dictionary."""
+        data = {"uid": self.uid, "user": self.user, "changesets": self.changesets}
+        data.update(super().to_dict())
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserSummary":
+        """Restore a summary exported with `to_dict`."""
+        summary = cls(data["uid"], data["user"])
+        summary.changesets = data["changesets"]
+        summary._load(data)
+        return summary
+
+    def __repr__(self) -> str:
+        return f"UserSummary({self.uid}, {self.user}, {self.changesets} changesets)"
+
+
+def _changes(diff) -> Iterable[tuple]:
+    """Changes of a parsed diff as ``(action, old, new)``."""
+    if isinstance(diff, AugmentedDiff):
+        for obj in diff.create:
+            yield "create", None, obj
+        for action in ("modify", "delete"):
+            for change in getattr(diff, action):
+                yield action, change["old"], change["new"]
+    else:
+        for action, objects in diff.actions.items():
+            for obj in objects:
+                yield action, None, obj
+
+
+def _push(heap: list, summaries: dict, touched: dict) -> None:
+    """Add the new last timestamps of updated summaries to an eviction heap."""
+    for key, previous in touched.items():
+        last = summaries[key].last_timestamp
+        if last is not None and last != previous:
+            heapq.heappush(heap, (last, key))
+
+
+class ChangesetAggregator:
+    """Per-changeset and per-user summaries, updated diff by diff.
+
+    With a ``window``, summaries without changes in the last ``window``
+    seconds, measured from the newest change timestamp seen, are evicted
+    after each diff. The last change timestamps of the summaries are kept in
+    a heap, so eviction only looks at the evicted summaries. Summaries
+    without any timestamp are never evicted. A changeset that gets more
+    changes after it was evicted starts a new summary, and counts again in
+    the changesets of its user.
+
+    Args:
+        window: Seconds of inactivity after which summaries are evicted,
+            None to keep them until `evict` is called
+    """
+
+    def __init__(self, window: Optional[int] = None) -> None:
+        self.window = window
+        self.changesets = {}
+        self.users = {}
+        self.sequence_number = None
+        self.newest_timestamp = None
+        # (last_timestamp, key) of the summaries, stale entries are skipped
+        self._changeset_heap = []
+        self._user_heap = []
+
+    def add(self, diff) -> List[ChangesetSummary]:
+        """Update the summaries with the changes of a diff.
+
+        Args:
+            diff: AugmentedDiff or OSMChange with parsed changes
+
+        Returns:
+            list: Changeset summaries evicted by the window
+        """
+        return self.add_changes(_changes(diff), diff.sequence_number)
+
+    def add_changes(
+        self, changes: Iterable[tuple], sequence_number: Optional[int] = None
+    ) -> List[ChangesetSummary]:
+        """Update the summaries with changes, for instance from
+        `osmdiff.AugmentedDiff.iter_actions`.
+
+        Args:
+            changes: ``(action, old, new)`` tuples, ``old`` is None if unknown
+            sequence_number: Sequence number of the diff of the changes
+
+        Returns:
+            list: Changeset summaries evicted by the window
+        """
+        changesets, users = self.changesets, self.users
+        newest = self.newest_timestamp
+        # Last timestamp of the summaries updated, before this update
+        touched_changesets, touched_users = {}, {}
+        for action, old, new in changes:
+            obj = new if new is not None else old
+            changeset_id = obj.changeset
+            if changeset_id is None:
+                continue
+            if action == "modify" and old is not None and old.version == new.version:
+                continue  # Geometry of a way or relation changed with its nodes
+            index = ACTIONS.index(action) * len(TYPES) + _TYPE_INDEX[obj.osmtype]
+            if action == "create":
+                tags = (len(obj._tags), 0, 0)
+            elif old is None:
+                tags = (0, 0, 0)
+            elif action == "delete":
+                tags = (0, len(old._tags), 0)
+            else:
+                tags = tag_changes(old._tags, new._tags)
+            timestamp = obj.timestamp
+            if timestamp is not None and (newest is None or timestamp > newest):
+                newest = timestamp
+
+            uid = obj.uid
+            user = None
+            if uid is not None:
+                user = users.get(uid)
+                if user is None:
+                    user = users[uid] = UserSummary(uid, obj.user)
+                else:
+                    user.user = obj.user or user.user
+                if uid not in touched_users:
+                    touched_users[uid] = user.last_timestamp
+                user._record(index, tags, timestamp, sequence_number)
+
+            summary = changesets.get(changeset_id)
+            if summary is None:
+                summary = changesets[changeset_id] = ChangesetSummary(
+                    changeset_id, uid, obj.user
+                )
+                if user is not None:
+                    user.changesets += 1
+            if changeset_id not in touched_changesets:
+                touched_changesets[changeset_id] = summary.last_timestamp
+            summary._record(index, tags, timestamp, sequence_number)
+            summary._extend(envelope(new))
+            if old is not None:
+                summary._extend(envelope(old))
+
+        _push(self._changeset_heap, changesets, touched_changesets)
+        _push(self._user_heap, users, touched_users)
+        self.newest_timestamp = newest
+        if sequence_number is not None:
+            self.sequence_number = sequence_number
+        if self.window is None or newest is None:
+            return []
+        return self.evict(newest - self.window)
+
+    def evict(self, before: int) -> List[ChangesetSummary]:
+        """Remove the summaries without changes since a time.
+
+        Args:
+            before: Epoch seconds; summaries whose last change is older are
+                removed. Summaries without timestamps are kept.
+
+        Returns:
+            list: The evicted changeset summaries, oldest first
+        """
+        evicted = []
+        for summaries, heap, keep in (
+            (self.changesets, self._changeset_heap, evicted.append),
+            (self.users, self._user_heap, None),
+        ):
+            while heap and heap[0][0] < before:
+                last, key = heapq.heappop(heap)
+                summary = summaries.get(key)
+                if summary is None or summary.last_timestamp != last:
+                    continue  # Evicted already, or changed since
+                del summaries[key]
+                if keep is not None:
+                    keep(summary)
+        return evicted
+
+    def snapshot(self) -> dict:
+        """Export all summaries as a JSON-serializable dictionary."""
+        return {
+            "sequence_number": self.sequence_number,
+            "newest_timestamp": self.newest_timestamp,
+            "changesets": [s.to_dict() for s in self.changesets.values()],
+            "users": [s.to_dict() for s in self.users.values()],
+        }
+
+    @classmethod
+    def from_snapshot(
+        cls, snapshot: dict, window: Optional[int] = None
+    ) -> "ChangesetAggregator":
+        """Restore an aggregator from a `snapshot`.
+
+        Args:
+            snapshot: Dictionary from `snapshot`
+            window: Seconds of inactivity after which summaries are evicted
+
+        Returns:
+            ChangesetAggregator: The aggregator, to continue with the diff
+                after ``snapshot["sequence_number"]``
+        """
+        aggregator = cls(window)
+        aggregator.sequence_number = snapshot["sequence_number"]
+        aggregator.newest_timestamp = snapshot["newest_timestamp"]
+        for data in snapshot["changesets"]:
+            aggregator.changesets[data["id"]] = ChangesetSummary.from_dict(data)
+        for data in snapshot["users"]:
+            aggregator.users[data["uid"]] = UserSummary.from_dict(data)
+        for summaries, heap in (
+            (aggregator.changesets, aggregator._changeset_heap),
+            (aggregator.users, aggregator._user_heap),
+        ):
+            heap.extend(
+                (summary.last_timestamp, key)
+                for key, summary in summaries.items()
+                if summary.last_timestamp is not None
+            )
+            heapq.heapify(heap)
+        return aggregator
+
+    def __len__(self) -> int:
+        return len(self.changesets)
+
+    def __repr__(self) -> str:
+        return (
+            f"ChangesetAggregator ({len(self.changesets)} changesets, "
+            f"{len(self.users)} users)"
+        )
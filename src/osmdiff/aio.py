@@ -0,0 +1,117 @@
+"""
+Asyncio support.
+
+`AugmentedDiff.aretrieve`, `AugmentedDiff.aget_state`, `OSMChange.aretrieve`,
+`OSMChange.aget_state` and ``async for`` over `ContinuousAugmentedDiff` make
+their requests with aiohttp, which is installed with the ``async`` extra:
+
+```
+pip install "osmdiff[async]"
+```
+
+Response bodies are gunzipped if needed and fed to the parser backend chunk by
+chunk as they arrive, so the event loop is only busy for the time it takes to
+parse one chunk at a time.
+
+Pass an ``aiohttp.ClientSession`` as ``session`` to share its connection pool
+between requests. Without one, a session is opened for each call.
+
+Example:
+    ```python
+    import asyncio
+
+    import aiohttp
+    from osmdiff import AugmentedDiff
+
+    async def main():
+        async with aiohttp.ClientSession() as session:
+            diffs = [AugmentedDiff(sequence_number=n) for n in range(6000000, 6000010)]
+            await asyncio.gather(*(d.aretrieve(session=session) for d in diffs))
+
+    asyncio.run(main())
+    ```
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from osmdiff.backends import get_backend
+from osmdiff.config import DEFAULT_HEADERS
+from osmdiff.stream import CHUNK_SIZE, Inflater
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - depends on the environment
+    aiohttp = None
+
+# Errors after which a request is retried
+if aiohttp is not None:
+    RETRY_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+else:  # pragma: no cover - depends on the environment
+    RETRY_ERRORS = (asyncio.TimeoutError,)
+
+
+@asynccontextmanager
+async def open_session(session=None):
+    """Use the given client session, or open one for the duration of the block.
+
+    Args:
+        session: Optional ``aiohttp.ClientSession``
+
+    Yields:
+        aiohttp.ClientSession: The session to make requests with
+
+    Raises:
+        ImportError: If aiohttp is not installed
+    """
+    if session is not None:
+        yield session
+        return
+    if aiohttp is None:
+        raise ImportError("The async API requires aiohttp to be installed")
+    async with aiohttp.ClientSession(headers=DEFAULT_HEADERS) as session:
+        yield session
+
+
+def client_timeout(seconds: Optional[float]):
+    """Build an aiohttp timeout for a whole request.
+
+    Args:
+        seconds: Total timeout in seconds, or None for no timeout
+
+    Raises:
+        ImportError: If aiohttp is not installed
+    """
+    if aiohttp is None:
+        raise ImportError("The async API requires aiohttp to be installed")
+    return aiohttp.ClientTimeout(total=seconds)
+
+
+async def aparse(
+    response, chunk_size: int = CHUNK_SIZE, body: Optional[list] = None, filter=None
+) -> AsyncIterator[List[tuple]]:
+    """Parse a response body as it is received.
+
+    Args:
+        response: ``aiohttp.ClientResponse``
+        chunk_size: Maximum number of bytes to read at a time
+        body: If given, the chunks read are appended to it, for caching
+        filter: `osmdiff.filters.Filter` for the parser backend
+
+    Yields:
+        List[tuple]: The parser backend events completed by each chunk, see
+            `osmdiff.backends`
+    """
+    backend = get_backend()(filter)
+    inflater = Inflater()
+    async for chunk in response.content.iter_chunked(chunk_size):
+        if body is not None:
+            body.append(chunk)
+        for data in inflater.feed(chunk):
+            events = backend.feed(data)
+            if events:
+                yield events
+    for data in inflater.flush():
+        yield backend.feed(data)
+    yield backend.close()
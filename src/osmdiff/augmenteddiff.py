@@ -1,16 +1,107 @@
+import asyncio
 import logging
 import time
 from datetime import datetime
 from typing import Optional
-from xml.etree import ElementTree
 
 import requests
 from dateutil import parser
 
 from osmdiff.settings import DEFAULT_OVERPASS_URL
 
+from . import aio, backfill, binary, columns
+from .cache import cache_key, get_cache, raw_chunks
+from .checkpoint import CheckpointStore
+from .backends import get_backend
 from .config import API_CONFIG, DEFAULT_HEADERS
-from .osm import OSMObject
+from .continuous import ContinuousDiff
+from .delta import ModifyDelta
+from .filters import Filter
+from .schedule import PollScheduler
+from .session import get_session
+from .stream import decompress, iter_chunks
+
+
+class _ActionAssembler:
+    """Assemble actions from parser backend events, one event at a time.
+
+    Actions in augmented diffs are ordered: nodes first, then ways, then relations.
+    Within each type, elements are ordered by ID. Created objects are direct
+    children of their action, modified and deleted ones are wrapped in
+    ``<old>`` and ``<new>`` elements.
+
+    Events are pushed rather than pulled so the same code serves the blocking
+    and the asyncio retrieval. Remarks and the diff timestamp are recorded on
+    the diff as they are encountered.
+
+    Created objects are filtered by the parser backend. Modifications and
+    deletions are kept if either version matches the filter of the diff.
+
+    Args:
+        adiff: The AugmentedDiff being parsed
+    """
+
+    def __init__(self, adiff: "AugmentedDiff") -> None:
+        self.adiff = adiff
+        self.filter = adiff._get_filter()
+        self.action_type = None
+        self.meta = None
+        self.section = None
+        self.found = set()
+        self.old = self.new = None
+
+    def push(self, event: tuple) -> Optional[tuple]:
+        """Process an event.
+
+        Args:
+            event: Parser backend event
+
+        Returns:
+            tuple: ``(action, old, new, meta)`` if the event completed an
+                action, None otherwise
+        """
+        kind = event[0]
+        if kind == "object":
+            if self.action_type == "create":
+                return "create", None, event[1], None
+            elif self.section == "old":
+                self.old = event[1]
+            elif self.section == "new":
+                self.new = event[1]
+        elif kind == "start":
+            tag = event[1]
+            if tag == "action":
+                self.action_type = event[2]["type"]
+                self.meta = event[2]
+                self.found.clear()
+                self.old = self.new = None
+            elif tag in ("old", "new"):
+                self.section = tag
+                self.found.add(tag)
+            elif tag == "meta":
+                self.adiff.timestamp = parser.parse(event[2].get("osm_base"))
+        else:
+            tag = event[1]
+            if tag == "remark":
+                self.adiff._remarks.append(event[2])
+            elif tag in ("old", "new"):
+                self.section = None
+            elif tag == "action":
+                action = None
+                old, new = self.old, self.new
+                if self.action_type == "modify":
+                    if len(self.found) == 2 and old and new:
+                        action = "modify", old, new, None
+                elif self.action_type == "delete":
+                    if old is not None or new is not None:
+                        action = "delete", old, new, self.meta.copy()
+                if action is not None and self.filter is not None:
+                    if not (self.filter.matches(old) or self.filter.matches(new)):
+                        action = None
+                self.action_type = self.meta = None
+                self.old = self.new = None
+                return action
+        return None
 
 
 class AugmentedDiff:
@@ -28,9 +119,16 @@ class AugmentedDiff:
         sequence_number: Sequence number of the diff
         base_url: Override default Overpass API URL
         timeout: Request timeout in seconds
+        session: ``requests.Session`` to make requests with, instead of the
+            shared session from `osmdiff.session`
+        cache: `osmdiff.cache.DiffCache` to serve retrieved diffs from,
+            instead of the default cache
+        filter: `osmdiff.filters.Filter` for the actions to parse. The
+            bounding box is added to it, if it has none.
 
     Note:
         The bounding box coordinates should be in WGS84 (EPSG:4326) format.
+        Only actions with an old or new version in the bounding box are kept.
     """
 
     base_url = DEFAULT_OVERPASS_URL
@@ -50,10 +148,16 @@ class AugmentedDiff:
         timestamp: Optional[datetime] = None,
         base_url: Optional[str] = None,
         timeout: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        cache=None,
+        filter: Optional[Filter] = None,
     ) -> None:
         # Initialize with defaults from config
         self.base_url = base_url or API_CONFIG["overpass"]["base_url"]
         self.timeout = timeout or API_CONFIG["overpass"]["timeout"]
+        self.session = session
+        self.cache = cache
+        self.filter = filter
 
         # Initialize other config values
         self.minlon = minlon
@@ -66,8 +170,9 @@ class AugmentedDiff:
         self._create = []
         self._modify = []
         self._delete = []
+        self._response = None
         if file:
-            with open(file, "r") as file_handle:
+            with open(file, "rb") as file_handle:
                 self._parse_stream(file_handle)
         else:
             self.sequence_number = sequence_number
@@ -83,78 +188,205 @@ class AugmentedDiff:
 
     @classmethod
     def get_state(
-        cls, base_url: Optional[str] = None, timeout: Optional[int] = None
+        cls,
+        base_url: Optional[str] = None,
+        timeout: Optional[int] = None,
+        session: Optional[requests.Session] = None,
     ) -> Optional[dict]:
         """Get the current sequence number from the Overpass API.
 
         Args:
             base_url: Override default Overpass API URL (deprecated)
             timeout: Optional override for request timeout
+            session: Optional ``requests.Session`` to make the request with
 
         Returns:
             int: Sequence number
         """
         state_url = API_CONFIG["overpass"]["state_url"]
-        response = requests.get(
+        response = (session or get_session()).get(
             state_url, timeout=timeout or 5, headers=DEFAULT_HEADERS
         )
         response.raise_for_status()
         return_dict = {"sequence_number": int(response.text), "timestamp": None}
         return return_dict
 
-    def _build_action(self, elem):
-        """Parse an action element from an augmented diff.
+    @classmethod
+    async def aget_state(
+        cls, base_url: Optional[str] = None, timeout: Optional[int] = None, session=None
+    ) -> Optional[dict]:
+        """Asynchronous version of `get_state`, see `osmdiff.aio`.
+
+        Args:
+            base_url: Override default Overpass API URL (deprecated)
+            timeout: Optional override for request timeout
+            session: Optional ``aiohttp.ClientSession`` to make the request with
 
-        Actions in augmented diffs are ordered: nodes first, then ways, then relations.
-        Within each type, elements are ordered by ID.
+        Returns:
+            dict: Sequence number and timestamp
+        """
+        state_url = API_CONFIG["overpass"]["state_url"]
+        async with aio.open_session(session) as client:
+            async with client.get(
+                state_url,
+                timeout=aio.client_timeout(timeout or 5),
+                headers=DEFAULT_HEADERS,
+            ) as response:
+                response.raise_for_status()
+                text = await response.text()
+        return {"sequence_number": int(text), "timestamp": None}
+
+    def _append_action(self, action, old, new, meta) -> None:
+        """Store a parsed action in the matching create/modify/delete list."""
+        if action == "create":
+            self._create.append(new)
+        elif action == "modify":
+            self._modify.append({"old": old, "new": new})
+        elif action == "delete":
+            # Store both old and new, and optionally meta info
+            self._delete.append({"old": old, "new": new, "meta": meta})
+
+    def _iter_events(self, events):
+        """Assemble actions from parser backend events, see `_ActionAssembler`.
+
+        Yields:
+            tuple: ``(action, old, new, meta)`` for each object in the diff.
         """
-        action_type = elem.attrib["type"]
-
-        if action_type == "create":
-            for child in elem:
-                osm_obj = OSMObject.from_xml(child)
-                self._create.append(osm_obj)
-        elif action_type == "modify":
-            old = elem.find("old")
-            new = elem.find("new")
-            if old is not None and new is not None:
-                osm_obj_old = None
-                osm_obj_new = None
-                for child in old:
-                    osm_obj_old = OSMObject.from_xml(child)
-                for child in new:
-                    osm_obj_new = OSMObject.from_xml(child)
-                if osm_obj_old and osm_obj_new:
-                    self._modify.append({"old": osm_obj_old, "new": osm_obj_new})
-        elif action_type == "delete":
-            old = elem.find("old")
-            new = elem.find("new")
-            osm_obj_old = None
-            osm_obj_new = None
-            if old is not None:
-                for child in old:
-                    osm_obj_old = OSMObject.from_xml(child)
-            if new is not None:
-                for child in new:
-                    osm_obj_new = OSMObject.from_xml(child)
-            if osm_obj_old is not None or osm_obj_new is not None:
-                # Store both old and new, and optionally meta info
-                deletion_info = {
-                    "old": osm_obj_old,
-                    "new": osm_obj_new,
-                    "meta": elem.attrib.copy(),
-                }
-                self._delete.append(deletion_info)
+        push = _ActionAssembler(self).push
+        for event in events:
+            action = push(event)
+            if action is not None:
+                yield action
+
+    def _iter_stream(self, stream, filter: Optional[Filter] = None):
+        """Incrementally parse an augmented diff stream.
+
+        Objects are handed out as soon as their action is complete and are not
+        kept by the parser, so memory use does not grow with the size of the diff.
+        """
+        return self._iter_chunks(iter_chunks(stream), filter)
+
+    def _iter_chunks(self, chunks, filter: Optional[Filter] = None):
+        """Parse (possibly gzipped) augmented diff chunks into actions.
+
+        The parser backend uses ``filter`` if given, the filter of the diff
+        otherwise.
+        """
+        backend = get_backend()(filter or self._get_filter())
+        return self._iter_events(backend.parse(decompress(chunks)))
+
+    def _get_filter(self) -> Optional[Filter]:
+        """The filter to parse with, including the bounding box."""
+        bbox = (self.minlon, self.minlat, self.maxlon, self.maxlat)
+        if None in bbox:
+            return self.filter
+        return (self.filter or Filter()).with_bbox(bbox)
+
+    def _get_cache(self):
+        return self.cache or get_cache()
+
+    def _cache_key(self) -> str:
+        return cache_key(
+            self.base_url,
+            self.sequence_number,
+            (self.minlon, self.minlat, self.maxlon, self.maxlat),
+        )
+
+    def _store_actions(self, actions) -> None:
+        """Add parsed actions to the lists once all of them have been parsed."""
+        for action in list(actions):
+            self._append_action(*action)
 
     def _parse_stream(self, stream):
-        for event, elem in ElementTree.iterparse(stream):
-            if elem.tag == "remark":
-                self._remarks.append(elem.text)
-            if elem.tag == "meta":
-                timestamp = parser.parse(elem.attrib.get("osm_base"))
-                self.timestamp = timestamp
-            if elem.tag == "action":
-                self._build_action(elem)
+        for action in self._iter_stream(stream):
+            self._append_action(*action)
+
+    def iter_actions(self, stream=None):
+        """Iterate over the actions in an augmented diff one at a time.
+
+        Unlike `retrieve`, nothing is added to `create`, `modify` or `delete`, and
+        each ``<action>`` element is freed once it has been parsed, so memory use
+        stays flat regardless of the size of the diff. Remarks and the diff
+        timestamp are still recorded as they are encountered.
+
+        Args:
+            stream: File-like object with augmented diff XML. If omitted, the
+                response opened by ``retrieve(stream=True)`` is consumed.
+
+        Yields:
+            tuple: ``(action, old, new)`` where action is ``"create"``,
+                ``"modify"`` or ``"delete"``. ``old`` is None for creations.
+
+        Raises:
+            Exception: If no stream is given and no retrieval is pending
+
+        Example:
+            ```python
+            adiff = AugmentedDiff(sequence_number=12345)
+            adiff.retrieve(stream=True)
+            for action, old, new in adiff.iter_actions():
+                ...
+            ```
+        """
+        for action, old, new, _ in self._iter_source(stream):
+            yield action, old, new
+
+    def _iter_source(self, stream=None, filter: Optional[Filter] = None):
+        """Parse the given stream, or the response of ``retrieve(stream=True)``."""
+        if stream is not None:
+            yield from self._iter_stream(stream, filter)
+            return
+
+        response, self._response = self._response, None
+        if response is None:
+            raise Exception("no pending stream, call retrieve(stream=True) first")
+        try:
+            yield from self._iter_stream(response.raw, filter)
+        finally:
+            response.close()
+
+    def iter_deltas(self, stream=None):
+        """Iterate over the changes of the modified objects, see `osmdiff.delta`.
+
+        Creations and deletions are skipped by the parser without being built.
+        Both versions of each modification are still built as full objects;
+        the delta is computed from them once the action has been parsed, and
+        they are dropped right after. Like `iter_actions`, nothing is added to
+        `create`, `modify` or `delete`.
+
+        Args:
+            stream: File-like object with augmented diff XML. If omitted, the
+                response opened by ``retrieve(stream=True)`` is consumed.
+
+        Yields:
+            ModifyDelta: Delta of each modified object
+
+        Raises:
+            Exception: If no stream is given and no retrieval is pending
+
+        Example:
+            ```python
+            adiff = AugmentedDiff(sequence_number=12345)
+            adiff.retrieve(stream=True)
+            for delta in adiff.iter_deltas():
+                if delta.geometry_only:
+                    ...
+            ```
+        """
+        filter = (self._get_filter() or Filter()).with_actions(["modify"])
+        for _, old, new, _ in self._iter_source(stream, filter):
+            yield ModifyDelta.from_versions(old, new)
+
+    def deltas(self) -> list:
+        """Compute the delta of each modified object, see `osmdiff.delta`.
+
+        Returns:
+            list: `ModifyDelta` of each entry of `modify`, in the same order
+        """
+        return [
+            ModifyDelta.from_versions(change["old"], change["new"])
+            for change in self.modify
+        ]
 
     def retrieve(
         self,
@@ -162,17 +394,26 @@ class AugmentedDiff:
         timeout: Optional[int] = None,
         auto_increment: bool = True,
         max_retries: int = 3,
+        stream: bool = False,
     ) -> int:
         """Retrieve the Augmented diff corresponding to the sequence_number.
 
+        If a cache is set up (see `osmdiff.cache`), a cached diff is parsed
+        instead of being downloaded, and downloaded diffs are added to the
+        cache.
+
         Args:
             clear_cache: Whether to clear existing data before retrieval.
             timeout: Request timeout in seconds.
             auto_increment: Whether to automatically increment sequence number after retrieval.
             max_retries: Maximum number of retry attempts for failed requests.
+            stream: Open the response without parsing it. The actions are then
+                read one at a time with `iter_actions` instead of being stored.
+                The cache is not used.
 
         Returns:
-            HTTP status code of the request (200 for success)
+            HTTP status code of the request (200 for success, also when
+            served from the cache)
 
         Raises:
             Exception: If sequence_number is not set
@@ -186,6 +427,17 @@ class AugmentedDiff:
 
         url = self.base_url.format(sequence_number=self.sequence_number)
 
+        cache = None if stream else self._get_cache()
+        if cache is not None:
+            key = self._cache_key()
+            data = cache.get(key)
+            if data is not None:
+                self._logger.info(f"Diff {self.sequence_number} served from cache")
+                self._store_actions(self._iter_chunks([data]))
+                if auto_increment:
+                    self.sequence_number += 1
+                return 200
+
         self._logger.info(f"Retrieving diff {self.sequence_number} from {url}")
 
         # Store current data before making request
@@ -204,7 +456,7 @@ class AugmentedDiff:
                 if attempt > 0:
                     time.sleep(2**attempt)  # 2, 4, 8 seconds...
 
-                r = requests.get(
+                r = (self.session or get_session()).get(
                     url, stream=True, timeout=request_timeout, headers=DEFAULT_HEADERS
                 )
 
@@ -213,11 +465,24 @@ class AugmentedDiff:
 
                 r.raw.decode_content = True
 
+                if stream:
+                    if self._response is not None:
+                        self._response.close()
+                    self._response = r
+                    if auto_increment:
+                        self.sequence_number += 1
+                    return r.status_code
+
                 # Clear current lists but keep previous data
                 self._create, self._modify, self._delete = ([], [], [])
 
                 # Parse new data
-                self._parse_stream(r.raw)
+                if cache is not None:
+                    self._store_actions(
+                        self._iter_chunks(cache.tee(key, raw_chunks(r)))
+                    )
+                else:
+                    self._parse_stream(r.raw)
 
                 # Merge with previous data
                 self._create = prev_create + self._create
@@ -240,6 +505,212 @@ class AugmentedDiff:
 
         return 0  # Should never reach here due to raise in except block
 
+    async def aretrieve(
+        self,
+        clear_cache: bool = False,
+        timeout: Optional[int] = None,
+        auto_increment: bool = True,
+        max_retries: int = 3,
+        session=None,
+    ) -> int:
+        """Asynchronous version of `retrieve`, see `osmdiff.aio`.
+
+        The body is parsed chunk by chunk as it is received. The actions are
+        added to `create`, `modify` and `delete` once the whole diff has been
+        parsed.
+
+        Args:
+            clear_cache: Whether to clear existing data before retrieval.
+            timeout: Request timeout in seconds.
+            auto_increment: Whether to automatically increment sequence number after retrieval.
+            max_retries: Maximum number of retry attempts for failed requests.
+            session: Optional ``aiohttp.ClientSession`` to make the request with.
+
+        Returns:
+            HTTP status code of the request (200 for success)
+
+        Raises:
+            Exception: If sequence_number is not set
+            aiohttp.ClientConnectionError: If all retry attempts fail
+            asyncio.TimeoutError: If all retry attempts time out
+        """
+        if not self.sequence_number:
+            raise Exception("invalid sequence number")
+
+        if clear_cache:
+            self._create, self._modify, self._delete = ([], [], [])
+
+        url = self.base_url.format(sequence_number=self.sequence_number)
+
+        cache = self._get_cache()
+        if cache is not None:
+            key = self._cache_key()
+            data = cache.get(key)
+            if data is not None:
+                self._store_actions(self._iter_chunks([data]))
+                if auto_increment:
+                    self.sequence_number += 1
+                return 200
+
+        self._logger.info(f"Retrieving diff {self.sequence_number} from {url}")
+
+        request_timeout = timeout or self.timeout or 120
+
+        async with aio.open_session(session) as client:
+            for attempt in range(max_retries):
+                try:
+                    # Exponential backoff between retries
+                    if attempt > 0:
+                        await asyncio.sleep(2**attempt)
+
+                    async with client.get(
+                        url,
+                        timeout=aio.client_timeout(request_timeout),
+                        headers=DEFAULT_HEADERS,
+                    ) as r:
+                        if r.status != 200:
+                            return r.status
+
+                        actions = []
+                        body = [] if cache is not None else None
+                        push = _ActionAssembler(self).push
+                        async for events in aio.aparse(
+                            r, body=body, filter=self._get_filter()
+                        ):
+                            for event in events:
+                                action = push(event)
+                                if action is not None:
+                                    actions.append(action)
+
+                    for action in actions:
+                        self._append_action(*action)
+                    if cache is not None:
+                        cache.put(key, b"".join(body))
+
+                    if auto_increment:
+                        self.sequence_number += 1
+
+                    return r.status
+
+                except aio.RETRY_ERRORS:
+                    if attempt == max_retries - 1:  # Last attempt
+                        raise
+                    continue
+
+        return 0  # Should never reach here due to raise in except block
+
+    @classmethod
+    def fetch_range(
+        cls,
+        start: int,
+        end: int,
+        workers: Optional[int] = None,
+        processes: Optional[int] = None,
+        **kwargs,
+    ):
+        """Retrieve a range of augmented diffs in parallel.
+
+        Diffs are downloaded concurrently, parsed in a process pool and
+        yielded in sequence order, see `osmdiff.backfill`.
+
+        Args:
+            start: First sequence number
+            end: Last sequence number, inclusive
+            workers: Number of concurrent downloads
+            processes: Number of parser processes, 0 to parse in threads
+            **kwargs: Passed to the constructor, e.g. ``base_url`` or ``timeout``
+
+        Yields:
+            AugmentedDiff: Each diff, in sequence order
+
+        Example:
+            ```python
+            for adiff in AugmentedDiff.fetch_range(6000000, 6000099, workers=2):
+                print(adiff.sequence_number, len(adiff.create))
+            ```
+        """
+        return backfill.fetch_range(cls, start, end, workers, processes, **kwargs)
+
+    def _download_body(self) -> bytes:
+        """Download the diff for the current sequence number, for `fetch_range`."""
+        cache = self._get_cache()
+        if cache is not None:
+            key = self._cache_key()
+            data = cache.get(key)
+            if data is not None:
+                return data
+        url = self.base_url.format(sequence_number=self.sequence_number)
+        with backfill.host_slot(url):
+            r = (self.session or get_session()).get(
+                url, timeout=self.timeout or 120, headers=DEFAULT_HEADERS
+            )
+        r.raise_for_status()
+        if cache is not None:
+            cache.put(key, r.content)
+        return r.content
+
+    def _parse_body(self, body: bytes) -> None:
+        self._store_actions(self._iter_chunks([body]))
+
+    def dump(self, path) -> None:
+        """Write the diff to a binary file, see `osmdiff.binary`.
+
+        The objects, remarks, timestamp, sequence number and bounding box are
+        written; `load` restores them without parsing any XML.
+
+        Args:
+            path: File to write
+
+        Raises:
+            TypeError: If an object cannot be serialized
+        """
+        meta = {
+            "sequence_number": self.sequence_number,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "remarks": self._remarks,
+            "bbox": [self.minlon, self.minlat, self.maxlon, self.maxlat],
+        }
+        binary.dump(
+            path,
+            binary.AUGMENTED_DIFF,
+            (self._create, self._modify, self._delete),
+            meta,
+        )
+
+    @classmethod
+    def load(cls, path, lazy: bool = True) -> "AugmentedDiff":
+        """Create an AugmentedDiff from a file written by `dump`.
+
+        The file is memory-mapped and, unless lazy is False, objects are only
+        decoded when they are accessed, so loading takes next to no time
+        regardless of the size of the diff.
+
+        Args:
+            path: File written by `dump`
+            lazy: Keep the actions in `osmdiff.binary.LazyList` sequences
+                instead of decoding them all up front
+
+        Returns:
+            AugmentedDiff: The diff
+
+        Raises:
+            ValueError: If the file is not a binary augmented diff
+        """
+        meta, sections = binary.load(path, binary.AUGMENTED_DIFF, lazy)
+        minlon, minlat, maxlon, maxlat = meta["bbox"]
+        adiff = cls(
+            minlon=minlon,
+            minlat=minlat,
+            maxlon=maxlon,
+            maxlat=maxlat,
+            sequence_number=meta["sequence_number"],
+        )
+        if meta["timestamp"]:
+            adiff.timestamp = datetime.fromisoformat(meta["timestamp"])
+        adiff._remarks = meta["remarks"]
+        adiff._create, adiff._modify, adiff._delete = sections
+        return adiff
+
     @property
     def create(self) -> list:
         """Get the list of created objects from the augmented diff."""
@@ -319,6 +790,47 @@ class AugmentedDiff:
         """Get all actions combined in a single list."""
         return {"create": self._create, "modify": self._modify, "delete": self._delete}
 
+    def _iter_rows(self):
+        """Yield (action, object) with the state of each object after the change."""
+        for obj in self._create:
+            yield "create", obj
+        for action in self._modify:
+            yield "modify", action["new"]
+        for action in self._delete:
+            yield "delete", action["new"] or action["old"]
+
+    def to_columns(self) -> dict:
+        """Export the diff as columns, one row per action.
+
+        Rows describe the object after the change: the new version for
+        creations and modifications, and the deleted version for deletions,
+        which carries the changeset, user and timestamp of the deletion but
+        no tags or coordinates. See `osmdiff.columns` for the layout.
+
+        Returns:
+            dict: ``array.array`` and list columns by name
+        """
+        return columns.to_columns(self._iter_rows())
+
+    def to_arrays(self) -> dict:
+        """Export the diff as NumPy arrays, see `to_columns`.
+
+        Returns:
+            dict: NumPy arrays by column name
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        return columns.to_arrays(self.to_columns())
+
+    def to_arrow(self):
+        """Export the diff as a ``pyarrow.Table``, see `to_columns`.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        return columns.to_arrow(self.to_columns())
+
     def __repr__(self):
         return """AugmentedDiff ({create} created, {modify} modified, {delete} deleted)""".format(
             create=len(self._create),
@@ -333,12 +845,17 @@ class AugmentedDiff:
         self._create.clear()
         self._modify.clear()
         self._delete.clear()
+        if self._response is not None:
+            self._response.close()
+            self._response = None
 
 
-class ContinuousAugmentedDiff:
+class ContinuousAugmentedDiff(ContinuousDiff):
     """Iterator for continuously fetching augmented diffs with backoff.
 
-    Yields AugmentedDiff objects as new diffs become available.
+    Yields AugmentedDiff objects as new diffs become available. See
+    `osmdiff.continuous.ContinuousDiff` for catching up, prefetching and
+    scheduling.
 
     Args:
         minlon: Minimum longitude of bounding box
@@ -349,6 +866,20 @@ class ContinuousAugmentedDiff:
         timeout: Request timeout in seconds
         min_interval: Minimum seconds between checks (default: 30)
         max_interval: Maximum seconds between checks (default: 120)
+        session: ``requests.Session`` to make requests with, instead of the
+            shared session from `osmdiff.session`
+        async_session: ``aiohttp.ClientSession`` for asynchronous iteration
+            with ``async for``, see `osmdiff.aio`. If omitted, a session is
+            opened for each request.
+        filter: `osmdiff.filters.Filter` for the actions to parse
+        prefetch: Number of diffs to retrieve ahead of the consumer, 0 to
+            retrieve them one at a time
+        scheduler: `osmdiff.schedule.PollScheduler` to plan state checks
+            after the predicted publish time of the next diff, instead of
+            every ``min_interval`` seconds
+        checkpoint: `osmdiff.checkpoint.CheckpointStore` to resume from and
+            to record processed sequences in
+        consumer: Name of the consumer in the checkpoint store
     """
 
     def __init__(
@@ -361,80 +892,55 @@ class ContinuousAugmentedDiff:
         timeout: Optional[int] = None,
         min_interval: int = 30,
         max_interval: int = 120,
+        session: Optional[requests.Session] = None,
+        async_session=None,
+        filter: Optional[Filter] = None,
+        prefetch: int = 0,
+        scheduler: Optional[PollScheduler] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        consumer: str = "default",
     ):
+        super().__init__(
+            timeout=timeout,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            session=session,
+            async_session=async_session,
+            filter=filter,
+            prefetch=prefetch,
+            scheduler=scheduler,
+            checkpoint=checkpoint,
+            consumer=consumer,
+        )
         self.bbox = (minlon, minlat, maxlon, maxlat)
         self.base_url = base_url
-        self.timeout = timeout
-        self.min_interval = min_interval
-        self.max_interval = max_interval
-
-        self._current_sequence = None
-        self._current_interval = min_interval
-        self._last_check = None
-        self._logger = logging.getLogger(__name__)
-
-    def _wait_for_next_check(self) -> None:
-        """Wait appropriate time before next check, using exponential backoff."""
-        now = datetime.now()
-        if self._last_check:
-            elapsed = (now - self._last_check).total_seconds()
-            wait_time = max(0, self._current_interval - elapsed)
-            if wait_time > 0:
-                time.sleep(wait_time)
-
-        self._last_check = datetime.now()
-
-    def _backoff(self) -> None:
-        """Increase check interval, up to max_interval."""
-        self._current_interval = min(self._current_interval * 2, self.max_interval)
-
-    def _reset_backoff(self) -> None:
-        """Reset check interval to minimum."""
-        self._current_interval = self.min_interval
-
-    def __iter__(self):
-        return self
 
-    def __next__(self) -> AugmentedDiff:
-        while True:
-            self._wait_for_next_check()
-
-            # check if we have a newer sequence on the remote
-            newest_remote = AugmentedDiff.get_state(timeout=self.timeout)
-
-            # if we don't have a local sequence number yet, set it
-            if self._current_sequence is None:
-                self._current_sequence = newest_remote
-
-            # if we do, proceed ony if the remote is newer
-            elif self._current_sequence >= newest_remote:
-                continue
+    def _new_diff(self, sequence_number: Optional[int] = None) -> AugmentedDiff:
+        """Create the diff object for the current or the given sequence."""
+        if sequence_number is None:
+            sequence_number = self._current_sequence
+        return AugmentedDiff(
+            minlon=self.bbox[0],
+            minlat=self.bbox[1],
+            maxlon=self.bbox[2],
+            maxlat=self.bbox[3],
+            sequence_number=sequence_number,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            session=self.session,
+            filter=self.filter,
+        )
 
-            # Create diff object for new sequence
-            diff = AugmentedDiff(
-                minlon=self.bbox[0],
-                minlat=self.bbox[1],
-                maxlon=self.bbox[2],
-                maxlat=self.bbox[3],
-                sequence_number=self._current_sequence,
-                base_url=self.base_url,
-                timeout=self.timeout,
-            )
+    def _get_state(self) -> dict:
+        return AugmentedDiff.get_state(timeout=self.timeout, session=self.session)
 
-            # Try to retrieve the diff
-            try:
-                status = diff.retrieve(auto_increment=False)
-                if status != 200:
-                    self._logger.warning(f"Failed to retrieve diff: HTTP {status}")
-                    self._backoff()
-                    continue
+    async def _aget_state(self) -> dict:
+        return await AugmentedDiff.aget_state(
+            timeout=self.timeout, session=self.async_session
+        )
 
-                # Success! Reset backoff and update sequence
-                self._reset_backoff()
-                self._current_sequence += 1
-                return diff
+    def _retrieve_diff(self, diff: AugmentedDiff) -> int:
+        return diff.retrieve(auto_increment=False)
 
-            except Exception as e:
-                self._logger.warning(f"Error retrieving diff: {e}")
-                self._backoff()
-                continue
+    async def _aretrieve_diff(self, diff: AugmentedDiff) -> int:
+        return await diff.aretrieve(auto_increment=False, session=self.async_session)
@@ -0,0 +1,467 @@
+"""
+Pluggable XML parser backends.
+
+All diff parsing in osmdiff goes through a parser backend. A backend is fed
+chunks of XML and reports a flat stream of events:
+
+- ``("start", tag, attrib)`` when an element outside of an OSM object opens
+- ``("end", tag, text)`` when such an element closes
+- ``("object", obj)`` when a top-level node, way or relation is complete
+
+`AugmentedDiff` and `OSMChange` only have to follow the container elements
+(actions, old/new, meta, remarks) and pick up the finished objects.
+
+Backends take an optional `osmdiff.filters.Filter`. Top-level objects it
+rejects are skipped without being built, see `osmdiff.filters`.
+
+Each backend interns tag keys and short values through a
+`osmdiff.osm.tags.TagTable`, and shares identical tag sets between objects
+if ``PARSER_CONFIG["share_tags"]`` is set.
+
+Three backends are available:
+
+- ``expat``: builds Node/Way/Relation objects straight from
+  ``xml.parsers.expat`` callbacks, without an intermediate element tree
+- ``lxml``: ``lxml.etree`` pull parser, if lxml is installed
+- ``etree``: the standard library ``xml.etree.ElementTree`` pull parser
+
+By default the fastest available backend is chosen, which is expat on
+CPython (see ``benchmarks/bench_backends.py``). A specific backend can be
+forced through the configuration:
+
+```python
+from osmdiff.config import PARSER_CONFIG
+
+PARSER_CONFIG["backend"] = "etree"
+```
+"""
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+from xml.parsers import expat
+
+from osmdiff.config import PARSER_CONFIG
+from osmdiff.osm import OSMObject, Relation, Way
+from osmdiff.osm.tags import INTERN_MAX_LENGTH, TagTable
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - depends on the environment
+    lxml_etree = None
+
+OSM_TYPES = ("node", "way", "relation")
+ACTIONS = ("create", "modify", "delete")
+# Containers of the old and new versions in augmented diffs. Objects in them
+# are only checked for their action and type: whether an action matches
+# depends on both versions, which is decided by the AugmentedDiff parser.
+VERSIONS = ("old", "new")
+
+
+def _container_action(tag: str, attrib: dict, action: Optional[str]) -> Optional[str]:
+    """Track the action of the objects to come from container start tags."""
+    if tag in ACTIONS:  # OSMChange
+        return tag
+    if tag == "action":  # Augmented diff
+        return attrib.get("type")
+    return action
+
+
+class ParserBackend:
+    """Base class for incremental XML parser backends.
+
+    A backend instance parses a single document. Feed it chunks with `feed`
+    and finish with `close`, or use `parse` to run over an iterable of chunks.
+    """
+
+    name = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the backend can be used in this environment."""
+        return True
+
+    def feed(self, data: bytes) -> List[tuple]:
+        """Feed a chunk of XML and return the events it completed."""
+        raise NotImplementedError
+
+    def close(self) -> List[tuple]:
+        """Signal the end of the document and return the remaining events."""
+        raise NotImplementedError
+
+    def parse(self, chunks: Iterable[bytes]) -> Iterator[tuple]:
+        """Parse a document from an iterable of chunks.
+
+        Args:
+            chunks: Iterable of XML byte chunks
+
+        Yields:
+            tuple: Parser events
+        """
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+
+class ElementEvents:
+    """Translate (event, element) pairs from an element tree pull parser.
+
+    OSM objects are built with `OSMObject.from_xml` once their end tag has
+    been seen and are then removed from the tree, as are closed container
+    elements, so only the open part of the document is kept in memory.
+
+    Streams that only contain end events, from ``iterparse(source)``, are
+    supported too: each container is then reported with the objects it
+    contains when it closes.
+
+    Args:
+        filter: `osmdiff.filters.Filter` for the top-level objects
+    """
+
+    def __init__(self, filter=None) -> None:
+        self._stack = []  # Open elements outside of OSM objects
+        self._depth = 0  # Nesting level inside the current OSM object
+        self._filter = filter
+        self._action = None
+        self._versions = 0  # Number of open old/new containers
+        self._table = TagTable(PARSER_CONFIG["share_tags"])
+
+    def _build(self, elem: ElementTree.Element) -> OSMObject:
+        obj = OSMObject.from_xml(elem)
+        obj._tags = self._table.rebuild(obj._tags)
+        return obj
+
+    def _accepts(self, elem: ElementTree.Element) -> bool:
+        """Check a complete top-level object element against the filter."""
+        filter = self._filter
+        if filter.rejects(self._action, elem.tag):
+            return False
+        if self._versions:
+            return True
+        verdict = filter.check_start(elem.tag, elem.attrib)
+        if verdict is not None:
+            return verdict
+        tags = {}
+        bounds = None
+        for child in elem:
+            if child.tag == "tag":
+                tags[child.get("k")] = child.get("v")
+            elif child.tag == "bounds" and bounds is None:
+                bounds = [child.get(k) for k in ("minlon", "minlat", "maxlon", "maxlat")]
+        points = (
+            (e.get("lon"), e.get("lat")) for e in elem.iter() if e.get("lat") is not None
+        )
+        return filter.test(tags, points, bounds)
+
+    def convert(self, pairs: Iterable[Tuple[str, ElementTree.Element]]):
+        """Convert element events to backend events.
+
+        Args:
+            pairs: (event, element) pairs with "start" and "end" events
+
+        Yields:
+            tuple: Parser events
+        """
+        stack = self._stack
+        for event, elem in pairs:
+            if event == "start":
+                if self._depth:
+                    self._depth += 1
+                elif elem.tag in OSM_TYPES:
+                    self._depth = 1
+                else:
+                    stack.append(elem)
+                    self._action = _container_action(
+                        elem.tag, elem.attrib, self._action
+                    )
+                    self._versions += elem.tag in VERSIONS
+                    yield "start", elem.tag, dict(elem.attrib)
+            elif self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    if stack:
+                        stack[-1].remove(elem)
+                    if self._filter is None or self._accepts(elem):
+                        yield "object", self._build(elem)
+            elif stack and stack[-1] is elem:
+                stack.pop()
+                if stack:
+                    stack[-1].remove(elem)
+                self._versions -= elem.tag in VERSIONS
+                yield "end", elem.tag, elem.text
+            elif elem.tag not in OSM_TYPES:
+                # No start events: report the container as a whole
+                self._action = _container_action(elem.tag, elem.attrib, self._action)
+                yield "start", elem.tag, dict(elem.attrib)
+                for child in elem:
+                    if child.tag in OSM_TYPES and (
+                        self._filter is None or self._accepts(child)
+                    ):
+                        yield "object", self._build(child)
+                yield "end", elem.tag, elem.text
+
+
+class EtreeBackend(ParserBackend):
+    """Backend using the standard library ElementTree pull parser."""
+
+    name = "etree"
+
+    def __init__(self, filter=None) -> None:
+        self._parser = self._create_parser()
+        self._events = ElementEvents(filter)
+
+    def _create_parser(self):
+        return ElementTree.XMLPullParser(events=("start", "end"))
+
+    def feed(self, data: bytes) -> List[tuple]:
+        self._parser.feed(data)
+        return list(self._events.convert(self._parser.read_events()))
+
+    def close(self) -> List[tuple]:
+        self._parser.close()
+        return list(self._events.convert(self._parser.read_events()))
+
+
+class LxmlBackend(EtreeBackend):
+    """Backend using the lxml pull parser (the incremental form of iterparse)."""
+
+    name = "lxml"
+
+    @classmethod
+    def available(cls) -> bool:
+        return lxml_etree is not None
+
+    def _create_parser(self):
+        if lxml_etree is None:
+            raise ImportError("The lxml backend requires lxml to be installed")
+        return lxml_etree.XMLPullParser(events=("start", "end"))
+
+    def feed(self, data: bytes) -> List[tuple]:
+        try:
+            return super().feed(data)
+        except lxml_etree.XMLSyntaxError as e:
+            raise ElementTree.ParseError(str(e)) from e
+
+    def close(self) -> List[tuple]:
+        try:
+            return super().close()
+        except lxml_etree.XMLSyntaxError as e:
+            raise ElementTree.ParseError(str(e)) from e
+
+
+class ExpatBackend(ParserBackend):
+    """Backend building OSM objects directly from expat callbacks.
+
+    No element tree is created: tags, way nodes, relation members and bounds
+    are attached to the object under construction as their start tags are
+    seen. The resulting objects are the same as those of `OSMObject.from_xml`.
+
+    With a filter, rejected objects are skipped by swapping in handlers that
+    only count the nesting level. Objects that cannot be decided on from
+    their start tag have their child elements buffered until the end tag,
+    and are only built if they match.
+
+    Args:
+        filter: `osmdiff.filters.Filter` for the top-level objects
+    """
+
+    name = "expat"
+
+    def __init__(self, filter=None) -> None:
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.CharacterDataHandler = self._data
+        self._handle(self._start, self._end)
+        self._events = []
+        # Objects under construction, one entry per open element inside a
+        # top-level object. None marks elements that take no children.
+        self._stack = []
+        self._text = []
+        self._filter = filter
+        self._action = None
+        self._versions = 0  # Number of open old/new containers
+        self._depth = 0  # Nesting level inside a skipped or buffered object
+        # Start tags (tag, attrib) and end tags (None) of a buffered object
+        self._buffer = []
+        self._table = TagTable(PARSER_CONFIG["share_tags"])
+        self._intern = self._table.strings.setdefault
+
+    def _handle(self, start, end) -> None:
+        self._parser.StartElementHandler = start
+        self._parser.EndElementHandler = end
+
+    def _start(self, tag: str, attrib: dict) -> None:
+        stack = self._stack
+        if stack:
+            target = stack[-1]
+            child = None
+            if target is not None:
+                if tag == "tag":
+                    intern = self._intern
+                    key, value = attrib["k"], attrib["v"]
+                    if len(value) <= INTERN_MAX_LENGTH:
+                        value = intern(value, value)
+                    target._tags[intern(key, key)] = value
+                elif tag == "nd" and isinstance(target, Way):
+                    target._add_nd(attrib)
+                elif tag == "member" and isinstance(target, Relation):
+                    child = OSMObject._from_attrib(tag, attrib)
+                    target.members.append(child)
+                elif tag == "bounds" and target.bounds is None:
+                    target.bounds = [
+                        attrib["minlon"],
+                        attrib["minlat"],
+                        attrib["maxlon"],
+                        attrib["maxlat"],
+                    ]
+            stack.append(child)
+        elif tag in OSM_TYPES:
+            filter = self._filter
+            if filter is not None:
+                if filter.rejects(self._action, tag):
+                    self._depth = 1
+                    return self._handle(self._skip_start, self._skip_end)
+                if not self._versions:
+                    verdict = filter.check_start(tag, attrib)
+                    if verdict is False:
+                        self._depth = 1
+                        return self._handle(self._skip_start, self._skip_end)
+                    if verdict is None:
+                        self._depth = 1
+                        self._buffer = [(tag, attrib)]
+                        return self._handle(self._buffer_start, self._buffer_end)
+            stack.append(OSMObject._from_attrib(tag, attrib))
+        else:
+            self._text = []
+            self._action = _container_action(tag, attrib, self._action)
+            self._versions += tag in VERSIONS
+            self._events.append(("start", tag, attrib))
+
+    def _end(self, tag: str) -> None:
+        stack = self._stack
+        if stack:
+            obj = stack.pop()
+            if not stack:
+                if self._table.share:
+                    obj._tags = self._table.finish(obj._tags)
+                self._events.append(("object", obj))
+        else:
+            self._versions -= tag in VERSIONS
+            self._events.append(("end", tag, "".join(self._text) or None))
+            self._text = []
+
+    def _data(self, text: str) -> None:
+        if not self._stack and not self._depth:
+            self._text.append(text)
+
+    def _skip_start(self, tag: str, attrib: dict) -> None:
+        self._depth += 1
+
+    def _skip_end(self, tag: str) -> None:
+        self._depth -= 1
+        if not self._depth:
+            self._parser.StartElementHandler = self._start
+            self._parser.EndElementHandler = self._end
+
+    def _buffer_start(self, tag: str, attrib: dict) -> None:
+        self._depth += 1
+        self._buffer.append((tag, attrib))
+
+    def _buffer_end(self, tag: str) -> None:
+        self._depth -= 1
+        self._buffer.append(None)
+        if self._depth:
+            return
+        self._handle(self._start, self._end)
+        buffer, self._buffer = self._buffer, []
+        if not self._test_buffer(buffer):
+            return
+        # Build the object as if it had not been buffered
+        tag, attrib = buffer[0]
+        self._stack.append(OSMObject._from_attrib(tag, attrib))
+        start, end = self._start, self._end
+        for event in buffer[1:]:
+            if event is None:
+                end(tag)
+            else:
+                start(*event)
+
+    def _test_buffer(self, buffer: list) -> bool:
+        """Check a buffered object against the bbox and tag criteria."""
+        tag, attrib = buffer[0]
+        tags = {}
+        bounds = None
+        points = [(attrib.get("lon"), attrib.get("lat"))] if tag == "node" else []
+        depth = 0
+        for event in buffer[1:]:
+            if event is None:
+                depth -= 1
+                continue
+            depth += 1
+            child, child_attrib = event
+            if depth == 1 and child == "tag":
+                tags[child_attrib["k"]] = child_attrib["v"]
+            elif depth == 1 and child == "bounds" and bounds is None:
+                bounds = [
+                    child_attrib["minlon"],
+                    child_attrib["minlat"],
+                    child_attrib["maxlon"],
+                    child_attrib["maxlat"],
+                ]
+            elif "lat" in child_attrib:
+                points.append((child_attrib.get("lon"), child_attrib["lat"]))
+        return self._filter.test(tags, points, bounds)
+
+    def _run(self, data: bytes, final: bool) -> List[tuple]:
+        try:
+            self._parser.Parse(data, final)
+        except expat.ExpatError as e:
+            error = ElementTree.ParseError(str(e))
+            error.code = e.code
+            error.position = (e.lineno, e.offset)
+            raise error from e
+        events, self._events = self._events, []
+        return events
+
+    def feed(self, data: bytes) -> List[tuple]:
+        return self._run(data, False)
+
+    def close(self) -> List[tuple]:
+        return self._run(b"", True)
+
+
+# Backends by name, in order of preference for automatic selection
+BACKENDS = {
+    "expat": ExpatBackend,
+    "etree": EtreeBackend,
+    "lxml": LxmlBackend,
+}
+
+
+def get_backend(name: Optional[str] = None) -> type:
+    """Get a parser backend class.
+
+    Args:
+        name: Backend name ("expat", "etree" or "lxml"). Defaults to
+            ``PARSER_CONFIG["backend"]``, or the first available backend if
+            that is not set either.
+
+    Returns:
+        type: ParserBackend subclass; create one instance per document
+
+    Raises:
+        ValueError: If the backend is unknown
+        ImportError: If the backend's dependencies are not installed
+    """
+    name = name or PARSER_CONFIG["backend"]
+    if name is None:
+        for backend in BACKENDS.values():
+            if backend.available():
+                return backend
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown parser backend {name!r}, expected one of: {', '.join(BACKENDS)}"
+        )
+    backend = BACKENDS[name]
+    if not backend.available():
+        raise ImportError(f"The {name} parser backend is not available")
+    return backend
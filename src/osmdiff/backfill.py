@@ -0,0 +1,171 @@
+"""
+Parallel retrieval of sequence ranges.
+
+`AugmentedDiff.fetch_range` and `OSMChange.fetch_range` retrieve many
+consecutive diffs, for instance to catch up after an outage:
+
+```python
+from osmdiff import OSMChange
+
+for osmchange in OSMChange.fetch_range(6000000, 6000999, workers=8):
+    print(osmchange.sequence_number, len(osmchange.create))
+```
+
+Diffs are downloaded by a pool of threads and parsed by a pool of processes,
+so parsing is not limited to a single core. Results are handed out in
+sequence order: a diff that finishes early waits in a reorder buffer until
+all diffs before it have been yielded. At most ``2 * workers`` diffs are in
+flight or buffered at any time.
+
+Parser processes use the ``PARSER_CONFIG`` of the calling process as it was
+when the range was started.
+
+The number of simultaneous downloads from a single host is limited by
+``BACKFILL_CONFIG["host_limits"]``, across all ongoing ranges, to stay within
+the usage policies of the public servers.
+"""
+
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+from osmdiff.config import BACKFILL_CONFIG, PARSER_CONFIG
+
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the download slots of the host of a URL.
+
+    Blocks until a slot is free. The number of slots per host comes from
+    ``BACKFILL_CONFIG`` when the host is first used.
+
+    Args:
+        url: URL about to be requested
+    """
+    host = urlsplit(url).hostname or ""
+    with _host_slots_lock:
+        slots = _host_slots.get(host)
+        if slots is None:
+            limit = BACKFILL_CONFIG["host_limits"].get(
+                host, BACKFILL_CONFIG["default_host_limit"]
+            )
+            slots = _host_slots[host] = threading.BoundedSemaphore(limit)
+    with slots:
+        yield
+
+
+def _parse(cls, kwargs: dict, body: bytes, parser_config: Optional[dict] = None):
+    """Create a diff object and parse a downloaded body into it.
+
+    Parser processes do not share the configuration of the calling process,
+    which is passed as ``parser_config`` instead.
+    """
+    if parser_config is not None:
+        PARSER_CONFIG.update(parser_config)
+    diff = cls(**kwargs)
+    diff._parse_body(body)
+    return diff
+
+
+def _fetch(cls, kwargs: dict, parse: bool):
+    """Download a diff, and parse it unless that happens in a process."""
+    body = cls(**kwargs)._download_body()
+    return _parse(cls, kwargs, body) if parse else body
+
+
+def fetch_range(
+    cls,
+    start: int,
+    end: int,
+    workers: Optional[int] = None,
+    processes: Optional[int] = None,
+    **kwargs,
+) -> Iterator:
+    """Retrieve the diffs from start to end, inclusive, in parallel.
+
+    Args:
+        cls: `AugmentedDiff` or `OSMChange`
+        start: First sequence number
+        end: Last sequence number
+        workers: Number of concurrent downloads. Defaults to
+            ``BACKFILL_CONFIG["workers"]``.
+        processes: Number of parser processes. Defaults to ``workers``; 0
+            parses in the download threads instead.
+        **kwargs: Passed to the constructor of each diff
+
+    Yields:
+        Diff objects in sequence order
+
+    Raises:
+        requests.exceptions.RequestException: When the failed diff is due,
+            if a download fails
+    """
+    workers = workers or BACKFILL_CONFIG["workers"]
+    processes = workers if processes is None else processes
+    sequences = iter(range(start, end + 1))
+    pending = deque()  # Results in sequence order, the reorder buffer
+    threads = ThreadPoolExecutor(max_workers=workers)
+    pool = None
+    parser_config = dict(PARSER_CONFIG)
+    if processes:
+        # Forking while the download threads run is unsafe
+        method = "forkserver"
+        if method not in multiprocessing.get_all_start_methods():
+            method = "spawn"
+        pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context(method)
+        )
+
+    def submit(sequence_number: int) -> Future:
+        args = dict(kwargs, sequence_number=sequence_number)
+        result = Future()
+        download = threads.submit(_fetch, cls, args, pool is None)
+
+        def downloaded(f: Future) -> None:
+            if f.cancelled():
+                result.cancel()
+            elif f.exception() is not None:
+                result.set_exception(f.exception())
+            elif pool is None:
+                result.set_result(f.result())
+            else:
+                try:
+                    parse = pool.submit(_parse, cls, args, f.result(), parser_config)
+                except RuntimeError as e:  # The pool is shutting down
+                    result.set_exception(e)
+                    return
+                parse.add_done_callback(parsed)
+
+        def parsed(f: Future) -> None:
+            if f.cancelled():
+                result.cancel()
+            elif f.exception() is not None:
+                result.set_exception(f.exception())
+            else:
+                result.set_result(f.result())
+
+        download.add_done_callback(downloaded)
+        return result
+
+    try:
+        for sequence_number in sequences:
+            pending.append(submit(sequence_number))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            diff = pending.popleft().result()
+            sequence_number = next(sequences, None)
+            if sequence_number is not None:
+                pending.append(submit(sequence_number))
+            yield diff
+    finally:
+        threads.shutdown(wait=True, cancel_futures=True)
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
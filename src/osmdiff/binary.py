@@ -0,0 +1,766 @@
+"""
+Binary serialization of parsed diffs.
+
+`AugmentedDiff.dump` and `OSMChange.dump` write the parsed objects to a
+compact binary file, and `AugmentedDiff.load` and `OSMChange.load` read it
+back without parsing any XML. This makes replaying historic diffs much
+cheaper than retrieving or parsing them again:
+
+```python
+from osmdiff import OSMChange
+
+osmchange = OSMChange(sequence_number=6000000)
+osmchange.retrieve()
+osmchange.dump("6000000.osmdiff")
+
+osmchange = OSMChange.load("6000000.osmdiff")
+print(osmchange.create[0])  # Only the block holding it is decoded
+```
+
+The file is memory-mapped. By default `load` only reads the header, the
+string table and the block index, and the ``create``, ``modify`` and
+``delete`` lists are `LazyList` sequences that decode a block of records the
+first time one of them is accessed. Pass ``lazy=False`` to decode everything
+up front and get plain lists.
+
+## Format
+
+All integers are little-endian. A file is laid out as follows:
+
+- A header, see `HEADER`: magic number, format version, kind of diff
+  (`AUGMENTED_DIFF` or `OSMCHANGE`), records per block, the offsets of the
+  sections below and the number of records in create, modify and delete.
+- Blocks of at most ``block_size`` records, the create records first, then
+  modify and delete. A block is a sequence of unsigned LEB128 varints.
+- The string table: every tag key and value, user name, role and other
+  attribute value, UTF-8 encoded and separated by NUL bytes. Records refer
+  to strings by their position in the table.
+- Diff metadata (sequence number, timestamp, ...) as JSON.
+- The block index: the offset of every block and of the end of the last
+  one, as 64-bit unsigned integers.
+
+Within a block, ids, timestamps, changesets, node refs and coordinates are
+stored as zigzag-encoded differences to the previous value in the same
+block, which keeps them to one or two bytes in sorted diffs. Coordinates are
+stored as fixed-point integers with 7 decimals, the precision of the OSM
+database; other values are kept as strings so that nothing is lost.
+Deltas restart at every block, so any block can be decoded on its own.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import MutableSequence
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from osmdiff.osm import Node, OSMObject, Relation, Way
+from osmdiff.osm.osm import _format_coord
+
+MAGIC = b"OSMDIFF\x00"
+VERSION = 1
+BLOCK_SIZE = 64
+
+# Kinds of diff
+AUGMENTED_DIFF = 0
+OSMCHANGE = 1
+
+# magic, version, kind, block size, string table offset and size, metadata
+# offset and size, index offset, create, modify and delete record counts
+HEADER = struct.Struct("<8sBBxxIQQQQQQQQ")
+
+# Record layouts: a single object, or an action dictionary
+OBJECT = 0
+MODIFY = 1
+DELETE = 2
+RECORDS = {
+    AUGMENTED_DIFF: (OBJECT, MODIFY, DELETE),
+    OSMCHANGE: (OBJECT, OBJECT, OBJECT),
+}
+
+# Object header: type code in the two low bits, then flags for the fields
+# that follow, the most common ones first so most headers fit in two bytes
+_TYPES = (Node, Way, Relation)
+_F_ID = 1 << 2
+_F_VERSION = 1 << 3
+_F_TIMESTAMP = 1 << 4
+_F_CHANGESET = 1 << 5
+_F_UID = 1 << 6
+_F_USER = 1 << 7
+_F_COORDS = 1 << 8  # Node coordinates, or coordinates of the way refs
+_F_TAGS = 1 << 9
+_F_REFS = 1 << 10  # Way nodes as refs
+_F_EXTRA = 1 << 11  # Other attributes, as strings
+_F_REF = 1 << 12  # Numeric ref attribute, of relation members
+_F_BOUNDS = 1 << 13
+_F_NODES = 1 << 14  # Way nodes as objects
+
+_SCALE = 10_000_000  # Fixed-point coordinates
+
+
+def _zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _encode_varints(values: Iterable[int]) -> bytes:
+    out = bytearray()
+    append = out.append
+    for v in values:
+        while v >= 0x80:
+            append((v & 0x7F) | 0x80)
+            v >>= 7
+        append(v)
+    return bytes(out)
+
+
+def _decode_varints(data: bytes) -> List[int]:
+    values = []
+    append = values.append
+    value = shift = 0
+    for b in data:
+        if b < 0x80:
+            append(value | (b << shift))
+            value = shift = 0
+        else:
+            value |= (b & 0x7F) << shift
+            shift += 7
+    return values
+
+
+def _fixed(value) -> Optional[int]:
+    """Convert a coordinate to fixed-point, None if that would change it."""
+    if not isinstance(value, float) or not math.isfinite(value):
+        return None
+    fixed = round(value * _SCALE)
+    return fixed if fixed / _SCALE == value else None
+
+
+class _Encoder:
+    """Encode the records of a file, collecting its strings."""
+
+    def __init__(self) -> None:
+        self.strings = {}
+
+    def string(self, value) -> int:
+        if not isinstance(value, str):
+            value = str(value)
+        index = self.strings.get(value)
+        if index is None:
+            if "\x00" in value:
+                raise ValueError("strings must not contain NUL characters")
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def block(self, layout: int, records: Sequence) -> bytes:
+        out = []
+        state = [0] * 6  # Previous id, timestamp, changeset, ref, lon, lat
+        for record in records:
+            if layout == OBJECT:
+                self.object(record, out, state)
+                continue
+            old, new = record["old"], record["new"]
+            meta = record.get("meta") if layout == DELETE else None
+            out.append(
+                (old is not None) | (new is not None) << 1 | (meta is not None) << 2
+            )
+            if old is not None:
+                self.object(old, out, state)
+            if new is not None:
+                self.object(new, out, state)
+            if meta is not None:
+                self.mapping(meta, out)
+        return _encode_varints(out)
+
+    def mapping(self, mapping: dict, out: list) -> None:
+        out.append(len(mapping))
+        for key, value in mapping.items():
+            out.append(self.string(key))
+            out.append(self.string(value))
+
+    def object(self, obj: OSMObject, out: list, state: list) -> None:
+        try:
+            code = _TYPES.index(type(obj))
+        except ValueError:
+            raise TypeError(f"Cannot serialize {type(obj).__name__} objects") from None
+        typed, extra = _split_attribs(obj)
+        head = code
+        values = []
+
+        for flag, key, i in (
+            (_F_ID, "id", 0),
+            (_F_VERSION, "version", None),
+            (_F_TIMESTAMP, "timestamp", 1),
+            (_F_CHANGESET, "changeset", 2),
+            (_F_UID, "uid", None),
+        ):
+            value = typed.get(key)
+            if value is not None:
+                head |= flag
+                if i is None:
+                    values.append(_zigzag(value))
+                else:
+                    values.append(_zigzag(value - state[i]))
+                    state[i] = value
+        user = typed.get("user")
+        if user is not None:
+            head |= _F_USER
+            values.append(self.string(user))
+
+        ref = extra.get("ref")
+        if ref is not None and str(_int_or_none(ref)) == ref:
+            ref = int(ref)
+            extra = {key: value for key, value in extra.items() if key != "ref"}
+        else:
+            ref = None
+        if extra:
+            head |= _F_EXTRA
+            self.mapping(extra, values)
+        if ref is not None:
+            head |= _F_REF
+            values.append(_zigzag(ref - state[3]))
+            state[3] = ref
+        if obj.tags:
+            head |= _F_TAGS
+            self.mapping(obj.tags, values)
+        if obj.bounds:
+            head |= _F_BOUNDS
+            values.extend(self.string(value) for value in obj.bounds)
+
+        if code == 0:
+            lon, lat = typed.get("lon"), typed.get("lat")
+            if lon is not None and lat is not None:
+                head |= _F_COORDS
+                values.append(_zigzag(lon - state[4]))
+                values.append(_zigzag(lat - state[5]))
+                state[4], state[5] = lon, lat
+        elif code == 1:
+            head |= self.way_nodes(obj, values, state)
+        else:
+            values.append(len(obj.members))
+            for member in obj.members:
+                self.object(member, values, state)
+
+        out.append(head)
+        out.extend(values)
+
+    def way_nodes(self, way: Way, values: list, state: list) -> int:
+        """Encode the nodes of a way, returning the header flags."""
+        refs, coords, nodes = way._refs, way._coords, way._nodes
+        if nodes is None and coords is not None:
+            fixed = [None if math.isnan(c) else _fixed(c) for c in coords]
+            if any(
+                f is None and not math.isnan(c) for f, c in zip(fixed, coords)
+            ):
+                # Coordinates more precise than fixed-point, keep the strings
+                nodes = way._materialize_nodes()
+        if nodes is not None:
+            values.append(len(nodes))
+            for node in nodes:
+                if not isinstance(node, OSMObject):
+                    raise TypeError(f"Cannot serialize way node {node!r}")
+                self.object(node, values, state)
+            return _F_NODES
+        if refs is None:
+            return 0
+        values.append(len(refs))
+        previous = state[3]
+        for ref in refs:
+            values.append(_zigzag(ref - previous))
+            previous = ref
+        state[3] = previous
+        if coords is None:
+            return _F_REFS
+        lon0, lat0 = state[4], state[5]
+        for i in range(0, len(fixed), 2):
+            lon, lat = fixed[i], fixed[i + 1]
+            if lon is None:
+                values.append(0)
+            else:
+                values.append(_zigzag(lon - lon0) << 1 | 1)
+                values.append(_zigzag(lat - lat0))
+                lon0, lat0 = lon, lat
+        state[4], state[5] = lon0, lat0
+        return _F_REFS | _F_COORDS
+
+
+def _int_or_none(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _split_attribs(obj: OSMObject) -> Tuple[dict, dict]:
+    """
+    Split the attributes of an object into typed values and strings.
+
+    Coordinates are returned as fixed-point integers. Values that cannot be
+    stored in their typed form without changing them are returned as strings.
+    """
+    typed = {}
+    if obj._attribs is None:
+        for key, (slot, _, _) in obj._ATTRIBS.items():
+            typed[key] = getattr(obj, slot)
+        extra = dict(obj._extra) if obj._extra else {}
+    else:
+        extra = {}
+        for key, value in obj._attribs.items():
+            typed_attrib = obj._ATTRIBS.get(key)
+            if typed_attrib is not None:
+                try:
+                    parsed = typed_attrib[1](value)
+                    if typed_attrib[2](parsed) == value:
+                        typed[key] = parsed
+                        continue
+                except (TypeError, ValueError):
+                    pass
+            extra[key] = value if isinstance(value, str) else str(value)
+    for key in ("lon", "lat"):
+        value = typed.pop(key, None)
+        if value is not None:
+            fixed = _fixed(value)
+            if fixed is None:
+                extra.setdefault(key, _format_coord(value))
+            else:
+                typed[key] = fixed
+    if ("lon" in typed) != ("lat" in typed):
+        key = "lon" if "lon" in typed else "lat"
+        extra.setdefault(key, _format_coord(typed.pop(key) / _SCALE))
+    return typed, extra
+
+
+class _Decoder:
+    """Decode the blocks of a file."""
+
+    def __init__(self, strings: List[str]) -> None:
+        self.strings = strings
+
+    def block(self, layout: int, data: bytes, count: int) -> list:
+        values = _decode_varints(data)
+        state = [0] * 6
+        records = []
+        decode = self.object
+        p = 0
+        for _ in range(count):
+            if layout == OBJECT:
+                record, p = decode(values, p, state)
+                records.append(record)
+                continue
+            present = values[p]
+            p += 1
+            old = new = None
+            if present & 1:
+                old, p = decode(values, p, state)
+            if present & 2:
+                new, p = decode(values, p, state)
+            if layout == MODIFY:
+                records.append({"old": old, "new": new})
+                continue
+            meta = None
+            if present & 4:
+                meta, p = self.mapping(values, p)
+            records.append({"old": old, "new": new, "meta": meta})
+        return records
+
+    def mapping(self, values: list, p: int) -> Tuple[dict, int]:
+        strings = self.strings
+        end = p + 1 + 2 * values[p]
+        items = values[p + 1 : end]
+        return {strings[k]: strings[v] for k, v in zip(items[::2], items[1::2])}, end
+
+    def object(self, values: list, p: int, state: list) -> Tuple[OSMObject, int]:
+        head = values[p]
+        p += 1
+        code = head & 3
+        cls = _TYPES[code]
+        # Objects are built like the parser backends build them, in slot mode
+        obj = cls.__new__(cls)
+        obj._attribs = None
+        obj._extra = None
+        obj._id = obj._version = obj._timestamp = None
+        obj._changeset = obj._uid = obj._user = None
+        obj.bounds = None
+
+        if head & _F_ID:
+            v = values[p]
+            p += 1
+            obj._id = state[0] = state[0] + ((v >> 1) ^ -(v & 1))
+        if head & _F_VERSION:
+            v = values[p]
+            p += 1
+            obj._version = (v >> 1) ^ -(v & 1)
+        if head & _F_TIMESTAMP:
+            v = values[p]
+            p += 1
+            obj._timestamp = state[1] = state[1] + ((v >> 1) ^ -(v & 1))
+        if head & _F_CHANGESET:
+            v = values[p]
+            p += 1
+            obj._changeset = state[2] = state[2] + ((v >> 1) ^ -(v & 1))
+        if head & _F_UID:
+            v = values[p]
+            p += 1
+            obj._uid = (v >> 1) ^ -(v & 1)
+        if head & _F_USER:
+            obj._user = self.strings[values[p]]
+            p += 1
+
+        if code == 0:
+            obj._lat = obj._lon = None
+            obj._checked = False
+        elif code == 1:
+            obj._nodes = obj._refs = obj._coords = None
+        else:
+            obj.members = []
+
+        extra = None
+        if head & _F_EXTRA:
+            extra, p = self.mapping(values, p)
+        if head & _F_REF:
+            v = values[p]
+            p += 1
+            state[3] += (v >> 1) ^ -(v & 1)
+            if extra is None:
+                extra = {}
+            extra["ref"] = str(state[3])
+        if extra is not None:
+            # Values kept as strings, such as overly precise coordinates, go
+            # through the same conversion as parsed attributes
+            obj._load_attribs(extra)
+        if head & _F_TAGS:
+            obj.tags, p = self.mapping(values, p)
+        else:
+            obj.tags = {}
+        if head & _F_BOUNDS:
+            strings = self.strings
+            obj.bounds = [strings[i] for i in values[p : p + 4]]
+            p += 4
+
+        if code == 0:
+            if head & _F_COORDS:
+                v = values[p]
+                w = values[p + 1]
+                p += 2
+                state[4] += (v >> 1) ^ -(v & 1)
+                state[5] += (w >> 1) ^ -(w & 1)
+                obj._lon = state[4] / _SCALE
+                obj._lat = state[5] / _SCALE
+        elif code == 1:
+            if head & _F_NODES:
+                count = values[p]
+                p += 1
+                nodes = []
+                for _ in range(count):
+                    node, p = self.object(values, p, state)
+                    nodes.append(node)
+                obj._nodes = nodes
+            elif head & _F_REFS:
+                count = values[p]
+                p += 1
+                ref = state[3]
+                refs = []
+                for v in values[p : p + count]:
+                    ref += (v >> 1) ^ -(v & 1)
+                    refs.append(ref)
+                p += count
+                state[3] = ref
+                obj._refs = array("q", refs)
+                if head & _F_COORDS:
+                    lon, lat = state[4], state[5]
+                    coords = []
+                    nan = math.nan
+                    for _ in range(count):
+                        v = values[p]
+                        if v & 1:
+                            v >>= 1
+                            w = values[p + 1]
+                            p += 2
+                            lon += (v >> 1) ^ -(v & 1)
+                            lat += (w >> 1) ^ -(w & 1)
+                            coords.append(lon / _SCALE)
+                            coords.append(lat / _SCALE)
+                        else:
+                            p += 1
+                            coords.append(nan)
+                            coords.append(nan)
+                    state[4], state[5] = lon, lat
+                    obj._coords = array("d", coords)
+        else:
+            count = values[p]
+            p += 1
+            members = obj.members
+            for _ in range(count):
+                member, p = self.object(values, p, state)
+                members.append(member)
+        return obj, p
+
+
+def dump(path, kind: int, sections: Sequence[Sequence], meta: dict) -> None:
+    """
+    Write a diff to a binary file.
+
+    The file is written under a temporary name and renamed into place, so a
+    file that is being read lazily can be overwritten safely.
+
+    Args:
+        path: File to write
+        kind: `AUGMENTED_DIFF` or `OSMCHANGE`
+        sections: Create, modify and delete records
+        meta: Diff metadata, serializable as JSON
+
+    Raises:
+        TypeError: If an object cannot be serialized
+    """
+    path = os.fspath(path)
+    encoder = _Encoder()
+    offsets = array("Q")
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(bytes(HEADER.size))
+            for layout, records in zip(RECORDS[kind], sections):
+                for start in range(0, len(records), BLOCK_SIZE):
+                    offsets.append(fh.tell())
+                    fh.write(encoder.block(layout, records[start : start + BLOCK_SIZE]))
+            offsets.append(fh.tell())
+
+            strings_offset = fh.tell()
+            fh.write("\x00".join(encoder.strings).encode("utf-8"))
+            meta_offset = fh.tell()
+            fh.write(json.dumps(meta).encode("utf-8"))
+            meta_end = fh.tell()
+            index_offset = meta_end + -meta_end % 8
+            fh.write(bytes(index_offset - fh.tell()))
+            if sys.byteorder == "big":
+                offsets.byteswap()
+            fh.write(offsets.tobytes())
+
+            fh.seek(0)
+            fh.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    kind,
+                    BLOCK_SIZE,
+                    strings_offset,
+                    meta_offset - strings_offset,
+                    meta_offset,
+                    meta_end - meta_offset,
+                    index_offset,
+                    *(len(records) for records in sections),
+                )
+            )
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class DiffFile:
+    """
+    Memory-mapped binary diff file.
+
+    Opening a file reads its header, string table, metadata and block index;
+    records are decoded a block at a time by `section`.
+
+    Args:
+        path: File written by `dump`
+
+    Raises:
+        ValueError: If the file is not a binary diff of a supported version
+    """
+
+    def __init__(self, path) -> None:
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mmap
+        if len(mm) < HEADER.size or mm[: len(MAGIC)] != MAGIC:
+            mm.close()
+            raise ValueError(f"{os.fspath(path)} is not an osmdiff binary file")
+        (
+            _,
+            version,
+            self.kind,
+            self.block_size,
+            strings_offset,
+            strings_size,
+            meta_offset,
+            meta_size,
+            index_offset,
+            *counts,
+        ) = HEADER.unpack_from(mm)
+        if version != VERSION:
+            mm.close()
+            raise ValueError(f"Unsupported osmdiff binary file version: {version}")
+        self.counts = tuple(counts)
+        blob = mm[strings_offset : strings_offset + strings_size].decode("utf-8")
+        self._decoder = _Decoder(blob.split("\x00"))
+        self.meta = json.loads(mm[meta_offset : meta_offset + meta_size])
+        self._index = array("Q")
+        self._index.frombytes(mm[index_offset:])
+        if sys.byteorder == "big":
+            self._index.byteswap()
+
+    def _blocks(self, section: int) -> int:
+        """Number of the first block of a section."""
+        size = self.block_size
+        return sum(-(-count // size) for count in self.counts[:section])
+
+    def read_block(self, section: int, block: int) -> list:
+        """
+        Decode a block of records.
+
+        Args:
+            section: 0 for create, 1 for modify, 2 for delete
+            block: Number of the block within the section
+
+        Returns:
+            list: The records of the block
+        """
+        i = self._blocks(section) + block
+        count = min(self.block_size, self.counts[section] - block * self.block_size)
+        data = self._mmap[self._index[i] : self._index[i + 1]]
+        return self._decoder.block(RECORDS[self.kind][section], data, count)
+
+    def section(self, section: int, lazy: bool = True):
+        """
+        Get the records of a section.
+
+        Args:
+            section: 0 for create, 1 for modify, 2 for delete
+            lazy: Return a `LazyList` instead of decoding all records
+
+        Returns:
+            LazyList or list: The records
+        """
+        records = LazyList(self, section)
+        return records if lazy else list(records)
+
+    def close(self) -> None:
+        """Unmap the file. Records that were not decoded yet are lost."""
+        self._mmap.close()
+
+    def __enter__(self) -> "DiffFile":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class LazyList(MutableSequence):
+    """
+    Records of a `DiffFile` section, decoded a block at a time on access.
+
+    Decoded records are kept, so accessing a record twice returns the same
+    object. Modifying the list decodes the records that were not accessed
+    yet; after that it behaves like a plain list.
+    """
+
+    def __init__(self, file: DiffFile, section: int) -> None:
+        self._file = file
+        self._section = section
+        self._items = [None] * file.counts[section]
+        self._decoded = bytearray(-(-len(self._items) // file.block_size))
+
+    def _load(self, block: int) -> None:
+        size = self._file.block_size
+        records = self._file.read_block(self._section, block)
+        self._items[block * size : block * size + len(records)] = records
+        self._decoded[block] = 1
+
+    def _materialize(self) -> list:
+        if self._file is not None:
+            for block, decoded in enumerate(self._decoded):
+                if not decoded:
+                    self._load(block)
+            self._file = None
+        return self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if item is None and self._file is not None:
+            if index < 0:
+                index += len(self._items)
+            self._load(index // self._file.block_size)
+            item = self._items[index]
+        return item
+
+    def __iter__(self):
+        if self._file is None:
+            yield from self._items
+            return
+        size = self._file.block_size
+        for block in range(len(self._decoded)):
+            if self._file is None:  # Modified while iterating
+                yield from self._items[block * size :]
+                return
+            if not self._decoded[block]:
+                self._load(block)
+            yield from self._items[block * size : (block + 1) * size]
+
+    def __setitem__(self, index, value) -> None:
+        self._materialize()[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._materialize()[index]
+
+    def insert(self, index: int, value) -> None:
+        self._materialize().insert(index, value)
+
+    def clear(self) -> None:
+        self._items = []
+        self._decoded = bytearray()
+        self._file = None
+
+    def copy(self) -> list:
+        return list(self)
+
+    def __add__(self, other) -> list:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> list:
+        return list(other) + list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, LazyList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LazyList ({len(self._items)} records)"
+
+
+def load(path, kind: int, lazy: bool = True) -> Tuple[dict, list]:
+    """
+    Read a diff from a binary file.
+
+    Args:
+        path: File written by `dump`
+        kind: Expected kind of diff, `AUGMENTED_DIFF` or `OSMCHANGE`
+        lazy: Decode records on access, see `LazyList`
+
+    Returns:
+        Tuple[dict, list]: The metadata and the create, modify and delete
+            records
+
+    Raises:
+        ValueError: If the file is not a binary diff of that kind
+    """
+    file = DiffFile(path)
+    if file.kind != kind:
+        file.close()
+        raise ValueError(f"{os.fspath(path)} holds another kind of diff")
+    sections = [file.section(i, lazy) for i in range(3)]
+    if not lazy:
+        file.close()
+    return file.meta, sections
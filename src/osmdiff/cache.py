@@ -0,0 +1,285 @@
+"""
+Cache for retrieved diffs.
+
+A diff never changes once it has been published, so retrieved diffs can be
+kept and served again without downloading them. Caching is off by default.
+Enable it for the whole process with `set_cache`, or for a single object
+with the ``cache`` argument of `AugmentedDiff` and `OSMChange`:
+
+```python
+from osmdiff import AugmentedDiff
+from osmdiff.cache import DiskCache, set_cache
+
+set_cache(DiskCache("/var/cache/osmdiff", max_bytes=2 * 1024**3))
+
+adiff = AugmentedDiff(sequence_number=6509700)
+adiff.retrieve()  # Downloaded and stored
+adiff = AugmentedDiff(sequence_number=6509700)
+adiff.retrieve()  # Read from the cache
+```
+
+Entries are keyed by ``(source, sequence_number, bbox)`` and hold the body
+gzip-compressed, as received from the server where possible. `retrieve`,
+`aretrieve` and `fetch_range` use the cache; ``retrieve(stream=True)`` does
+not.
+
+Caches implement `DiffCache`. Two are provided:
+
+- `DiskCache`: files in a directory, shared safely by several processes
+- `MemoryCache`: a dictionary, for a single process
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional
+
+from osmdiff.stream import GZIP_MAGIC, iter_chunks
+
+_cache = None
+
+
+def get_cache() -> Optional["DiffCache"]:
+    """Get the cache used by default, None if caching is off."""
+    return _cache
+
+
+def set_cache(cache: Optional["DiffCache"]) -> None:
+    """Set the cache used by default.
+
+    Args:
+        cache: A `DiffCache`, or None to turn caching off
+    """
+    global _cache
+    _cache = cache
+
+
+def cache_key(source: str, sequence_number: int, bbox=None) -> str:
+    """Build the key of a diff.
+
+    Args:
+        source: Where the diff comes from, such as the base URL
+        sequence_number: Sequence number of the diff
+        bbox: Bounding box the diff was requested for, if any
+
+    Returns:
+        str: Hexadecimal digest identifying the diff
+    """
+    bbox = None if bbox is None or all(c is None for c in bbox) else tuple(bbox)
+    ident = repr((source, int(sequence_number), bbox))
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+def raw_chunks(response) -> Iterator[bytes]:
+    """Read a response body as sent, without undoing gzip compression.
+
+    Other content encodings are decoded, since the parser only sniffs gzip.
+
+    Args:
+        response: Streamed ``requests.Response``
+    """
+    encoding = response.headers.get("Content-Encoding", "identity").lower()
+    response.raw.decode_content = encoding not in ("identity", "gzip")
+    return iter_chunks(response.raw)
+
+
+class DiffCache:
+    """Base class for diff caches.
+
+    Subclasses implement `_load` and `_save`. The hit and miss counters
+    count the `get` calls of this instance.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _save(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a cached body.
+
+        Args:
+            key: Key from `cache_key`
+
+        Returns:
+            bytes: The gzip-compressed body, or None if it is not cached
+        """
+        data = self._load(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a body, compressing it with gzip if it is not already.
+
+        Args:
+            key: Key from `cache_key`
+            data: Body of the diff
+        """
+        if not data.startswith(GZIP_MAGIC):
+            data = gzip.compress(data)
+        self._save(key, data)
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass chunks through and store them once they are exhausted.
+
+        Nothing is stored if the iteration stops early, for instance because
+        the body could not be parsed.
+
+        Args:
+            key: Key from `cache_key`
+            chunks: Chunks of a body
+
+        Yields:
+            bytes: The same chunks
+        """
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self.put(key, b"".join(parts))
+
+    @property
+    def stats(self) -> dict:
+        """Hit and miss counts."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__} ({self.hits} hits, {self.misses} misses)"
+
+
+class MemoryCache(DiffCache):
+    """Least recently used cache in memory.
+
+    Args:
+        max_bytes: Total size of the cached bodies to keep
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def _save(self, key: str, data: bytes) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class DiskCache(DiffCache):
+    """Least recently used cache in a directory.
+
+    Each body is a file named after its key. Files are written to a
+    temporary name and renamed into place, so several processes can share
+    the directory without seeing partial files. Reading a file updates its
+    modification time, which orders the eviction of the least recently used
+    files once the directory grows beyond ``max_bytes``.
+
+    Args:
+        path: Cache directory, created if needed
+        max_bytes: Total size of the cached files to keep
+    """
+
+    SUFFIX = ".gz"
+
+    def __init__(self, path: str, max_bytes: int = 1024**3) -> None:
+        super().__init__()
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self._size = None  # Estimated directory size, scanned on first write
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + self.SUFFIX)
+
+    def _load(self, key: str) -> Optional[bytes]:
+        filename = self._file(key)
+        try:
+            with open(filename, "rb") as fh:
+                data = fh.read()
+            os.utime(filename)
+        except FileNotFoundError:  # Not cached, or evicted by another process
+            return None
+        return data
+
+    def _save(self, key: str, data: bytes) -> None:
+        filename = self._file(key)
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._scan())
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _scan(self):
+        """List the cached files as (mtime, size, path)."""
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if not name.endswith(self.SUFFIX):
+                    continue
+                filename = os.path.join(root, name)
+                try:
+                    st = os.stat(filename)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, filename))
+        return entries
+
+    def evict(self) -> None:
+        """Remove the least recently used files until the cache fits."""
+        entries = sorted(self._scan())
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, filename in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.unlink(filename)
+            except FileNotFoundError:
+                pass
+            size -= file_size
+        self._size = size
+
+    def clear(self) -> None:
+        """Remove all cached files."""
+        for _, _, filename in self._scan():
+            try:
+                os.unlink(filename)
+            except FileNotFoundError:
+                pass
+        self._size = 0
@@ -0,0 +1,234 @@
+"""
+Durable checkpoints for continuous consumers.
+
+A checkpoint is the last sequence a consumer has fully processed. With a
+checkpoint store, `osmdiff.ContinuousAugmentedDiff` and
+`osmdiff.ContinuousOSMChange` resume after a restart from the sequence
+following the checkpoint, instead of from the newest remote sequence:
+
+```python
+from osmdiff import ContinuousOSMChange
+from osmdiff.checkpoint import SQLiteCheckpointStore
+
+store = SQLiteCheckpointStore("/var/lib/osmdiff/checkpoints.db")
+replication = ContinuousOSMChange(checkpoint=store, consumer="buildings")
+try:
+    for osmchange in replication:
+        handle(osmchange)
+finally:
+    replication.close()
+```
+
+A diff counts as processed once the consumer asks for the next one, so a
+diff that was being handled when the process stopped is yielded again after
+the restart: delivery is at least once. Checkpoints are saved in batches,
+every ``commit_every`` diffs or ``commit_interval`` seconds, and before
+waiting for new diffs; a crash between two commits replays the diffs
+processed since the last one.
+
+Stores implement `CheckpointStore`. Two are provided:
+
+- `FileCheckpointStore`: a JSON file, replaced atomically on each commit
+- `SQLiteCheckpointStore`: a SQLite database, safe to share between
+  processes
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+
+class CheckpointStore:
+    """Base class for checkpoint stores.
+
+    Saved checkpoints are kept in memory and written in one commit once
+    ``commit_every`` checkpoints have been saved since the last commit, or
+    ``commit_interval`` seconds have passed. Subclasses implement `_read`
+    and `_write`.
+
+    Args:
+        commit_every: Number of saved checkpoints after which to commit,
+            1 to commit each one
+        commit_interval: Seconds after which to commit saved checkpoints
+    """
+
+    def __init__(self, commit_every: int = 100, commit_interval: float = 10.0):
+        if commit_every < 1:
+            raise ValueError("commit_every must be at least 1")
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._pending = {}
+        self._saved = 0
+        self._last_commit = time.monotonic()
+        self._lock = threading.RLock()
+
+    def _read(self, consumer: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def _write(self, checkpoints: Dict[str, int]) -> None:
+        raise NotImplementedError
+
+    def load(self, consumer: str) -> Optional[int]:
+        """Get the checkpoint of a consumer.
+
+        Args:
+            consumer: Name of the consumer
+
+        Returns:
+            int: Last processed sequence number, None if there is none
+        """
+        with self._lock:
+            if consumer in self._pending:
+                return self._pending[consumer]
+            return self._read(consumer)
+
+    def save(self, consumer: str, sequence_number: int) -> None:
+        """Record the last processed sequence of a consumer.
+
+        The checkpoint is committed with the next batch.
+
+        Args:
+            consumer: Name of the consumer
+            sequence_number: Last sequence number the consumer processed
+        """
+        with self._lock:
+            self._pending[consumer] = int(sequence_number)
+            self._saved += 1
+            if (
+                self._saved >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval
+            ):
+                self.commit()
+
+    def commit(self) -> None:
+        """Write the saved checkpoints now."""
+        with self._lock:
+            if self._pending:
+                self._write(self._pending)
+                self._pending = {}
+            self._saved = 0
+            self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """Commit the saved checkpoints."""
+        self.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__} ({len(self._pending)} pending)"
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Checkpoints in a JSON file mapping consumers to sequence numbers.
+
+    Each commit writes the whole file to a temporary name, syncs it to disk
+    and renames it into place, so the file always holds a complete commit,
+    even after a crash. Commits read the file first and only replace the
+    committed consumers, but two processes committing at the same time can
+    still overwrite each other: give each process its own file, or use
+    `SQLiteCheckpointStore`.
+
+    Args:
+        path: JSON file, created on the first commit
+        commit_every: Number of saved checkpoints after which to commit
+        commit_interval: Seconds after which to commit saved checkpoints
+    """
+
+    def __init__(
+        self, path: str, commit_every: int = 100, commit_interval: float = 10.0
+    ):
+        super().__init__(commit_every, commit_interval)
+        self.path = os.fspath(path)
+
+    def _read_all(self) -> Dict[str, int]:
+        try:
+            with open(self.path, "rb") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+
+    def _read(self, consumer: str) -> Optional[int]:
+        return self._read_all().get(consumer)
+
+    def _write(self, checkpoints: Dict[str, int]) -> None:
+        data = self._read_all()
+        data.update(checkpoints)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump(data, fh, indent=1, sort_keys=True)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if hasattr(os, "O_DIRECTORY"):  # Make the rename durable
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Checkpoints in a SQLite database.
+
+    Each commit is one transaction, so several processes can share the
+    database, each committing its own consumers.
+
+    Args:
+        path: Database file, created if needed
+        commit_every: Number of saved checkpoints after which to commit
+        commit_interval: Seconds after which to commit saved checkpoints
+    """
+
+    def __init__(
+        self, path: str, commit_every: int = 100, commit_interval: float = 10.0
+    ):
+        super().__init__(commit_every, commit_interval)
+        self.path = os.fspath(path)
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False
+        )
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "consumer TEXT PRIMARY KEY, "
+                "sequence_number INTEGER NOT NULL, "
+                "updated REAL NOT NULL)"
+            )
+
+    def _read(self, consumer: str) -> Optional[int]:
+        row = self._connection.execute(
+            "SELECT sequence_number FROM checkpoints WHERE consumer = ?",
+            (consumer,),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _write(self, checkpoints: Dict[str, int]) -> None:
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                [(consumer, seq, now) for consumer, seq in checkpoints.items()],
+            )
+
+    def close(self) -> None:
+        """Commit the saved checkpoints and close the database."""
+        with self._lock:
+            if self._connection is None:
+                return
+            self.commit()
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,197 @@
+"""
+Columnar export of diff contents.
+
+`AugmentedDiff` and `OSMChange` can export their objects as a struct of
+arrays, one row per changed object, so they can be filtered and aggregated
+with vectorized code instead of Python loops over objects.
+
+`to_columns` only needs the standard library and returns ``array.array``
+columns. `to_arrays` turns those into NumPy arrays and `to_arrow` into a
+``pyarrow.Table``, both without copying the numeric columns. NumPy and
+pyarrow are optional dependencies, installed with the ``numpy`` and ``arrow``
+extras.
+
+Columns:
+
+- ``action``: action code, see `ACTION_CODES` (uint8)
+- ``type``: element type code, see `TYPE_CODES` (uint8)
+- ``id``, ``version``, ``changeset``, ``uid``: int64, -1 if missing
+- ``timestamp``: seconds since the epoch (int64), -1 if missing
+- ``lat``, ``lon``: float64, NaN for ways, relations and nodes without coordinates
+- ``user``: user names, empty if missing
+- ``tag_offsets``: int64, ``n + 1`` offsets into the tag columns; the tags of
+  row ``i`` are ``tag_keys[tag_offsets[i]:tag_offsets[i + 1]]`` and the
+  matching ``tag_values``
+- ``tag_keys``, ``tag_values``: all tag keys and values, row after row
+
+Example:
+    ```python
+    import numpy as np
+
+    arrays = osmchange.to_arrays()
+    created_nodes = (arrays["action"] == 0) & (arrays["type"] == 0)
+    print(np.unique(arrays["uid"][created_nodes]))
+    ```
+"""
+
+import math
+from array import array
+from typing import Any, Dict, Iterable, Tuple
+
+from osmdiff.osm import OSMObject
+
+ACTION_CODES = {"create": 0, "modify": 1, "delete": 2}
+TYPE_CODES = {"n": 0, "w": 1, "r": 2}
+
+# Column name -> array typecode; string columns are lists
+NUMERIC_COLUMNS = {
+    "action": "B",
+    "type": "B",
+    "id": "q",
+    "version": "q",
+    "changeset": "q",
+    "uid": "q",
+    "timestamp": "q",
+    "lat": "d",
+    "lon": "d",
+    "tag_offsets": "q",
+}
+STRING_COLUMNS = ("user", "tag_keys", "tag_values")
+
+_INT_FIELDS = ("id", "version", "changeset", "uid", "timestamp")
+
+
+class ColumnBuilder:
+    """Accumulate rows into columns.
+
+    Example:
+        ```python
+        builder = ColumnBuilder()
+        for action, old, new in adiff.iter_actions():
+            builder.append(action, new)
+        columns = builder.columns
+        ```
+    """
+
+    def __init__(self) -> None:
+        self.columns = {
+            name: array(typecode) for name, typecode in NUMERIC_COLUMNS.items()
+        }
+        self.columns.update({name: [] for name in STRING_COLUMNS})
+        self.columns["tag_offsets"].append(0)
+
+    def __len__(self) -> int:
+        return len(self.columns["action"])
+
+    def append(self, action: str, obj: OSMObject) -> None:
+        """
+        Add a row.
+
+        Args:
+            action: "create", "modify" or "delete"
+            obj: The object to describe
+        """
+        columns = self.columns
+        columns["action"].append(ACTION_CODES[action])
+        columns["type"].append(TYPE_CODES[obj.osmtype])
+        for field in _INT_FIELDS:
+            value = obj._get_typed(field)
+            columns[field].append(-1 if value is None else value)
+        lat = lon = math.nan
+        if obj.osmtype == "n":
+            lat = obj._get_typed("lat")
+            lon = obj._get_typed("lon")
+            lat = math.nan if lat is None else lat
+            lon = math.nan if lon is None else lon
+        columns["lat"].append(lat)
+        columns["lon"].append(lon)
+        columns["user"].append(obj.user or "")
+        columns["tag_keys"].extend(obj.tags)
+        columns["tag_values"].extend(obj.tags.values())
+        columns["tag_offsets"].append(len(columns["tag_keys"]))
+
+
+def to_columns(rows: Iterable[Tuple[str, OSMObject]]) -> Dict[str, Any]:
+    """
+    Build columns from (action, object) rows.
+
+    Args:
+        rows: Iterable of (action, object) pairs
+
+    Returns:
+        Dict[str, Any]: ``array.array`` and list columns, see module docs
+    """
+    builder = ColumnBuilder()
+    for action, obj in rows:
+        builder.append(action, obj)
+    return builder.columns
+
+
+def to_arrays(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert columns to NumPy arrays.
+
+    Numeric columns share memory with the input arrays. String columns
+    become unicode arrays.
+
+    Args:
+        columns: Columns from `to_columns`
+
+    Returns:
+        Dict[str, numpy.ndarray]: Arrays by column name
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("to_arrays requires NumPy to be installed") from None
+
+    dtypes = {"B": np.uint8, "q": np.int64, "d": np.float64}
+    arrays = {
+        name: np.frombuffer(columns[name], dtype=dtypes[typecode])
+        for name, typecode in NUMERIC_COLUMNS.items()
+    }
+    for name in STRING_COLUMNS:
+        arrays[name] = np.array(columns[name], dtype=str)
+    return arrays
+
+
+def to_arrow(columns: Dict[str, Any]):
+    """
+    Convert columns to an Arrow table.
+
+    The table has one row per object. Numeric columns wrap the input arrays
+    without copying, tags become a ``map<string, string>`` column.
+
+    Args:
+        columns: Columns from `to_columns`
+
+    Returns:
+        pyarrow.Table: Table with the columns above, tags in ``tags``
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("to_arrow requires pyarrow to be installed") from None
+
+    types = {"B": pa.uint8(), "q": pa.int64(), "d": pa.float64()}
+    length = len(columns["action"])
+    data = {}
+    for name, typecode in NUMERIC_COLUMNS.items():
+        if name == "tag_offsets":
+            continue
+        data[name] = pa.Array.from_buffers(
+            types[typecode], length, [None, pa.py_buffer(columns[name])]
+        )
+    data["user"] = pa.array(columns["user"], type=pa.string())
+    data["tags"] = pa.MapArray.from_arrays(
+        pa.array(columns["tag_offsets"], type=pa.int32()),
+        pa.array(columns["tag_keys"], type=pa.string()),
+        pa.array(columns["tag_values"], type=pa.string()),
+    )
+    return pa.table(data)
@@ -5,8 +5,12 @@ This module contains all the configuration settings for the osmdiff package's AP
 It provides default values for API endpoints, timeouts, and request headers.
 
 Configuration Structure:
-    - API_CONFIG: Contains settings for different API endpoints (Overpass, OSM, Nominatim)
+    - API_CONFIG: Contains settings for different API endpoints (Overpass, OSM,
+      OSM replication, Nominatim)
     - AUGMENTED_DIFF_CONFIG: Default parameters for AugmentedDiff operations
+    - PARSER_CONFIG: XML parser backend selection
+    - BACKFILL_CONFIG: Concurrency of fetch_range
+    - SESSION_CONFIG: Connection pooling of the shared HTTP session
     - DEFAULT_HEADERS: Standard HTTP headers used across all API requests
 
 Example:
@@ -19,6 +23,8 @@ Example:
     response = requests.get(url, headers=DEFAULT_HEADERS)
 """
 
+from osmdiff.settings import DEFAULT_REPLICATION_URL
+
 # Default API URLs and settings for different services
 API_CONFIG = {
     "overpass": {
@@ -30,6 +36,10 @@ API_CONFIG = {
         "base_url": "https://api.openstreetmap.org/api/0.6",
         "timeout": 30,
     },
+    "replication": {
+        "base_url": DEFAULT_REPLICATION_URL,
+        "timeout": 30,
+    },
     "nominatim": {
         "base_url": "https://nominatim.openstreetmap.org",
         "timeout": 30,
@@ -45,6 +55,33 @@ AUGMENTED_DIFF_CONFIG = {
     "timestamp": None,  # Timestamp for diff operations
 }
 
+# XML parser settings, see osmdiff.backends
+PARSER_CONFIG = {
+    "backend": None,  # "expat", "lxml" or "etree"; None picks the fastest available
+    # Share one immutable mapping between objects with identical tags, see
+    # osmdiff.osm.tags
+    "share_tags": False,
+}
+
+# Parallel retrieval of sequence ranges, see osmdiff.backfill
+BACKFILL_CONFIG = {
+    "workers": 4,  # Concurrent downloads per fetch_range call
+    # Maximum simultaneous downloads per host, across all fetch_range calls
+    "host_limits": {
+        "overpass-api.de": 2,
+        "planet.openstreetmap.org": 4,
+    },
+    "default_host_limit": 4,
+}
+
+# Shared HTTP session, see osmdiff.session
+SESSION_CONFIG = {
+    "pool_connections": 10,  # Number of hosts to keep connection pools for
+    "pool_maxsize": 10,  # Connections kept alive per host
+    "pool_block": False,  # Wait for a free connection instead of opening more
+    "accept_encoding": "gzip, deflate",  # Compression offered to servers
+}
+
 # User agent string following OSM API guidelines
 # https://operations.osmfoundation.org/policies/api/
 USER_AGENT = "osmdiff/1.0"  # Replace with your actual user agent
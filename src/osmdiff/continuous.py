@@ -0,0 +1,431 @@
+"""
+Iteration over consecutive diffs as they are published.
+
+`ContinuousDiff` holds the polling, catch-up and prefetching logic shared by
+`osmdiff.ContinuousAugmentedDiff` (Overpass augmented diffs) and
+`osmdiff.ContinuousOSMChange` (OSM replication diffs). Subclasses tell it how
+to check the remote state and how to build and retrieve the diff of a
+sequence.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Optional
+
+from .checkpoint import CheckpointStore
+from .schedule import PollScheduler
+
+
+class ContinuousDiff:
+    """Base class of iterators over consecutive diffs, with backoff.
+
+    The remote state is only checked once all sequences known to be
+    available have been retrieved. While behind, diffs are retrieved back to
+    back, without waiting or checking the state in between; `lag` tells how
+    many diffs are left. Once caught up, the state is checked every
+    ``min_interval`` seconds, backing off up to ``max_interval`` on errors,
+    or when a `osmdiff.schedule.PollScheduler` says so.
+
+    By default each diff is only requested once the previous one has been
+    handed out. With ``prefetch=k``, up to k of the following diffs that
+    are already available are downloaded and parsed in the background while
+    the consumer handles the current one, so catching up is limited by
+    bandwidth rather than by one round trip per diff. Prefetched diffs are
+    held in a queue of at most k diffs, which is only refilled as the
+    consumer takes diffs from it. Synchronous iteration uses a pool of k
+    threads, ``async for`` uses k tasks; call `close` to stop them.
+
+    With a `osmdiff.checkpoint.CheckpointStore`, iteration starts after the
+    last sequence the ``consumer`` processed, and a diff is recorded as
+    processed once the next one is requested. Call `commit` to also record
+    the last diff, for instance before stopping after handling it.
+
+    Subclasses implement `_new_diff`, `_get_state`, `_aget_state`,
+    `_retrieve_diff` and `_aretrieve_diff`.
+
+    Args:
+        timeout: Request timeout in seconds
+        min_interval: Minimum seconds between checks
+        max_interval: Maximum seconds between checks
+        session: ``requests.Session`` to make requests with, instead of the
+            shared session from `osmdiff.session`
+        async_session: ``aiohttp.ClientSession`` for asynchronous iteration
+            with ``async for``, see `osmdiff.aio`. If omitted, a session is
+            opened for each request.
+        filter: `osmdiff.filters.Filter` for the changes to parse
+        prefetch: Number of diffs to retrieve ahead of the consumer, 0 to
+            retrieve them one at a time
+        scheduler: `osmdiff.schedule.PollScheduler` to plan state checks
+            after the predicted publish time of the next diff, instead of
+            every ``min_interval`` seconds
+        checkpoint: `osmdiff.checkpoint.CheckpointStore` to resume from and
+            to record processed sequences in
+        consumer: Name of the consumer in the checkpoint store
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[int] = None,
+        min_interval: int = 30,
+        max_interval: int = 120,
+        session=None,
+        async_session=None,
+        filter=None,
+        prefetch: int = 0,
+        scheduler: Optional[PollScheduler] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        consumer: str = "default",
+    ):
+        self.filter = filter
+        self.prefetch = prefetch
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.session = session
+        self.async_session = async_session
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self._current_sequence = None
+        self._current_interval = min_interval
+        self._last_check = None
+        self._logger = logging.getLogger(__name__)
+
+        # Newest sequence on the remote as of the last state check, and
+        # whether the last retrieval failed
+        self._newest = None
+        self._retry = False
+
+        # Prefetching: next sequence to request, and (sequence number, future
+        # or task) in sequence order
+        self._next_fetch = None
+        self._queue = deque()
+        self._executor = None
+
+        # Sequence handed out last, recorded as processed on the next request
+        self.checkpoint = checkpoint
+        self.consumer = consumer
+        self._yielded = None
+        if checkpoint is not None:
+            last = checkpoint.load(consumer)
+            if last is not None:
+                self._current_sequence = last + 1
+
+    def _new_diff(self, sequence_number: Optional[int] = None) -> Any:
+        """Create the diff object for the current or the given sequence."""
+        raise NotImplementedError
+
+    def _get_state(self) -> dict:
+        """Check the remote state.
+
+        Returns:
+            dict: ``sequence_number`` of the newest diff and its ``timestamp``
+        """
+        raise NotImplementedError
+
+    async def _aget_state(self) -> dict:
+        """Asynchronous version of `_get_state`."""
+        raise NotImplementedError
+
+    def _retrieve_diff(self, diff) -> int:
+        """Download and parse a diff, returning the HTTP status code."""
+        raise NotImplementedError
+
+    async def _aretrieve_diff(self, diff) -> int:
+        """Asynchronous version of `_retrieve_diff`."""
+        raise NotImplementedError
+
+    def _time_to_next_check(self) -> float:
+        """Seconds until the next check is due."""
+        if self.scheduler is not None and not self._retry:
+            return self.scheduler.delay()
+        if self._last_check:
+            elapsed = (datetime.now() - self._last_check).total_seconds()
+            return max(0, self._current_interval - elapsed)
+        return 0
+
+    def _wait_for_next_check(self) -> None:
+        """Wait appropriate time before next check, using exponential backoff."""
+        wait_time = self._time_to_next_check()
+        if wait_time > 0:
+            self._commit_checkpoint()
+            time.sleep(wait_time)
+
+        self._last_check = datetime.now()
+
+    async def _await_next_check(self) -> None:
+        """Asynchronous version of `_wait_for_next_check`."""
+        wait_time = self._time_to_next_check()
+        if wait_time > 0:
+            self._commit_checkpoint()
+            await asyncio.sleep(wait_time)
+
+        self._last_check = datetime.now()
+
+    def _backoff(self) -> None:
+        """Increase check interval, up to max_interval."""
+        self._current_interval = min(self._current_interval * 2, self.max_interval)
+
+    def _reset_backoff(self) -> None:
+        """Reset check interval to minimum."""
+        self._current_interval = self.min_interval
+
+    @property
+    def lag(self) -> Optional[int]:
+        """Number of diffs available on the remote that were not yielded yet.
+
+        Based on the last state check, None before the first one. While
+        the lag is positive, diffs are retrieved back to back.
+        """
+        if self._newest is None or self._current_sequence is None:
+            return None
+        return max(0, self._newest - self._current_sequence + 1)
+
+    def _caught_up(self) -> bool:
+        """Whether all sequences known to be available have been retrieved."""
+        return self._newest is None or self._current_sequence > self._newest
+
+    def _set_newest(self, state: dict) -> None:
+        """Record the newest remote sequence from a state check."""
+        self._newest = state["sequence_number"]
+        if self.scheduler is not None:
+            self.scheduler.observe(state)
+        if self._current_sequence is None:
+            self._current_sequence = self._newest
+        if self._next_fetch is None:
+            self._next_fetch = self._current_sequence
+        if self._newest > self._current_sequence:
+            self._logger.info(f"Catching up on {self.lag} diffs")
+
+    def _state_failed(self, error: Exception) -> None:
+        """Back off after a failed state check."""
+        self._logger.warning(f"Error retrieving state: {error}")
+        self._backoff()
+        if self.scheduler is not None:
+            self.scheduler.observe(None)
+
+    def _retrieved(self) -> None:
+        """Move on to the next sequence after a successful retrieval."""
+        self._reset_backoff()
+        self._retry = False
+        self._yielded = self._current_sequence
+        self._current_sequence += 1
+
+    def _acknowledge(self) -> None:
+        """Record the diff handed out last as processed."""
+        if self._yielded is not None and self.checkpoint is not None:
+            self.checkpoint.save(self.consumer, self._yielded)
+        self._yielded = None
+
+    def _commit_checkpoint(self) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.commit()
+
+    def commit(self) -> None:
+        """Record the last diff as processed and commit the checkpoint.
+
+        Without it, the last diff is only recorded once the next one is
+        requested, and the checkpoint is committed in batches.
+        """
+        self._acknowledge()
+        self._commit_checkpoint()
+
+    def _retrieval_failed(self, message: str) -> None:
+        """Back off before retrying the current sequence."""
+        self._logger.warning(message)
+        self._backoff()
+        self._last_check = datetime.now()
+        self._retry = True
+
+    def _poll_due(self) -> bool:
+        """Whether to check for new sequences while prefetching."""
+        if not self._queue:
+            return True
+        return (
+            len(self._queue) < self.prefetch
+            and self._next_fetch > self._newest
+            and self._time_to_next_check() == 0
+        )
+
+    def _fill(self, submit) -> None:
+        """Start retrieving available sequences, up to the prefetch depth."""
+        while (
+            len(self._queue) < self.prefetch
+            and self._newest is not None
+            and self._next_fetch <= self._newest
+        ):
+            diff = self._new_diff(self._next_fetch)
+            self._queue.append((self._next_fetch, submit(diff)))
+            self._next_fetch += 1
+
+    def _prefetch_failed(self, sequence_number: int, error: Exception) -> None:
+        """Drop the prefetched diffs and retry from a failed sequence."""
+        self._logger.warning(f"Error retrieving diff {sequence_number}: {error}")
+        self._backoff()
+        self._last_check = datetime.now()
+        self._retry = True
+        for _, pending in self._queue:
+            pending.cancel()
+        self._queue.clear()
+        self._next_fetch = sequence_number
+
+    def _prefetched(self, sequence_number: int) -> None:
+        self._reset_backoff()
+        self._retry = False
+        self._yielded = sequence_number
+        self._current_sequence = sequence_number + 1
+
+    @staticmethod
+    def _retrieve(diff: Any) -> Any:
+        """Download and parse a diff in a prefetch thread."""
+        diff._parse_body(diff._download_body())
+        return diff
+
+    def _next_prefetched(self) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.prefetch, thread_name_prefix="osmdiff-prefetch"
+            )
+
+        def submit(diff: Any):
+            return self._executor.submit(self._retrieve, diff)
+
+        while True:
+            if self._poll_due():
+                if not self._queue:
+                    self._wait_for_next_check()
+                else:
+                    self._last_check = datetime.now()
+                try:
+                    self._set_newest(self._get_state())
+                except Exception as e:
+                    self._state_failed(e)
+            self._fill(submit)
+            if not self._queue:
+                continue
+            sequence_number, future = self._queue.popleft()
+            try:
+                diff = future.result()
+            except Exception as e:
+                self._prefetch_failed(sequence_number, e)
+                continue
+            self._prefetched(sequence_number)
+            self._fill(submit)  # Keep the workers busy meanwhile
+            return diff
+
+    async def _anext_prefetched(self) -> Any:
+        async def retrieve(diff: Any) -> Any:
+            status = await self._aretrieve_diff(diff)
+            if status != 200:
+                raise Exception(f"HTTP {status}")
+            return diff
+
+        def submit(diff: Any) -> asyncio.Future:
+            return asyncio.ensure_future(retrieve(diff))
+
+        while True:
+            if self._poll_due():
+                if not self._queue:
+                    await self._await_next_check()
+                else:
+                    self._last_check = datetime.now()
+                try:
+                    self._set_newest(await self._aget_state())
+                except Exception as e:
+                    self._state_failed(e)
+            self._fill(submit)
+            if not self._queue:
+                continue
+            sequence_number, task = self._queue.popleft()
+            try:
+                diff = await task
+            except Exception as e:
+                self._prefetch_failed(sequence_number, e)
+                continue
+            self._prefetched(sequence_number)
+            self._fill(submit)
+            return diff
+
+    def close(self) -> None:
+        """Cancel prefetching and stop the prefetch threads.
+
+        Checkpoints recorded so far are committed; the last diff is not
+        recorded as processed, see `commit`.
+        """
+        self._commit_checkpoint()
+        for _, pending in self._queue:
+            pending.cancel()
+        self._queue.clear()
+        self._next_fetch = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Any:
+        self._acknowledge()
+        if self.prefetch:
+            return self._next_prefetched()
+        while True:
+            if self._caught_up():
+                self._wait_for_next_check()
+                try:
+                    self._set_newest(self._get_state())
+                except Exception as e:
+                    self._state_failed(e)
+                    continue
+                if self._caught_up():
+                    continue
+            elif self._retry:
+                self._wait_for_next_check()
+
+            diff = self._new_diff()
+            try:
+                status = self._retrieve_diff(diff)
+            except Exception as e:
+                self._retrieval_failed(f"Error retrieving diff: {e}")
+                continue
+            if status != 200:
+                self._retrieval_failed(f"Failed to retrieve diff: HTTP {status}")
+                continue
+
+            self._retrieved()
+            return diff
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        self._acknowledge()
+        if self.prefetch:
+            return await self._anext_prefetched()
+        while True:
+            if self._caught_up():
+                await self._await_next_check()
+                try:
+                    self._set_newest(await self._aget_state())
+                except Exception as e:
+                    self._state_failed(e)
+                    continue
+                if self._caught_up():
+                    continue
+            elif self._retry:
+                await self._await_next_check()
+
+            diff = self._new_diff()
+            try:
+                status = await self._aretrieve_diff(diff)
+            except Exception as e:
+                self._retrieval_failed(f"Error retrieving diff: {e}")
+                continue
+            if status != 200:
+                self._retrieval_failed(f"Failed to retrieve diff: HTTP {status}")
+                continue
+
+            self._retrieved()
+            return diff
@@ -0,0 +1,234 @@
+"""
+What changed between the old and new version of a modified object.
+
+Augmented diffs hold both versions of each modified object. A `ModifyDelta`
+summarizes their differences: tags added, removed and changed, whether the
+geometry changed, and the nodes of a way or the members of a relation that
+were added or removed:
+
+```python
+from osmdiff import AugmentedDiff
+
+adiff = AugmentedDiff(sequence_number=6500000)
+adiff.retrieve(stream=True)
+for delta in adiff.iter_deltas():
+    if delta.tags_only:
+        print(delta.type, delta.id, delta.tags_changed)
+```
+
+A delta is always computed from the two parsed versions of an object.
+`AugmentedDiff.iter_deltas` streams a diff: creations and deletions are
+skipped by the parser, and the two versions of each modification are
+dropped once their delta is computed. For a diff that has already been
+retrieved, `AugmentedDiff.deltas` computes the deltas from
+`AugmentedDiff.modify`, whose entries do not hold one.
+"""
+
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from osmdiff.filters import _points
+from osmdiff.osm import Node, OSMObject, Relation, Way
+
+TYPES = {"n": "node", "w": "way", "r": "relation"}
+
+Member = Tuple[str, Optional[int], Optional[str]]
+
+
+def _way_refs(way: Way) -> list:
+    if way._nodes is None:
+        return list(way._refs or ())
+    refs = []
+    for node in way._nodes:
+        ref = node._get_attrib("ref")
+        refs.append(int(ref) if ref is not None else node.id)
+    return refs
+
+
+def _bytes(values) -> bytes:
+    return b"" if values is None else values.tobytes()
+
+
+def _way_geometry_changed(old: Way, new: Way) -> bool:
+    if old._nodes is None and new._nodes is None:
+        # Compare the arrays as bytes: NaN placeholders never compare equal
+        if _bytes(old._refs) != _bytes(new._refs):
+            return True
+        return _bytes(old._coords) != _bytes(new._coords)
+    if _way_refs(old) != _way_refs(new):
+        return True
+    return list(_points(old)) != list(_points(new))
+
+
+def _members(relation: Relation) -> List[Member]:
+    members = []
+    for member in relation.members:
+        ref = member._get_attrib("ref")
+        members.append(
+            (
+                member._get_attrib("type") or TYPES.get(member.osmtype),
+                int(ref) if ref is not None else None,
+                member._get_attrib("role"),
+            )
+        )
+    return members
+
+
+def _difference(items: list, other: list) -> list:
+    """Items not in other, counting repeated items, in their order."""
+    remaining = Counter(other)
+    difference = []
+    for item in items:
+        if remaining[item] > 0:
+            remaining[item] -= 1
+        else:
+            difference.append(item)
+    return difference
+
+
+class ModifyDelta:
+    """Differences between the old and new version of an object.
+
+    Attributes:
+        type: "node", "way" or "relation"
+        id: Object id
+        old_version: Version before the change
+        new_version: Version after the change. Equal to ``old_version`` for
+            ways and relations listed because their nodes moved.
+        changeset: Changeset of the new version
+        tags_added: Tags of the new version whose key was not in the old one
+        tags_removed: Tags of the old version whose key is not in the new one
+        tags_changed: Key to ``(old value, new value)`` for changed values
+        geometry_changed: Whether the location of a node, the nodes or node
+            locations of a way, or the members or member geometry of a
+            relation changed
+        nodes_added: Node ids added to a way, in way order
+        nodes_removed: Node ids removed from a way, in way order
+        members_added: ``(type, ref, role)`` of members added to a relation
+        members_removed: ``(type, ref, role)`` of members removed from a
+            relation
+    """
+
+    __slots__ = (
+        "type",
+        "id",
+        "old_version",
+        "new_version",
+        "changeset",
+        "tags_added",
+        "tags_removed",
+        "tags_changed",
+        "geometry_changed",
+        "nodes_added",
+        "nodes_removed",
+        "members_added",
+        "members_removed",
+    )
+
+    def __init__(self, type: str, id: Optional[int]) -> None:
+        self.type = type
+        self.id = id
+        self.old_version = self.new_version = self.changeset = None
+        self.tags_added = {}
+        self.tags_removed = {}
+        self.tags_changed = {}
+        self.geometry_changed = False
+        self.nodes_added = []
+        self.nodes_removed = []
+        self.members_added = []
+        self.members_removed = []
+
+    @classmethod
+    def from_versions(cls, old: OSMObject, new: OSMObject) -> "ModifyDelta":
+        """Compute the delta between two versions of an object.
+
+        Args:
+            old: Version before the change
+            new: Version after the change
+
+        Returns:
+            ModifyDelta: The differences
+
+        Raises:
+            TypeError: If the versions are not of the same element type
+        """
+        if type(old) is not type(new):
+            raise TypeError(
+                f"Cannot compare a {type(old).__name__} with a {type(new).__name__}"
+            )
+        delta = cls(TYPES.get(new.osmtype), new.id)
+        delta.old_version = old.version
+        delta.new_version = new.version
+        delta.changeset = new.changeset
+
+        old_tags, new_tags = old._tags, new._tags
+        if old_tags is not new_tags:  # Shared tags, see osmdiff.osm.tags
+            for key, value in new_tags.items():
+                previous = old_tags.get(key)
+                if previous is None:
+                    delta.tags_added[key] = value
+                elif previous != value:
+                    delta.tags_changed[key] = (previous, value)
+            if len(old_tags) != len(new_tags) - len(delta.tags_added):
+                delta.tags_removed = {
+                    key: value for key, value in old_tags.items() if key not in new_tags
+                }
+
+        if isinstance(new, Node):
+            delta.geometry_changed = (
+                old._get_typed("lon") != new._get_typed("lon")
+                or old._get_typed("lat") != new._get_typed("lat")
+            )
+        elif isinstance(new, Way):
+            delta.geometry_changed = _way_geometry_changed(old, new)
+            if delta.geometry_changed:
+                old_refs, new_refs = _way_refs(old), _way_refs(new)
+                old_set, new_set = set(old_refs), set(new_refs)
+                delta.nodes_added = [ref for ref in new_refs if ref not in old_set]
+                delta.nodes_removed = [ref for ref in old_refs if ref not in new_set]
+        elif isinstance(new, Relation):
+            old_members, new_members = _members(old), _members(new)
+            if old_members != new_members:
+                delta.geometry_changed = True
+                delta.members_added = _difference(new_members, old_members)
+                delta.members_removed = _difference(old_members, new_members)
+            else:
+                delta.geometry_changed = list(_points(old)) != list(_points(new))
+        return delta
+
+    @property
+    def retagged(self) -> bool:
+        """Whether any tag was added, removed or changed."""
+        return bool(self.tags_added or self.tags_removed or self.tags_changed)
+
+    @property
+    def tags_only(self) -> bool:
+        """Whether only the tags changed."""
+        return self.retagged and not self.geometry_changed
+
+    @property
+    def geometry_only(self) -> bool:
+        """Whether only the geometry changed."""
+        return self.geometry_changed and not self.retagged
+
+    @property
+    def indirect(self) -> bool:
+        """Whether the object itself did not change, only its nodes."""
+        return self.old_version is not None and self.old_version == self.new_version
+
+    def to_dict(self) -> dict:
+        """Export the delta as a JSON-serializable dictionary."""
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["tags_changed"] = {k: list(v) for k, v in self.tags_changed.items()}
+        data["members_added"] = [list(m) for m in self.members_added]
+        data["members_removed"] = [list(m) for m in self.members_removed]
+        return data
+
+    def __repr__(self) -> str:
+        changes = []
+        if self.retagged:
+            changes.append("tags")
+        if self.geometry_changed:
+            changes.append("geometry")
+        changes = " and ".join(changes) or "no"
+        return f"ModifyDelta({self.type} {self.id}, {changes} changes)"
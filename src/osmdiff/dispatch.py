@@ -0,0 +1,276 @@
+"""
+Fan the changes of each diff out to many subscriptions.
+
+When several consumers watch different areas or tags, running one
+`osmdiff.ContinuousAugmentedDiff` or `osmdiff.ContinuousOSMChange` per
+consumer downloads and parses every diff once per consumer. A `Dispatcher`
+retrieves each diff once, indexes its changes in a
+`osmdiff.spatial.SpatialIndex`, and hands each subscription the changes
+matching its `osmdiff.filters.Filter`:
+
+```python
+import queue
+
+from osmdiff import ContinuousAugmentedDiff
+from osmdiff.dispatch import Dispatcher
+from osmdiff.filters import Filter
+
+dispatcher = Dispatcher(ContinuousAugmentedDiff())
+dispatcher.subscribe(
+    Filter(bbox=(-0.489, 51.28, 0.236, 51.686)),
+    callback=lambda diff, changes: print(diff.sequence_number, len(changes)),
+)
+amsterdam = dispatcher.subscribe(
+    Filter(bbox=(4.7, 52.3, 5.1, 52.5), tags={"building": None}),
+    queue=queue.Queue(maxsize=10),
+)
+dispatcher.run()  # amsterdam.queue.get() in another thread
+```
+
+Changes are passed as a list of ``(action, old, new)`` tuples for augmented
+diffs and ``(action, object)`` pairs for OSMChange, like the items of
+`osmdiff.spatial.SpatialIndex.from_diff`. Subscriptions only receive diffs
+with at least one matching change.
+"""
+
+import inspect
+import logging
+from typing import Any, Callable, Iterable, List, Optional
+
+from osmdiff.filters import Filter
+from osmdiff.spatial import SpatialIndex, diff_entries
+
+logger = logging.getLogger(__name__)
+
+
+def _match(filter: Filter, item: tuple) -> bool:
+    """Whether a change matches a filter, by its action or any version."""
+    if filter.actions is not None and item[0] not in filter.actions:
+        return False
+    return any(filter.matches(obj) for obj in item[1:])
+
+
+class Subscription:
+    """Changes a consumer wants, and where to deliver them.
+
+    Matching changes are delivered either to a callback, called with the
+    diff and the list of changes, or to a queue, as a ``(diff, changes)``
+    tuple. Queues are typically a bounded ``queue.Queue``, which holds back
+    the dispatcher while the consumer is behind, or an ``asyncio.Queue``
+    with `Dispatcher.arun`.
+
+    Args:
+        filter: `osmdiff.filters.Filter` the changes have to match, None for
+            all changes. A change matches if its action is accepted and one
+            of its versions matches the other criteria.
+        callback: Function called with each diff and its matching changes
+        queue: Queue to put ``(diff, changes)`` tuples in
+        name: Name used in log messages
+
+    Raises:
+        ValueError: If not exactly one of callback and queue is given
+    """
+
+    def __init__(
+        self,
+        filter: Optional[Filter] = None,
+        callback: Optional[Callable[[Any, list], Any]] = None,
+        queue=None,
+        name: Optional[str] = None,
+    ) -> None:
+        if (callback is None) == (queue is None):
+            raise ValueError("give either a callback or a queue")
+        self.filter = filter
+        self.callback = callback
+        self.queue = queue
+        self.name = name or repr(filter)
+        self.delivered = 0
+        self.errors = 0
+
+    def select(self, items: Iterable[tuple]) -> list:
+        """Keep the changes matching the filter.
+
+        Args:
+            items: Changes, as ``(action, old, new)`` or ``(action, object)``
+
+        Returns:
+            list: Matching changes, in the same order
+        """
+        if self.filter is None:
+            return list(items)
+        return [item for item in items if _match(self.filter, item)]
+
+    def deliver(self, diff: Any, changes: list) -> Any:
+        """Hand changes to the callback or the queue.
+
+        Returns:
+            The result of the callback or of ``queue.put``, which can be
+            awaitable
+        """
+        if self.callback is not None:
+            return self.callback(diff, changes)
+        return self.queue.put((diff, changes))
+
+    def __repr__(self) -> str:
+        return f"Subscription({self.name}, {self.delivered} delivered)"
+
+
+class Dispatcher:
+    """Deliver the changes of each diff to matching subscriptions.
+
+    Each diff is retrieved and parsed once. Subscriptions with a bbox are
+    matched through one `osmdiff.spatial.SpatialIndex` query for all of them,
+    and only the changes found in their bbox are checked against the rest of
+    their filter; subscriptions without bbox check every change.
+
+    A subscriber that raises is logged and counted in its ``errors``, and
+    does not stop the delivery to the others. With a checkpoint on the
+    source, a diff is recorded as processed once it has been delivered to
+    all subscriptions: after a restart, callbacks see the diffs they were
+    handling again, while diffs still waiting in queues are not replayed.
+
+    Args:
+        source: Iterable of diffs, usually a `osmdiff.ContinuousAugmentedDiff`
+            or `osmdiff.ContinuousOSMChange`. Its own ``filter`` applies
+            before any subscription, so it should accept everything the
+            subscriptions need.
+    """
+
+    def __init__(self, source: Optional[Iterable] = None) -> None:
+        self.source = source
+        self.subscriptions = []
+
+    def subscribe(
+        self,
+        filter: Optional[Filter] = None,
+        callback: Optional[Callable[[Any, list], Any]] = None,
+        queue=None,
+        name: Optional[str] = None,
+    ) -> Subscription:
+        """Register a subscription, see `Subscription` for the arguments.
+
+        Returns:
+            Subscription: The subscription, to unsubscribe later
+        """
+        subscription = Subscription(filter, callback, queue, name)
+        self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering to a subscription."""
+        self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    def match(self, diff: Any, subscriptions: Optional[list] = None) -> List[list]:
+        """Find the changes of a diff matching each subscription.
+
+        Args:
+            diff: AugmentedDiff or OSMChange with parsed changes
+            subscriptions: Subscriptions to match, all by default
+
+        Returns:
+            list: Matching changes of each subscription, in the order of the
+                subscriptions
+        """
+        if subscriptions is None:
+            subscriptions = self.subscriptions
+        entries = diff_entries(diff)
+        found = [None] * len(subscriptions)
+        regional = [
+            i
+            for i, s in enumerate(subscriptions)
+            if s.filter is not None and s.filter.bbox is not None
+        ]
+        if regional:
+            index = SpatialIndex(entries)
+            bboxes = [subscriptions[i].filter.bbox for i in regional]
+            for i, candidates in zip(regional, index.query_regions(bboxes)):
+                found[i] = subscriptions[i].select(candidates)
+        items = [item for item, _ in entries]
+        for i, subscription in enumerate(subscriptions):
+            if found[i] is None:
+                found[i] = subscription.select(items)
+        return found
+
+    def _failed(self, subscription: Subscription, diff: Any) -> None:
+        subscription.errors += 1
+        logger.exception(
+            f"Error delivering diff {diff.sequence_number} to {subscription.name}"
+        )
+
+    def dispatch(self, diff: Any) -> int:
+        """Deliver the changes of a diff to the matching subscriptions.
+
+        Args:
+            diff: AugmentedDiff or OSMChange with parsed changes
+
+        Returns:
+            int: Number of subscriptions the diff was delivered to
+        """
+        subscriptions = self.subscriptions
+        delivered = 0
+        for subscription, changes in zip(
+            subscriptions, self.match(diff, subscriptions)
+        ):
+            if not changes:
+                continue
+            try:
+                subscription.deliver(diff, changes)
+            except Exception:
+                self._failed(subscription, diff)
+                continue
+            subscription.delivered += 1
+            delivered += 1
+        return delivered
+
+    async def adispatch(self, diff: Any) -> int:
+        """Asynchronous version of `dispatch`.
+
+        Coroutine callbacks and ``asyncio.Queue.put`` are awaited.
+        """
+        subscriptions = self.subscriptions
+        delivered = 0
+        for subscription, changes in zip(
+            subscriptions, self.match(diff, subscriptions)
+        ):
+            if not changes:
+                continue
+            try:
+                result = subscription.deliver(diff, changes)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                self._failed(subscription, diff)
+                continue
+            subscription.delivered += 1
+            delivered += 1
+        return delivered
+
+    def run(self, limit: Optional[int] = None) -> None:
+        """Dispatch the diffs of the source.
+
+        Args:
+            limit: Number of diffs to dispatch, None to follow the source
+                until it ends
+        """
+        if limit is not None and limit <= 0:
+            return
+        for count, diff in enumerate(self.source, 1):
+            self.dispatch(diff)
+            if count == limit:
+                break
+
+    async def arun(self, limit: Optional[int] = None) -> None:
+        """Dispatch the diffs of the source with ``async for``.
+
+        Args:
+            limit: Number of diffs to dispatch, None to follow the source
+                until it ends
+        """
+        if limit is not None and limit <= 0:
+            return
+        count = 0
+        async for diff in self.source:
+            await self.adispatch(diff)
+            count += 1
+            if count == limit:
+                break
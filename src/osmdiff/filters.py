@@ -0,0 +1,273 @@
+"""
+Filters evaluated while diffs are parsed.
+
+Most consumers only need a small part of each diff: the changes in an area,
+to some element types, or to objects with certain tags. A `Filter` passed to
+`AugmentedDiff` or `OSMChange` is handed down to the parser backend, which
+skips rejected elements before any `OSMObject` is built for them:
+
+```python
+from osmdiff import OSMChange
+from osmdiff.filters import Filter
+
+
+def albert(name: str) -> bool:
+    return name.startswith("Albert")
+
+
+shops = Filter(
+    bbox=(4.7, 52.3, 5.1, 52.5),
+    tags={"shop": None, "name": albert},
+    types=["node"],
+    actions=["create", "modify"],
+)
+osmchange = OSMChange(sequence_number=6000000, filter=shops)
+osmchange.retrieve()
+```
+
+All given criteria have to match:
+
+- ``bbox``: ``(minlon, minlat, maxlon, maxlat)``. An object matches if one
+  of its coordinates (node location, way node or member coordinates) lies in
+  the box, or if its bounds intersect it. Objects without coordinates, such
+  as ways in OSMChange files or deleted nodes, do not match.
+- ``tags``: mapping of tag keys to a value, a collection of values, a
+  predicate on the value, or None to only require the key.
+- ``types``: element types, "node", "way" and "relation" (or "n", "w", "r").
+- ``actions``: "create", "modify" and/or "delete".
+
+Actions and types are checked as soon as an element opens, and nodes are
+checked against the bbox from their start tag, so rejected elements are
+skipped outright. Checks that depend on tags or way geometry wait for the
+element to close; until then its children are only buffered. In augmented
+diffs an action is kept when its old or its new version matches, so the two
+versions of a modification or deletion are always built and checked
+together.
+"""
+
+import operator
+from collections.abc import Callable, Collection
+from functools import partial
+from typing import Any, Iterable, Mapping, Optional, Sequence, Tuple
+
+from osmdiff.osm import Node, OSMObject, Relation, Way
+
+ACTIONS = ("create", "modify", "delete")
+TYPES = {"node": "node", "way": "way", "relation": "relation"}
+TYPES.update({"n": "node", "w": "way", "r": "relation"})
+
+
+def _any_value(value: str) -> bool:
+    return True
+
+
+def _predicate(value) -> Callable[[str], bool]:
+    """Build a predicate on tag values from a filter specification.
+
+    Predicates are kept picklable, so filters can be sent to the parser
+    processes of `fetch_range`.
+    """
+    if value is None:
+        return _any_value
+    if isinstance(value, str):
+        return partial(operator.eq, value)
+    if callable(value):
+        return value
+    if isinstance(value, Collection):
+        return partial(operator.contains, frozenset(value))
+    raise TypeError(f"Invalid tag filter: {value!r}")
+
+
+class Filter:
+    """Criteria an element has to meet to be parsed.
+
+    Args:
+        bbox: ``(minlon, minlat, maxlon, maxlat)`` in WGS84
+        tags: Tag key to value, collection of values, predicate or None
+        types: Element types to keep
+        actions: Actions to keep
+
+    Filters are pickled to be sent to the parser processes of
+    ``fetch_range``, so tag predicates used there have to be picklable:
+    module-level functions work, lambdas and nested functions do not.
+
+    Raises:
+        ValueError: If a type or action is unknown, or the bbox is invalid
+        TypeError: If a tag filter is neither a value, a collection of values
+            nor a callable
+    """
+
+    def __init__(
+        self,
+        bbox: Optional[Sequence[float]] = None,
+        tags: Optional[Mapping[str, Any]] = None,
+        types: Optional[Iterable[str]] = None,
+        actions: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.bbox = None
+        if bbox is not None:
+            minlon, minlat, maxlon, maxlat = (float(c) for c in bbox)
+            if minlon > maxlon or minlat > maxlat:
+                raise ValueError(f"Invalid bbox: {bbox}")
+            self.bbox = (minlon, minlat, maxlon, maxlat)
+        self.tags = {key: _predicate(value) for key, value in (tags or {}).items()}
+        self.types = None
+        if types is not None:
+            unknown = set(types) - set(TYPES)
+            if unknown:
+                raise ValueError(f"Unknown OSM element types: {sorted(unknown)}")
+            self.types = frozenset(TYPES[t] for t in types)
+        self.actions = None
+        if actions is not None:
+            actions = frozenset(actions)
+            if not actions <= set(ACTIONS):
+                raise ValueError(f"Unknown actions: {sorted(actions - set(ACTIONS))}")
+            self.actions = actions
+
+    def with_bbox(self, bbox: Sequence[float]) -> "Filter":
+        """Get a copy of the filter with a bbox, if it does not have one."""
+        if self.bbox is not None:
+            return self
+        copy = Filter(bbox=bbox)
+        copy.tags, copy.types, copy.actions = self.tags, self.types, self.actions
+        return copy
+
+    def with_actions(self, actions: Iterable[str]) -> "Filter":
+        """Get a copy of the filter that only keeps some of its actions."""
+        actions = frozenset(actions)
+        if self.actions is not None:
+            actions &= self.actions
+        copy = Filter(actions=actions)
+        copy.bbox, copy.tags, copy.types = self.bbox, self.tags, self.types
+        return copy
+
+    def rejects(self, action: Optional[str], tag: str) -> bool:
+        """Whether an element is rejected by its action or type alone.
+
+        Args:
+            action: Action the element belongs to, None if unknown
+            tag: Element tag ("node", "way" or "relation")
+        """
+        if self.types is not None and tag not in self.types:
+            return True
+        return self.actions is not None and action not in self.actions
+
+    def check_start(self, tag: str, attrib: Mapping[str, str]) -> Optional[bool]:
+        """Decide on an element from its start tag, if possible.
+
+        Only the bbox and tag criteria are checked, see `rejects`.
+
+        Args:
+            tag: Element tag ("node", "way" or "relation")
+            attrib: Element attributes
+
+        Returns:
+            bool: Whether the element matches, or None if that depends on its
+                children
+        """
+        if self.bbox is not None and tag == "node":
+            minlon, minlat, maxlon, maxlat = self.bbox
+            try:
+                lon, lat = float(attrib["lon"]), float(attrib["lat"])
+            except (KeyError, ValueError):
+                return False
+            if not (minlon <= lon <= maxlon and minlat <= lat <= maxlat):
+                return False
+            return None if self.tags else True
+        if self.bbox is None and not self.tags:
+            return True
+        return None
+
+    def test(
+        self,
+        tags: Mapping[str, str],
+        points: Iterable[Tuple[Any, Any]],
+        bounds: Optional[Sequence[Any]] = None,
+    ) -> bool:
+        """Check the bbox and tag criteria against raw element data.
+
+        Args:
+            tags: Tags of the element
+            points: (lon, lat) pairs of the element, as strings or numbers
+            bounds: ``[minlon, minlat, maxlon, maxlat]`` of the element
+
+        Returns:
+            bool: Whether the element matches
+        """
+        for key, predicate in self.tags.items():
+            value = tags.get(key)
+            if value is None or not predicate(value):
+                return False
+        if self.bbox is None:
+            return True
+        if bounds and self._intersects(bounds):
+            return True
+        return self._in_bbox(points)
+
+    def matches(self, obj: Optional[OSMObject]) -> bool:
+        """Check the type, bbox and tag criteria against a parsed object.
+
+        Args:
+            obj: The object, None never matches
+
+        Returns:
+            bool: Whether the object matches
+        """
+        if obj is None:
+            return False
+        tag = {"n": "node", "w": "way", "r": "relation"}.get(obj.osmtype)
+        if self.types is not None and tag not in self.types:
+            return False
+        return self.test(obj._tags, _points(obj), obj.bounds)
+
+    def _in_bbox(self, points: Iterable[Tuple[Any, Any]]) -> bool:
+        minlon, minlat, maxlon, maxlat = self.bbox
+        for lon, lat in points:
+            if lon is None or lat is None:
+                continue
+            try:
+                lon, lat = float(lon), float(lat)
+            except ValueError:
+                continue
+            if minlon <= lon <= maxlon and minlat <= lat <= maxlat:
+                return True
+        return False
+
+    def _intersects(self, bounds: Sequence[Any]) -> bool:
+        minlon, minlat, maxlon, maxlat = self.bbox
+        try:
+            west, south, east, north = (float(c) for c in bounds)
+        except (TypeError, ValueError):
+            return False
+        return west <= maxlon and east >= minlon and south <= maxlat and north >= minlat
+
+    def __repr__(self) -> str:
+        parts = []
+        if self.bbox is not None:
+            parts.append(f"bbox={self.bbox}")
+        if self.tags:
+            parts.append(f"tags={sorted(self.tags)}")
+        if self.types is not None:
+            parts.append(f"types={sorted(self.types)}")
+        if self.actions is not None:
+            parts.append(f"actions={sorted(self.actions)}")
+        return f"Filter({', '.join(parts)})"
+
+
+def _points(obj: OSMObject) -> Iterable[Tuple[Any, Any]]:
+    """Coordinates of a parsed object, without validating them."""
+    if isinstance(obj, Node):
+        yield obj._get_typed("lon"), obj._get_typed("lat")
+    elif isinstance(obj, Way):
+        if obj._nodes is None:
+            coords = obj._coords or ()
+            for i in range(0, len(coords), 2):
+                if coords[i] == coords[i]:  # Not NaN
+                    yield coords[i], coords[i + 1]
+        else:
+            for node in obj._nodes:
+                if isinstance(node, OSMObject):
+                    yield from _points(node)
+    elif isinstance(obj, Relation):
+        for member in obj.members:
+            yield from _points(member)
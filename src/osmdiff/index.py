@@ -0,0 +1,336 @@
+"""
+Random access to the objects of large diff files.
+
+Finding what happened to a single object in a daily OSMChange file normally
+means parsing the whole file. `DiffIndex` scans the file once and saves the
+byte range of every object to a sidecar index file. Lookups then
+memory-map both files, binary search the index and parse only the matching
+fragments, which takes milliseconds even on multi-gigabyte files:
+
+```python
+from osmdiff.index import DiffIndex
+
+with DiffIndex("planet-day.osc") as index:  # Builds planet-day.osc.idx once
+    for action, way in index.lookup("way", 12345):
+        print(action, way.version, way.tags)
+```
+
+OSMChange and augmented diff files are supported. For OSMChange files,
+`DiffIndex.lookup` returns ``(action, object)`` pairs. For augmented diffs
+the whole ``<action>`` element holding the object is parsed and
+``(action, old, new)`` tuples are returned, like `AugmentedDiff.iter_actions`.
+
+The index records the size and modification time of the diff file and is
+rebuilt when they change. Gzipped files cannot be read at random offsets and
+have to be decompressed before they are indexed.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+from typing import List, Optional
+from xml.parsers import expat
+
+from osmdiff.augmenteddiff import AugmentedDiff, _ActionAssembler
+from osmdiff.backends import get_backend
+from osmdiff.stream import CHUNK_SIZE, GZIP_MAGIC
+
+MAGIC = b"OSMDIDX\x00"
+VERSION = 1
+
+# Kinds of diff file
+AUGMENTED_DIFF = 0
+OSMCHANGE = 1
+
+# magic, version, kind, size and modification time of the diff file, entries
+HEADER = struct.Struct("<8sBB6xQQQ")
+# type, id, offset and length of the fragment, action; sorted by type and id
+ENTRY = struct.Struct("<BqQIB")
+
+ACTIONS = ("create", "modify", "delete")
+TYPES = ("node", "way", "relation")
+_TYPE_CODES = {"node": 0, "way": 1, "relation": 2, "n": 0, "w": 1, "r": 2}
+
+_ID_OFFSET = 1 << 63  # Ids are signed, keys are not
+
+
+def _stat(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _key(type_code: int, osm_id: int, offset: int, length: int, action: int) -> int:
+    """Pack an entry in a single int that sorts by type and id."""
+    key = (type_code << 64) | (osm_id + _ID_OFFSET)
+    return (((key << 64 | offset) << 32 | length) << 2) | action
+
+
+def _unkey(key: int) -> tuple:
+    action = key & 3
+    key >>= 2
+    length = key & 0xFFFFFFFF
+    key >>= 32
+    offset = key & 0xFFFFFFFFFFFFFFFF
+    key >>= 64
+    return key >> 64, (key & 0xFFFFFFFFFFFFFFFF) - _ID_OFFSET, offset, length, action
+
+
+class _Scanner:
+    """Record the byte range of the objects of a diff in a single pass."""
+
+    def __init__(self, mm: mmap.mmap) -> None:
+        self.mm = mm
+        self.kind = None
+        self.keys = []
+        self.depth = 0
+        self.action = 0
+        self.start = 0
+        self.empty = False  # Whether the last element opened has no children yet
+        self.objects = []  # (type, id) in the current augmented diff action
+        self.parser = expat.ParserCreate()
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+
+    def scan(self) -> List[int]:
+        mm = self.mm
+        for i in range(0, len(mm), CHUNK_SIZE):
+            self.parser.Parse(mm[i : i + CHUNK_SIZE], False)
+        self.parser.Parse(b"", True)
+        return self.keys
+
+    def _end_offset(self, empty: bool) -> int:
+        # The end handler reports the end of an empty element, or else the
+        # start of the end tag
+        index = self.parser.CurrentByteIndex
+        if empty and self.mm[index - 2 : index] == b"/>":
+            return index
+        return self.mm.find(b">", index) + 1
+
+    def _start(self, tag: str, attrib: dict) -> None:
+        self.depth += 1
+        self.empty = True
+        depth = self.depth
+        if depth == 1:
+            self.kind = OSMCHANGE if tag == "osmChange" else AUGMENTED_DIFF
+        elif depth == 2:
+            if self.kind == OSMCHANGE:
+                self.action = ACTIONS.index(tag) if tag in ACTIONS else -1
+            elif tag == "action":
+                action = attrib.get("type")
+                self.action = ACTIONS.index(action) if action in ACTIONS else -1
+                self.start = self.parser.CurrentByteIndex
+                self.objects = []
+        elif self.action >= 0 and tag in TYPES and "id" in attrib:
+            if self.kind == OSMCHANGE:
+                if depth == 3:
+                    self.start = self.parser.CurrentByteIndex
+                    self.objects = [(_TYPE_CODES[tag], int(attrib["id"]))]
+            elif depth <= 4:  # Created objects, or old and new versions
+                self.objects.append((_TYPE_CODES[tag], int(attrib["id"])))
+
+    def _end(self, tag: str) -> None:
+        depth = self.depth
+        self.depth -= 1
+        empty, self.empty = self.empty, False
+        if self.action < 0:
+            return
+        if self.kind == OSMCHANGE:
+            if depth != 3 or tag not in TYPES or not self.objects:
+                return
+        elif depth != 2 or tag != "action":
+            return
+        end = self._end_offset(empty)
+        for type_code, osm_id in set(self.objects):
+            self.keys.append(
+                _key(type_code, osm_id, self.start, end - self.start, self.action)
+            )
+        self.objects = []
+
+
+class _Keys:
+    """The (type, id) keys of the index entries, for bisect."""
+
+    def __init__(self, index: "DiffIndex") -> None:
+        self.index = index
+
+    def __len__(self) -> int:
+        return self.index.count
+
+    def __getitem__(self, i: int) -> tuple:
+        return self.index._entry(i)[:2]
+
+
+class DiffIndex:
+    """
+    Index of the objects of an OSMChange or augmented diff file.
+
+    The index is read from the sidecar file, or built if it is missing or
+    older than the diff file.
+
+    Args:
+        path: Uncompressed OSMChange or augmented diff XML file
+        index_path: Sidecar index file, ``path + ".idx"`` by default
+
+    Raises:
+        ValueError: If the diff file is empty, gzip-compressed or not
+            well-formed XML
+    """
+
+    def __init__(self, path, index_path: Optional[str] = None) -> None:
+        self.path = os.fspath(path)
+        self.index_path = os.fspath(index_path or self.path + ".idx")
+        self._mmap = self._index = None
+        if not self._open_index():
+            self.build(self.path, self.index_path)
+            if not self._open_index():  # pragma: no cover - changed meanwhile
+                raise ValueError(f"{self.path} changed while it was indexed")
+        with open(self.path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def build(path, index_path: Optional[str] = None) -> str:
+        """
+        Scan a diff file and write its index.
+
+        Args:
+            path: Uncompressed OSMChange or augmented diff XML file
+            index_path: Sidecar index file, ``path + ".idx"`` by default
+
+        Returns:
+            str: Path of the index file
+
+        Raises:
+            ValueError: If the diff file is empty, gzip-compressed or not
+                well-formed XML
+        """
+        path = os.fspath(path)
+        index_path = os.fspath(index_path or path + ".idx")
+        size, mtime = _stat(path)
+        if not size:
+            raise ValueError(f"{path} is empty")
+        with open(path, "rb") as fh:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[: len(GZIP_MAGIC)] == GZIP_MAGIC:
+                    raise ValueError(
+                        f"{path} is gzip-compressed, decompress it to index it"
+                    )
+                scanner = _Scanner(mm)
+                try:
+                    keys = scanner.scan()
+                except expat.ExpatError as e:
+                    raise ValueError(f"{path} is not a valid XML diff: {e}") from e
+        if scanner.kind is None:  # pragma: no cover - expat requires a root
+            raise ValueError(f"{path} has no root element")
+        keys.sort()
+        directory = os.path.dirname(os.path.abspath(index_path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(
+                    HEADER.pack(MAGIC, VERSION, scanner.kind, size, mtime, len(keys))
+                )
+                pack = ENTRY.pack
+                out.writelines(pack(*_unkey(key)) for key in keys)
+            os.replace(tmp, index_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return index_path
+
+    def _open_index(self) -> bool:
+        """Map the index file if it is up to date with the diff file."""
+        try:
+            with open(self.index_path, "rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # Missing or empty
+            return False
+        if len(mm) >= HEADER.size:
+            magic, version, kind, size, mtime, count = HEADER.unpack_from(mm)
+            if (
+                magic == MAGIC
+                and version == VERSION
+                and (size, mtime) == _stat(self.path)
+                and len(mm) == HEADER.size + count * ENTRY.size
+            ):
+                self._index = mm
+                self.kind = kind
+                self.count = count
+                return True
+        mm.close()
+        return False
+
+    def _entry(self, i: int) -> tuple:
+        return ENTRY.unpack_from(self._index, HEADER.size + i * ENTRY.size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, osmtype: str, osm_id: int) -> list:
+        """
+        Find the changes of an object.
+
+        Args:
+            osmtype: "node", "way" or "relation" (or "n", "w", "r")
+            osm_id: Id of the object
+
+        Returns:
+            list: ``(action, object)`` pairs for OSMChange files,
+                ``(action, old, new)`` tuples for augmented diffs, in file
+                order; empty if the object is not in the diff
+
+        Raises:
+            ValueError: If the type is unknown
+        """
+        if osmtype not in _TYPE_CODES:
+            raise ValueError(f"Unknown OSM element type: {osmtype}")
+        key = (_TYPE_CODES[osmtype], int(osm_id))
+        i = bisect.bisect_left(_Keys(self), key)
+        results = []
+        while i < self.count:
+            type_code, entry_id, offset, length, action = self._entry(i)
+            if (type_code, entry_id) != key:
+                break
+            fragment = self._mmap[offset : offset + length]
+            results.extend(self._parse(fragment, action, key))
+            i += 1
+        return results
+
+    def _parse(self, fragment: bytes, action: int, key: tuple) -> list:
+        """Parse the changes of the object ``key`` in a fragment.
+
+        An augmented diff fragment is a whole action, which can hold the
+        changes of several objects.
+        """
+        osmtype = "nwr"[key[0]]
+
+        def wanted(obj) -> bool:
+            return obj is not None and obj.osmtype == osmtype and obj.id == key[1]
+
+        events = get_backend()().parse([fragment])
+        if self.kind == OSMCHANGE:
+            return [
+                (ACTIONS[action], e[1])
+                for e in events
+                if e[0] == "object" and wanted(e[1])
+            ]
+        push = _ActionAssembler(AugmentedDiff()).push
+        results = []
+        for event in events:
+            parsed = push(event)
+            if parsed is not None and (wanted(parsed[2]) or wanted(parsed[1])):
+                results.append(parsed[:3])
+        return results
+
+    def close(self) -> None:
+        """Unmap the diff and index files."""
+        for mm in (self._mmap, self._index):
+            if mm is not None:
+                mm.close()
+
+    def __enter__(self) -> "DiffIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
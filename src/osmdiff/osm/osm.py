@@ -85,15 +85,104 @@ print(node.__geo_interface__) # {"type": "Point", "coordinates": [-0.1, 51.5]}
 ```
 """
 
-from typing import Dict, Any, List
-from xml.etree import ElementTree
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
 from xml.etree.ElementTree import Element
+import calendar
 import json
+import math
+import time
+
+from osmdiff.osm.tags import FrozenTags, TagsView
+
+
+# Epoch seconds of the hours seen in recent timestamps, by "YYYY-MM-DDTHH"
+_hours: Dict[str, int] = {}
+
+
+def _parse_timestamp(value) -> int:
+    """
+    Convert an OSM timestamp like 2017-11-10T13:49:50Z to epoch seconds.
+
+    Raises:
+        ValueError: If the timestamp is not in that format
+    """
+    if isinstance(value, int):
+        return value
+    if len(value) != 20 or value[13] != ":" or value[16] != ":" or value[19] != "Z":
+        raise ValueError(f"Invalid timestamp: {value}")
+    # Objects in a diff share a handful of hours, only convert those once
+    hour = _hours.get(value[:13])
+    if hour is None:
+        if value[4] != "-" or value[7] != "-" or value[10] != "T":
+            raise ValueError(f"Invalid timestamp: {value}")
+        hour = calendar.timegm(
+            (
+                int(value[0:4]),
+                int(value[5:7]),
+                int(value[8:10]),
+                int(value[11:13]),
+                0,
+                0,
+            )
+        )
+        if len(_hours) >= 4096:
+            _hours.clear()
+        _hours[value[:13]] = hour
+    return hour + int(value[14:16]) * 60 + int(value[17:19])
+
+
+def _format_timestamp(value: int) -> str:
+    """Convert epoch seconds to an OSM timestamp string."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value))
+
+
+def _format_coord(value: float) -> str:
+    """
+    Convert a coordinate to a string as written by OSM.
+
+    OSM writes coordinates with 7 decimals, like "51.5000000". Values with
+    more precision are written in full.
+    """
+    text = f"{value:.7f}"
+    return text if float(text) == value else repr(value)
+
+
+class _TypedAttrib:
+    """Descriptor exposing an XML attribute as a typed value, see OSMObject."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return obj._get_typed(self.key)
+
+    def __set__(self, obj, value) -> None:
+        obj._set_typed(self.key, value)
 
 
 class OSMObject:
     """Base class for all OpenStreetMap elements (nodes, ways, relations).
 
+    Objects use ``__slots__`` and keep the common XML attributes in typed
+    fields: `id`, `version`, `changeset` and `uid` as int, `timestamp` as
+    epoch seconds and `user` as str. Any other attributes are kept as strings.
+    Objects still accept arbitrary attributes: the instance dictionary is
+    only created when one is set.
+
+    `attribs` remains available for compatibility. Parsed objects build the
+    dictionary from the typed fields the first time it is accessed; from then
+    on, or when a dictionary is assigned, that dictionary is authoritative and
+    the typed fields read from and write to it. The dictionary built from
+    the typed fields has the original strings, except for node coordinates
+    rebuilt from way node arrays, which are written like OSM does, with 7
+    decimals.
+
+    `tags` is a dictionary, unless the parser shares identical tags between
+    objects: it is then a copy-on-write `osmdiff.osm.tags.TagsView`.
+
     Args:
         tags: Key-value tag dictionary
         attribs: XML attributes dictionary
@@ -103,6 +192,40 @@ class OSMObject:
         This is an abstract base class - use Node, Way or Relation for concrete elements.
     """
 
+    __slots__ = (
+        "_tags",
+        "bounds",
+        "_attribs",
+        "_extra",
+        "_id",
+        "_version",
+        "_timestamp",
+        "_changeset",
+        "_uid",
+        "_user",
+        "__dict__",
+    )
+
+    # Attributes kept in typed slots: key -> (slot, parse, format)
+    _ATTRIBS = {
+        "id": ("_id", int, str),
+        "version": ("_version", int, str),
+        "timestamp": ("_timestamp", _parse_timestamp, _format_timestamp),
+        "changeset": ("_changeset", int, str),
+        "uid": ("_uid", int, str),
+        "user": ("_user", str, str),
+    }
+    _LOADERS: Dict[str, tuple] = {}  # Built from _ATTRIBS, see _build_loaders
+
+    osmtype: Optional[str] = None
+
+    id = _TypedAttrib("id")
+    version = _TypedAttrib("version")
+    timestamp = _TypedAttrib("timestamp")
+    changeset = _TypedAttrib("changeset")
+    uid = _TypedAttrib("uid")
+    user = _TypedAttrib("user")
+
     def __init__(
         self,
         tags: Dict[str, str] = {},
@@ -111,8 +234,125 @@ class OSMObject:
     ) -> None:
         """Initialize an empty OSM object."""
         self.tags = tags or {}
-        self.attribs = attribs or {}
         self.bounds = bounds or None
+        self._attribs = attribs or None
+        self._extra = None
+        self._id = None
+        self._version = None
+        self._timestamp = None
+        self._changeset = None
+        self._uid = None
+        self._user = None
+
+    @property
+    def tags(self) -> Dict[str, str]:
+        """Key-value tag mapping."""
+        tags = self._tags
+        if type(tags) is FrozenTags:
+            return TagsView(self)
+        return tags
+
+    @tags.setter
+    def tags(self, value: Dict[str, str]) -> None:
+        self._tags = value
+
+    @property
+    def attribs(self) -> Dict[str, str]:
+        """XML attributes as a dictionary of strings."""
+        if self._attribs is None:
+            self._attribs = self._build_attribs()
+        return self._attribs
+
+    @attribs.setter
+    def attribs(self, value: Dict[str, str]) -> None:
+        self._attribs = value
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._LOADERS = cls._build_loaders()
+
+    @classmethod
+    def _build_loaders(cls) -> Dict[str, tuple]:
+        """Map typed attributes to their slot setter and parse function."""
+        return {
+            key: (getattr(cls, slot).__set__, parse)
+            for key, (slot, parse, _) in cls._ATTRIBS.items()
+        }
+
+    def _load_attribs(self, attrib) -> None:
+        """
+        Store XML attributes in the typed slots.
+
+        Args:
+            attrib: Element attributes
+        """
+        loaders = self._LOADERS
+        extra = None
+        for key, value in attrib.items():
+            loader = loaders.get(key)
+            if loader is not None:
+                try:
+                    loader[0](self, loader[1](value))
+                    continue
+                except (TypeError, ValueError):
+                    pass
+            if extra is None:
+                extra = {}
+            extra[key] = value
+        self._extra = extra
+
+    def _build_attribs(self) -> Dict[str, str]:
+        """Build the attribute dictionary from the typed slots."""
+        attribs = {}
+        for key, (slot, _, format) in self._ATTRIBS.items():
+            value = getattr(self, slot)
+            if value is not None:
+                attribs[key] = format(value)
+        if self._extra:
+            attribs.update(self._extra)
+        return attribs
+
+    def _get_attrib(self, key: str) -> Optional[str]:
+        """Get an attribute as a string without building `attribs`."""
+        if self._attribs is not None:
+            return self._attribs.get(key)
+        if self._extra:
+            value = self._extra.get(key)
+            if value is not None:
+                return value
+        typed = self._ATTRIBS.get(key)
+        if typed is not None:
+            value = getattr(self, typed[0])
+            if value is not None:
+                return typed[2](value)
+        return None
+
+    def _get_typed(self, key: str):
+        """Get a typed attribute, None if missing or not parsable."""
+        slot, parse, _ = self._ATTRIBS[key]
+        if self._attribs is not None:
+            value = self._attribs.get(key)
+            if value is None:
+                return None
+            try:
+                return parse(value)
+            except (TypeError, ValueError):
+                return None
+        return getattr(self, slot)
+
+    def _set_typed(self, key: str, value) -> None:
+        slot, parse, format = self._ATTRIBS[key]
+        if value is not None:
+            value = parse(value)
+        if self._attribs is None:
+            setattr(self, slot, value)
+            if self._extra:
+                # Drop the original string of the previous value
+                self._extra.pop(key, None)
+        elif value is None:
+            self._attribs.pop(key, None)
+        else:
+            self._attribs[key] = format(value)
 
     def __repr__(self) -> str:
         """
@@ -121,9 +361,9 @@ class OSMObject:
         Returns:
             str: Object type and ID, with additional info for ways/relations
         """
-        out = "{type} {id}".format(type=type(self).__name__, id=self.attribs.get("id"))
+        out = "{type} {id}".format(type=type(self).__name__, id=self._get_attrib("id"))
         if type(self) == Way:
-            out += " ({ways} nodes)".format(ways=len(self.nodes))
+            out += " ({ways} nodes)".format(ways=self._node_count())
         if type(self) == Relation:
             out += " ({mem} members)".format(mem=len(self.members))
         return out
@@ -154,6 +394,40 @@ class OSMObject:
                 be.attrib["maxlat"],
             ]
 
+    @classmethod
+    def _from_attrib(cls, tag: str, attrib: Dict[str, str]) -> "OSMObject":
+        """
+        Create an empty OSM object for an element from its tag and attributes.
+
+        Children (tags, nodes, members, bounds) are added by the caller. This
+        is shared by `from_xml` and the streaming parser backends.
+
+        Args:
+            tag: Element tag (node, nd, way, relation or member)
+            attrib: Element attributes
+
+        Returns:
+            OSMObject: Appropriate subclass instance
+
+        Raises:
+            ValueError: If a member element has no type
+            TypeError: If element type is unknown
+        """
+        osmtype = ""
+        if tag == "member":
+            osmtype = attrib.get("type")
+            if not osmtype:
+                raise ValueError("Member element missing type attribute")
+        else:
+            osmtype = tag
+
+        if osmtype not in OSM_CLASSES:
+            raise TypeError(f"Unknown OSM element type: {osmtype}")
+
+        o = OSM_CLASSES[osmtype]()
+        o._load_attribs(attrib)
+        return o
+
     @classmethod
     def from_xml(cls, elem: Element) -> "OSMObject":
         """
@@ -172,33 +446,32 @@ class OSMObject:
         if elem is None:
             raise ValueError("XML element cannot be None")
 
-        osmtype = ""
-        if elem.tag == "member":
-            osmtype = elem.attrib.get("type")
-            if not osmtype:
-                raise ValueError("Member element missing type attribute")
-        else:
-            osmtype = elem.tag
+        o = cls._from_attrib(elem.tag, elem.attrib)
+        o._parse_children(elem)
+        return o
 
-        if osmtype not in ("node", "nd", "way", "relation"):
-            raise TypeError(f"Unknown OSM element type: {osmtype}")
+    def _parse_children(self, elem: Element) -> None:
+        """
+        Parse tags, bounds, nodes and members in a single pass over the children.
 
-        o = OSMObject()
-        if osmtype in ("node", "nd"):
-            o = Node()
-        elif osmtype == "way":
-            o = Way()
-            o._parse_nodes(elem)
-        elif osmtype == "relation":
-            o = Relation()
-            o._parse_members(elem)
-        else:
-            pass
-        o.attribs = elem.attrib
-        o.osmtype = str(o.__class__.__name__).lower()[0]
-        o._parse_tags(elem)
-        o._parse_bounds(elem)
-        return o
+        Args:
+            elem: XML element representing an OSM object
+        """
+        is_way = isinstance(self, Way)
+        is_relation = isinstance(self, Relation)
+        has_bounds = False
+        for child in elem:
+            tag = child.tag
+            if tag == "tag":
+                attrib = child.attrib
+                self.tags[attrib["k"]] = attrib["v"]
+            elif tag == "nd" and is_way:
+                self._add_nd(child.attrib)
+            elif tag == "member" and is_relation:
+                self.members.append(OSMObject.from_xml(child))
+            elif tag == "bounds" and not has_bounds:
+                self._parse_bounds(elem)
+                has_bounds = True
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -207,10 +480,11 @@ class OSMObject:
         Returns:
             Dict[str, Any]: Dictionary representation
         """
+        tags = self._tags
         return {
             "type": self.__class__.__name__,
-            "id": self.attribs.get("id"),
-            "tags": self.tags,
+            "id": self._get_attrib("id"),
+            "tags": dict(tags) if type(tags) is FrozenTags else tags,
             "bounds": self.bounds,
         }
 
@@ -228,15 +502,26 @@ class OSMObject:
         """
         Create object from XML file.
 
+        The file is read with the configured XML parser backend, see
+        `osmdiff.backends`.
+
         Args:
             filename: Path to XML file
 
         Returns:
-            OSMObject: Parsed object
+            OSMObject: The first OSM object in the file
+
+        Raises:
+            ValueError: If the file contains no OSM object
         """
-        with open(filename, "r") as f:
-            tree = ElementTree.parse(f)
-            return cls.from_xml(tree.getroot())
+        from osmdiff.backends import get_backend
+        from osmdiff.stream import iter_chunks
+
+        with open(filename, "rb") as f:
+            for event in get_backend()().parse(iter_chunks(f)):
+                if event[0] == "object":
+                    return event[1]
+        raise ValueError(f"No OSM object found in {filename}")
 
 
 class Node(OSMObject):
@@ -246,34 +531,118 @@ class Node(OSMObject):
     Coordinates must be valid (-180<=lon<=180, -90<=lat<=90).
     """
 
+    __slots__ = ("_lat", "_lon", "_checked")
+
+    _ATTRIBS = dict(
+        OSMObject._ATTRIBS,
+        lat=("_lat", float, _format_coord),
+        lon=("_lon", float, _format_coord),
+    )
+
+    osmtype = "n"
+
     def __init__(
         self,
         tags: Dict[str, str] = {},
         attribs: Dict[str, str] = {},
         bounds: List[float] = [],
     ) -> None:
+        self._lat = None
+        self._lon = None
+        # True once the typed coordinates are validated, or the (lon, lat)
+        # attribute values they were parsed from when attribs is set
+        self._checked = False
         super().__init__(tags, attribs, bounds)
 
+    def _load_attribs(self, attrib) -> None:
+        """
+        Store XML attributes in the typed slots.
+
+        Coordinates are stored as floats. Unless they are written like OSM
+        does, with 7 decimals, their original strings are kept for `attribs`.
+
+        Args:
+            attrib: Element attributes
+        """
+        OSMObject._load_attribs(self, attrib)
+        lat, lon = self._lat, self._lon
+        if (lat is not None and f"{lat:.7f}" != attrib["lat"]) or (
+            lon is not None and f"{lon:.7f}" != attrib["lon"]
+        ):
+            extra = self._extra
+            if extra is None:
+                extra = self._extra = {}
+            for key in ("lat", "lon"):
+                if key in attrib:
+                    extra[key] = attrib[key]
+
+    def _set_typed(self, key: str, value) -> None:
+        self._checked = False
+        super()._set_typed(key, value)
+
     def _validate_coords(self) -> None:
         """Validate node coordinates."""
-        lon = float(self.attribs.get("lon", 0))
-        lat = float(self.attribs.get("lat", 0))
+        self._lonlat()
+
+    def _lonlat(self) -> Tuple[float, float]:
+        """
+        Get validated coordinates.
+
+        Coordinates are converted to float and validated once. When the
+        node has an `attribs` dictionary, they are converted again only if
+        its lon or lat values have been replaced.
+
+        Returns:
+            Tuple[float, float]: Longitude and latitude
+
+        Raises:
+            ValueError: If a coordinate is out of range
+        """
+        attribs = self._attribs
+        if attribs is None:
+            if self._checked:
+                return self._lon or 0.0, self._lat or 0.0
+            lon = self._lon or 0.0
+            lat = self._lat or 0.0
+            source = True
+        else:
+            source = (attribs.get("lon", 0), attribs.get("lat", 0))
+            checked = self._checked
+            if (
+                type(checked) is tuple
+                and checked[0] is source[0]
+                and checked[1] is source[1]
+            ):
+                return self._lon, self._lat
+            lon = float(source[0])
+            lat = float(source[1])
         if not -90 <= lat <= 90:
             raise ValueError(f"Invalid latitude: {lat}")
         if not -180 <= lon <= 180:
             raise ValueError(f"Invalid longitude: {lon}")
+        if attribs is not None:
+            self._lon = lon
+            self._lat = lat
+        self._checked = source
+        return lon, lat
 
     @property
     def lon(self) -> float:
         """Get longitude value."""
-        self._validate_coords()
-        return float(self.attribs.get("lon", 0))
+        return self._lonlat()[0]
+
+    @lon.setter
+    def lon(self, value: float) -> None:
+        self._set_typed("lon", value)
 
     @property
     def lat(self) -> float:
         """Get latitude value."""
-        self._validate_coords()
-        return float(self.attribs.get("lat", 0))
+        return self._lonlat()[1]
+
+    @lat.setter
+    def lat(self, value: float) -> None:
+        self._set_typed("lat", value)
 
     def _geo_interface(self) -> dict:
         """
@@ -282,7 +651,7 @@ class Node(OSMObject):
         Returns:
             dict: GeoJSON Point geometry
         """
-        return {"type": "Point", "coordinates": [self.lon, self.lat]}
+        return {"type": "Point", "coordinates": list(self._lonlat())}
 
     __geo_interface__ = property(_geo_interface)
 
@@ -298,7 +667,7 @@ class Node(OSMObject):
         """
         if not isinstance(other, Node):
             return False
-        return self.lon == other.lon and self.lat == other.lat
+        return self._lonlat() == other._lonlat()
 
 
 class Way(OSMObject):
@@ -307,8 +676,17 @@ class Way(OSMObject):
     Implements __geo_interface__ for GeoJSON compatibility as either:
     - LineString for open ways
     - Polygon for closed ways
+
+    Node references parsed from XML are stored compactly, refs in an
+    ``array('q')`` and, when the diff includes them, coordinates in an
+    ``array('d')``. Node objects are only created when `nodes` is accessed;
+    from then on the list is authoritative and can be modified freely.
     """
 
+    __slots__ = ("_nodes", "_refs", "_coords")
+
+    osmtype = "w"
+
     def __init__(
         self,
         tags: Dict[str, str] = {},
@@ -317,11 +695,79 @@ class Way(OSMObject):
         nodes: List[Node] = [],
     ) -> None:
         """Initialize a Way object."""
-        self.tags = tags or {}
-        self.attribs = attribs or {}
-        self.nodes = nodes or []
+        self._nodes = nodes or None
+        self._refs = None
+        self._coords = None  # lon, lat pairs, NaN where a node has none
         super().__init__(tags, attribs, bounds)
 
+    @property
+    def nodes(self) -> List[Node]:
+        """Nodes of the way, created from the stored refs on first access."""
+        if self._nodes is None:
+            self._nodes = self._materialize_nodes()
+            self._refs = None
+            self._coords = None
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, value: List[Node]) -> None:
+        self._nodes = value
+        self._refs = None
+        self._coords = None
+
+    def _add_nd(self, attrib) -> None:
+        """
+        Add a node reference from the attributes of an nd element.
+
+        Args:
+            attrib: nd element attributes (ref, optionally lat and lon)
+        """
+        if self._nodes is None:
+            try:
+                ref = int(attrib["ref"])
+                lat = attrib.get("lat")
+                lon = attrib.get("lon")
+                if lat is not None and lon is not None:
+                    lon, lat = float(lon), float(lat)
+            except (KeyError, TypeError, ValueError):
+                # Not representable in the arrays, keep a Node instead
+                self.nodes.append(OSMObject._from_attrib("nd", attrib))
+                return
+            refs = self._refs
+            if refs is None:
+                refs = self._refs = array("q")
+            coords = self._coords
+            if coords is None and type(lat) is float:
+                coords = self._coords = array("d", [math.nan]) * (2 * len(refs))
+            refs.append(ref)
+            if coords is not None:
+                if type(lat) is float:
+                    coords.append(lon)
+                    coords.append(lat)
+                else:
+                    coords.append(math.nan)
+                    coords.append(math.nan)
+        else:
+            self._nodes.append(OSMObject._from_attrib("nd", attrib))
+
+    def _materialize_nodes(self) -> List[Node]:
+        nodes = []
+        coords = self._coords
+        for i, ref in enumerate(self._refs or ()):
+            attribs = {"ref": str(ref)}
+            if coords is not None and not math.isnan(coords[2 * i]):
+                attribs["lat"] = _format_coord(coords[2 * i + 1])
+                attribs["lon"] = _format_coord(coords[2 * i])
+            node = Node()
+            node._load_attribs(attribs)
+            nodes.append(node)
+        return nodes
+
+    def _node_count(self) -> int:
+        if self._nodes is not None:
+            return len(self._nodes)
+        return len(self._refs) if self._refs is not None else 0
+
     def is_closed(self) -> bool:
         """
         Check if the way forms a closed loop.
@@ -329,7 +775,20 @@ class Way(OSMObject):
         Returns:
             bool: True if first and last nodes are identical
         """
-        return bool(self.nodes and self.nodes[0] == self.nodes[-1])
+        refs = self._refs
+        if refs is not None:
+            return bool(refs) and refs[0] == refs[-1]
+        nodes = self.nodes
+        if not nodes:
+            return False
+        first, last = nodes[0], nodes[-1]
+        if isinstance(first, OSMObject) and isinstance(last, OSMObject):
+            # nd elements without lat/lon all sit at (0, 0), compare refs
+            first_ref = first._get_attrib("ref") or first._get_attrib("id")
+            last_ref = last._get_attrib("ref") or last._get_attrib("id")
+            if first_ref is not None and last_ref is not None:
+                return first_ref == last_ref
+        return first == last
 
     def length(self) -> None:
         """
@@ -349,7 +808,7 @@ class Way(OSMObject):
             elem: XML element containing nd elements
         """
         for node in elem.findall("nd"):
-            self.nodes.append(OSMObject.from_xml(node))
+            self._add_nd(node.attrib)
 
     def _geo_interface(self) -> dict:
         """
@@ -359,7 +818,7 @@ class Way(OSMObject):
             dict: GeoJSON LineString or Polygon geometry
         """
         geom_type = "Polygon" if self.is_closed() else "LineString"
-        coordinates = [[n.lon, n.lat] for n in self.nodes]
+        coordinates = self.coords()
 
         # For Polygon, we need to wrap coordinates in an extra list
         if geom_type == "Polygon":
@@ -367,6 +826,41 @@ class Way(OSMObject):
 
         return {"type": geom_type, "coordinates": coordinates}
 
+    def coords(self) -> List[List[float]]:
+        """
+        Get the coordinates of all nodes in one call.
+
+        Reads the stored coordinate array directly if the nodes have not been
+        materialized. Nodes without coordinates are reported as [0.0, 0.0],
+        like `Node.lon` and `Node.lat` do.
+
+        Returns:
+            List[List[float]]: [lon, lat] pairs in GeoJSON order
+
+        Raises:
+            ValueError: If a coordinate is out of range
+        """
+        if self._refs is None:
+            return [
+                list(n._lonlat()) if isinstance(n, Node) else [n.lon, n.lat]
+                for n in self.nodes
+            ]
+        coords = self._coords
+        if coords is None:
+            return [[0.0, 0.0] for _ in self._refs]
+        coordinates = []
+        for i in range(0, len(coords), 2):
+            lon = coords[i]
+            lat = coords[i + 1]
+            if math.isnan(lon):
+                lon = lat = 0.0
+            elif not -90 <= lat <= 90:
+                raise ValueError(f"Invalid latitude: {lat}")
+            elif not -180 <= lon <= 180:
+                raise ValueError(f"Invalid longitude: {lon}")
+            coordinates.append([lon, lat])
+        return coordinates
+
     __geo_interface__ = property(_geo_interface)
 
 
@@ -386,6 +880,10 @@ class Relation(OSMObject):
     ```
     """
 
+    __slots__ = ("members",)
+
+    osmtype = "r"
+
     def __init__(
         self,
         tags: Dict[str, str] = {},
@@ -428,6 +926,10 @@ class Member(OSMObject):
     Represents an OSM member (a feature within a relation).
     """
 
+    __slots__ = ("type", "ref", "role")
+
+    osmtype = "m"
+
     def __init__(self):
         """Initialize an empty member."""
         self.type = None
@@ -460,3 +962,9 @@ class Member(OSMObject):
         }
 
     __geo_interface__ = property(_geo_interface)
+
+
+OSMObject._LOADERS = OSMObject._build_loaders()
+
+# Classes used for each OSM element type; nd elements inside ways are nodes
+OSM_CLASSES = {"node": Node, "nd": Node, "way": Way, "relation": Relation}
@@ -0,0 +1,209 @@
+"""
+Interned strings and shared tag mappings.
+
+Tag keys such as ``highway`` or ``building`` and values such as ``yes``
+occur millions of times in large diffs. The parser backends run all tags
+through a `TagTable`, which returns a single string object for repeated
+keys and short values, so a diff keeps one copy of each of them.
+
+With ``PARSER_CONFIG["share_tags"]`` enabled, objects with identical tags
+also share a single `FrozenTags` mapping. `OSMObject.tags` then returns a
+`TagsView` of it, which copies the tags into a dictionary owned by the
+object the first time they are modified:
+
+```python
+from osmdiff.config import PARSER_CONFIG
+
+PARSER_CONFIG["share_tags"] = True
+osmchange = OSMChange.from_xml_file("buildings.osc")
+a, b = osmchange.create[:2]
+a.tags == b.tags  # Identity check for shared tags
+a.tags["note"] = "checked"  # a now has its own copy; b is unchanged
+```
+
+Views are mappings, not dictionaries: use ``dict(obj.tags)`` to get a plain
+dictionary, for instance for ``json.dumps``.
+"""
+
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional
+
+# Values up to this length are interned; longer ones, such as names and
+# descriptions, rarely repeat
+INTERN_MAX_LENGTH = 32
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError("FrozenTags is immutable, copy it with dict() to modify it")
+
+
+class FrozenTags(dict):
+    """Immutable, hashable tags, shared by objects with the same tags."""
+
+    __slots__ = ("_hash",)
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = __ior__ = _immutable
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, TagsView):
+            other = other._owner._tags
+            if self is other:
+                return True
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    def __reduce__(self):
+        return FrozenTags, (dict(self),)
+
+    def __repr__(self) -> str:
+        return f"FrozenTags({dict.__repr__(self)})"
+
+
+EMPTY = FrozenTags()
+
+
+class TagsView(MutableMapping):
+    """Tags of an object that may be shared with other objects.
+
+    Reads go to the tags of the object. The first modification replaces
+    shared `FrozenTags` with a dictionary owned by the object.
+
+    Args:
+        owner: The OSMObject
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner) -> None:
+        self._owner = owner
+
+    def _own(self) -> dict:
+        tags = self._owner._tags
+        if type(tags) is FrozenTags:
+            tags = self._owner._tags = dict(tags)
+        return tags
+
+    def __getitem__(self, key: str) -> str:
+        return self._owner._tags[key]
+
+    def get(self, key: str, default=None):
+        return self._owner._tags.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._owner._tags
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._owner._tags)
+
+    def __len__(self) -> int:
+        return len(self._owner._tags)
+
+    def keys(self):
+        return self._owner._tags.keys()
+
+    def values(self):
+        return self._owner._tags.values()
+
+    def items(self):
+        return self._owner._tags.items()
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._own()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._own()[key]
+
+    def clear(self) -> None:
+        self._owner._tags = {}
+
+    def copy(self) -> dict:
+        return dict(self._owner._tags)
+
+    def freeze(self) -> FrozenTags:
+        """Get the tags as hashable `FrozenTags`, without copying shared tags."""
+        tags = self._owner._tags
+        return tags if type(tags) is FrozenTags else FrozenTags(tags)
+
+    def __eq__(self, other) -> bool:
+        tags = self._owner._tags
+        if isinstance(other, TagsView):
+            other = other._owner._tags
+        if tags is other:
+            return True
+        return tags == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(dict(self._owner._tags))
+
+
+class TagTable:
+    """String table and tag mappings of a parser.
+
+    A table lives as long as the parser of a single document, so the strings
+    and tag sets it holds are released with the parsed diff.
+
+    Args:
+        share: Whether identical tag sets share one `FrozenTags`
+    """
+
+    __slots__ = ("strings", "share", "_sets")
+
+    def __init__(self, share: bool = False) -> None:
+        self.strings: Dict[str, str] = {}
+        self.share = share
+        self._sets: Dict[tuple, FrozenTags] = {}
+
+    def intern(self, value: str) -> str:
+        """Get the table's copy of a key or short value."""
+        if len(value) > INTERN_MAX_LENGTH:
+            return value
+        return self.strings.setdefault(value, value)
+
+    def add(self, tags: dict, key: str, value: str) -> None:
+        """Add a tag to the tags of an object being parsed."""
+        strings = self.strings
+        key = strings.setdefault(key, key)
+        if len(value) <= INTERN_MAX_LENGTH:
+            value = strings.setdefault(value, value)
+        tags[key] = value
+
+    def finish(self, tags: dict) -> Optional[dict]:
+        """Finish the tags of a parsed object.
+
+        Args:
+            tags: Tags of the object, with interned strings
+
+        Returns:
+            dict: The shared `FrozenTags` for these tags if sharing is
+                enabled, else the tags themselves
+        """
+        if not self.share:
+            return tags
+        if not tags:
+            return EMPTY
+        key = tuple(tags.items())
+        shared = self._sets.get(key)
+        if shared is None:
+            shared = self._sets[key] = FrozenTags(tags)
+        return shared
+
+    def rebuild(self, tags: dict) -> dict:
+        """Intern and finish the tags of an object parsed elsewhere."""
+        interned = {}
+        for key, value in tags.items():
+            self.add(interned, key, value)
+        return self.finish(interned)
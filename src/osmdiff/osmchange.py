@@ -1,12 +1,88 @@
-from gzip import GzipFile
+from datetime import datetime, timezone
 from posixpath import join as urljoin
 from typing import Optional
 from xml.etree import ElementTree
 
 import requests
 
+from osmdiff import aio, backfill, binary, columns
+from osmdiff.backends import ElementEvents, get_backend
+from osmdiff.cache import cache_key, get_cache, raw_chunks
+from osmdiff.checkpoint import CheckpointStore
 from osmdiff.config import API_CONFIG, DEFAULT_HEADERS
-from osmdiff.osm import OSMObject
+from osmdiff.continuous import ContinuousDiff
+from osmdiff.filters import Filter
+from osmdiff.schedule import PollScheduler
+from osmdiff.session import get_session
+from osmdiff.stream import decompress, iter_chunks
+
+ACTIONS = ("create", "modify", "delete")
+FREQUENCIES = ("minute", "hour", "day")
+
+
+def parse_state(content: bytes) -> dict:
+    """Parse the ``state.txt`` of a replication frequency.
+
+    State files are Java properties files with the sequence number and
+    timestamp of the newest diff:
+
+    ```
+    #Mon Jan 01 00:01:02 UTC 2024
+    sequenceNumber=5890000
+    timestamp=2024-01-01T00\\:01\\:00Z
+    ```
+
+    Lines are matched by prefix, no general properties parser is involved.
+
+    Args:
+        content: Content of the state file
+
+    Returns:
+        dict: ``sequence_number`` and ``timestamp`` (UTC datetime, None if
+            missing)
+
+    Raises:
+        ValueError: If the file has no valid sequence number or timestamp
+    """
+    sequence_number = timestamp = None
+    for line in content.splitlines():
+        if line.startswith(b"sequenceNumber="):
+            sequence_number = int(line[15:])
+        elif line.startswith(b"timestamp="):
+            value = line[10:].replace(b"\\", b"").strip().decode("ascii")
+            if not value.endswith("Z"):
+                raise ValueError(f"Invalid replication timestamp: {value}")
+            timestamp = datetime.fromisoformat(value[:-1]).replace(tzinfo=timezone.utc)
+    if sequence_number is None:
+        raise ValueError("No sequenceNumber in replication state")
+    return {"sequence_number": sequence_number, "timestamp": timestamp}
+
+
+class _ChangeAssembler:
+    """Pick the changes from parser backend events, one event at a time.
+
+    Events are pushed rather than pulled so the same code serves the blocking
+    and the asyncio retrieval.
+    """
+
+    def __init__(self) -> None:
+        self.action = None
+
+    def push(self, event: tuple) -> Optional[tuple]:
+        """Process an event.
+
+        Args:
+            event: Parser backend event
+
+        Returns:
+            tuple: (action, OSMObject) for objects inside an action, else None
+        """
+        if event[0] == "object":
+            if self.action is not None:
+                return self.action, event[1]
+        elif event[1] in ACTIONS:
+            self.action = event[1] if event[0] == "start" else None
+        return None
 
 
 class OSMChange(object):
@@ -18,6 +94,11 @@ class OSMChange(object):
         file: Path to local OSMChange XML file
         sequence_number: Sequence number of the diff
         timeout: Request timeout in seconds
+        session: ``requests.Session`` to make requests with, instead of the
+            shared session from `osmdiff.session`
+        cache: `osmdiff.cache.DiffCache` to serve retrieved diffs from,
+            instead of the default cache
+        filter: `osmdiff.filters.Filter` for the changes to parse
 
     Note:
         Follows the OSM replication protocol.
@@ -30,49 +111,82 @@ class OSMChange(object):
         file: Optional[str] = None,
         sequence_number: Optional[int] = None,
         timeout: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        cache=None,
+        filter: Optional[Filter] = None,
     ):
         # Initialize with defaults from config
-        self.base_url = url or API_CONFIG["osm"]["base_url"]
-        self.timeout = timeout or API_CONFIG["osm"]["timeout"]
+        self.base_url = url or API_CONFIG["replication"]["base_url"]
+        self.timeout = timeout or API_CONFIG["replication"]["timeout"]
+        self.session = session
+        self.cache = cache
+        self.filter = filter
 
         self.create = []
         self.modify = []
         self.delete = []
+        self._pending = None
 
         if file:
-            with open(file, "r") as fh:
-                xml = ElementTree.iterparse(fh, events=("start", "end"))
-                self._parse_xml(xml)
+            self._store(self._parse_file(file))
         else:
             self._frequency = frequency
             self._sequence_number = sequence_number
 
+    @property
+    def state_url(self) -> str:
+        """URL of the state file of the replication frequency."""
+        return urljoin(self.base_url, self._frequency, "state.txt")
+
     def get_state(self) -> bool:
         """
-        Retrieve the current state from the OSM API.
+        Set the sequence number to the newest diff of the frequency.
+
+        Reads the ``state.txt`` of the frequency on the replication server,
+        so that `retrieve` downloads that diff.
 
         Returns:
             bool: True if state was successfully retrieved, False otherwise
 
         Raises:
-            requests.RequestException: If the API request fails
+            requests.RequestException: If the request fails
         """
-        state_url = urljoin(self.base_url, "api/0.6/changesets/state")
-        response = requests.get(
-            state_url, timeout=self.timeout, headers=DEFAULT_HEADERS
+        response = (self.session or get_session()).get(
+            self.state_url, timeout=self.timeout, headers=DEFAULT_HEADERS
         )
         if response.status_code != 200:
             return False
 
-        # Parse XML response
-        root = ElementTree.fromstring(response.content)
-        state = root.find("state")
-        if state is not None:
-            seq = state.find("sequenceNumber")
-            if seq is not None and seq.text:
-                self._sequence_number = int(seq.text)
-                return True
-        return False
+        return self._read_state(response.content)
+
+    async def aget_state(self, session=None) -> bool:
+        """
+        Asynchronous version of `get_state`, see `osmdiff.aio`.
+
+        Args:
+            session: Optional ``aiohttp.ClientSession`` to make the request with
+
+        Returns:
+            bool: True if state was successfully retrieved, False otherwise
+        """
+        async with aio.open_session(session) as client:
+            async with client.get(
+                self.state_url,
+                timeout=aio.client_timeout(self.timeout),
+                headers=DEFAULT_HEADERS,
+            ) as response:
+                if response.status != 200:
+                    return False
+                content = await response.read()
+        return self._read_state(content)
+
+    def _read_state(self, content: bytes) -> bool:
+        try:
+            state = parse_state(content)
+        except ValueError:
+            return False
+        self._sequence_number = state["sequence_number"]
+        return True
 
     def _build_sequence_url(self) -> str:
         seqno = str(self._sequence_number).zfill(9)
@@ -85,29 +199,127 @@ class OSMChange(object):
         )
         return url
 
+    def _get_cache(self):
+        return self.cache or get_cache()
+
+    def _cache_key(self) -> str:
+        return cache_key(
+            urljoin(self.base_url, self._frequency), self._sequence_number
+        )
+
     def _parse_xml(self, xml) -> None:
-        for event, elem in xml:
-            if elem.tag in ("create", "modify", "delete"):
-                self._build_action(elem)
+        self._store(self._iter_xml(xml))
+
+    def _store(self, changes) -> None:
+        """Add (action, OSMObject) pairs to the create/modify/delete lists."""
+        for action, osm_obj in changes:
+            getattr(self, action).append(osm_obj)
 
-    def _build_action(self, elem: ElementTree.Element) -> None:
+    def _iter_xml(self, xml):
         """
-        Build OSM objects from XML elements and add them to the appropriate list.
+        Build OSM objects from ElementTree iterparse events.
 
         Args:
-            elem (ElementTree.Element): XML element containing OSM objects
+            xml: iterable of (event, element) pairs, as returned by iterparse
+
+        Yields:
+            tuple: (action, OSMObject)
         """
-        for thing in elem:
-            o = OSMObject.from_xml(thing)
-            getattr(self, elem.tag).append(o)  # Use getattr instead of __getattribute__
+        return self._iter_events(ElementEvents(self.filter).convert(xml))
 
-    def retrieve(self, clear_cache: bool = False, timeout: Optional[int] = None) -> int:
+    def _iter_events(self, events):
+        """
+        Pick the changes from parser backend events.
+
+        Each object is yielded as soon as its end tag has been parsed; the
+        parser backend does not keep it, so only the object being parsed is
+        held in memory.
+
+        Args:
+            events: parser backend events, see `osmdiff.backends`
+
+        Yields:
+            tuple: (action, OSMObject)
+        """
+        push = _ChangeAssembler().push
+        for event in events:
+            change = push(event)
+            if change is not None:
+                yield change
+
+    def _parse_chunks(self, chunks):
+        """Parse (possibly gzipped) OSMChange XML chunks into changes."""
+        backend = get_backend()(self.filter)
+        return self._iter_events(backend.parse(decompress(chunks)))
+
+    def _parse_response(self, r):
+        # Handle both gzipped and plain XML responses without buffering the
+        # body: the first chunk is sniffed for the gzip magic number and the
+        # rest is decompressed and parsed as it arrives.
+        r.raw.decode_content = True
+        return self._parse_chunks(iter_chunks(r.raw))
+
+    def _parse_file(self, path):
+        with open(path, "rb") as fh:
+            yield from self._parse_chunks(iter_chunks(fh))
+
+    def iter_changes(self, xml=None):
+        """
+        Iterate over the changes one object at a time.
+
+        Objects are not added to `create`, `modify` or `delete`, and parsed
+        elements are discarded as soon as they have been yielded, so even
+        daily diffs can be processed in bounded memory.
+
+        Parameters:
+            xml: iterable of (event, element) pairs from
+                ``ElementTree.iterparse(source, events=("start", "end"))``.
+                If omitted, the source opened by ``retrieve(stream=True)`` or
+                ``from_xml_file(path, stream=True)`` is consumed.
+
+        Yields:
+            tuple: (action, OSMObject) where action is "create", "modify" or
+                "delete"
+
+        Raises:
+            Exception: If no xml is given and there is nothing pending
+        """
+        if xml is not None:
+            yield from self._iter_xml(xml)
+            return
+
+        pending, self._pending = self._pending, None
+        if pending is None:
+            raise Exception(
+                "nothing to iterate, use retrieve(stream=True) "
+                "or from_xml_file(path, stream=True) first"
+            )
+        if isinstance(pending, str):
+            yield from self._parse_file(pending)
+            return
+        try:
+            yield from self._parse_response(pending)
+        finally:
+            pending.close()
+
+    def retrieve(
+        self,
+        clear_cache: bool = False,
+        timeout: Optional[int] = None,
+        stream: bool = False,
+    ) -> int:
         """
         Retrieve the OSM diff corresponding to the OSMChange sequence_number.
 
+        If a cache is set up (see `osmdiff.cache`), a cached diff is parsed
+        instead of being downloaded, and downloaded diffs are added to the
+        cache.
+
         Parameters:
             clear_cache (bool): clear the cache
             timeout (int): request timeout
+            stream (bool): only open the response; read the changes with
+                `iter_changes` instead of storing them. The cache is not used.
 
         Returns:
             int: HTTP status code
@@ -119,8 +331,15 @@ class OSMChange(object):
             raise Exception("invalid sequence number")
         if clear_cache:
             self.create, self.modify, self.delete = ([], [], [])
+        cache = None if stream else self._get_cache()
+        if cache is not None:
+            key = self._cache_key()
+            data = cache.get(key)
+            if data is not None:
+                self._store(self._parse_chunks([data]))
+                return 200
         try:
-            r = requests.get(
+            r = (self.session or get_session()).get(
                 self._build_sequence_url(),
                 stream=True,
                 timeout=timeout or self.timeout,
@@ -128,21 +347,126 @@ class OSMChange(object):
             )
             if r.status_code != 200:
                 return r.status_code
-            # Handle both gzipped and plain XML responses
-            content = r.content
-            if content.startswith(b"\x1f\x8b"):  # Gzip magic number
-                gzfile = GzipFile(fileobj=r.raw)
-                xml = ElementTree.iterparse(gzfile, events=("start", "end"))
+            if stream:
+                if self._pending is not None and not isinstance(self._pending, str):
+                    self._pending.close()
+                self._pending = r
+                return r.status_code
+            if cache is not None:
+                self._store(self._parse_chunks(cache.tee(key, raw_chunks(r))))
             else:
-                xml = ElementTree.iterparse(r.raw, events=("start", "end"))
-            self._parse_xml(xml)
+                self._store(self._parse_response(r))
             return r.status_code
         except ConnectionError:
             # FIXME catch this?
             return 0
 
+    async def aretrieve(
+        self, clear_cache: bool = False, timeout: Optional[int] = None, session=None
+    ) -> int:
+        """
+        Asynchronous version of `retrieve`, see `osmdiff.aio`.
+
+        The body is decompressed and parsed chunk by chunk as it is received.
+
+        Parameters:
+            clear_cache (bool): clear the cache
+            timeout (int): request timeout
+            session: optional ``aiohttp.ClientSession`` to make the request with
+
+        Returns:
+            int: HTTP status code, or 0 if the connection failed or timed out
+
+        Raises:
+            Exception: If an invalid sequence number is provided
+        """
+        if not self._sequence_number:
+            raise Exception("invalid sequence number")
+        if clear_cache:
+            self.create, self.modify, self.delete = ([], [], [])
+        cache = self._get_cache()
+        if cache is not None:
+            key = self._cache_key()
+            data = cache.get(key)
+            if data is not None:
+                self._store(self._parse_chunks([data]))
+                return 200
+        changes = []
+        body = [] if cache is not None else None
+        try:
+            async with aio.open_session(session) as client:
+                async with client.get(
+                    self._build_sequence_url(),
+                    timeout=aio.client_timeout(timeout or self.timeout),
+                    headers=DEFAULT_HEADERS,
+                ) as r:
+                    if r.status != 200:
+                        return r.status
+                    push = _ChangeAssembler().push
+                    async for events in aio.aparse(r, body=body, filter=self.filter):
+                        for event in events:
+                            change = push(event)
+                            if change is not None:
+                                changes.append(change)
+        except aio.RETRY_ERRORS:
+            return 0
+        self._store(changes)
+        if cache is not None:
+            cache.put(key, b"".join(body))
+        return r.status
+
     @classmethod
-    def from_xml(cls, xml: ElementTree.Element) -> "OSMChange":
+    def fetch_range(
+        cls,
+        start: int,
+        end: int,
+        workers: Optional[int] = None,
+        processes: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        Retrieve a range of replication diffs in parallel.
+
+        Diffs are downloaded concurrently, parsed in a process pool and
+        yielded in sequence order, see `osmdiff.backfill`.
+
+        Parameters:
+            start (int): first sequence number
+            end (int): last sequence number, inclusive
+            workers (int): number of concurrent downloads
+            processes (int): number of parser processes, 0 to parse in threads
+            **kwargs: passed to the constructor, e.g. ``url`` or ``frequency``
+
+        Yields:
+            OSMChange: each diff, in sequence order
+        """
+        return backfill.fetch_range(cls, start, end, workers, processes, **kwargs)
+
+    def _download_body(self) -> bytes:
+        """Download the (gzipped) diff for the current sequence number."""
+        cache = self._get_cache()
+        if cache is not None:
+            key = self._cache_key()
+            data = cache.get(key)
+            if data is not None:
+                return data
+        url = self._build_sequence_url()
+        with backfill.host_slot(url):
+            r = (self.session or get_session()).get(
+                url, timeout=self.timeout, headers=DEFAULT_HEADERS
+            )
+        r.raise_for_status()
+        if cache is not None:
+            cache.put(key, r.content)
+        return r.content
+
+    def _parse_body(self, body: bytes) -> None:
+        self._store(self._parse_chunks([body]))
+
+    @classmethod
+    def from_xml(
+        cls, xml: ElementTree.Element, filter: Optional[Filter] = None
+    ) -> "OSMChange":
         """
         Initialize OSMChange object from an XML object.
 
@@ -152,28 +476,87 @@ class OSMChange(object):
 
         Parameters:
             xml (ElementTree.Element): XML object
+            filter (Filter): only keep the changes matching this filter, see
+                `osmdiff.filters`
 
         Returns:
             OSMChange: OSMChange object
         """
-        new_osmchange_obj = cls()
+        new_osmchange_obj = cls(filter=filter)
         new_osmchange_obj._parse_xml(xml)
         return new_osmchange_obj
 
     @classmethod
-    def from_xml_file(cls, path) -> "OSMChange":
+    def from_xml_file(
+        cls, path, stream: bool = False, filter: Optional[Filter] = None
+    ) -> "OSMChange":
         """
         Initialize OSMChange object from an XML file.
 
         Parameters:
             path (str): path to the XML file
+            stream (bool): do not parse the file yet; read the changes with
+                `iter_changes` instead of storing them
+            filter (Filter): only keep the changes matching this filter, see
+                `osmdiff.filters`
 
         Returns:
             OSMChange: OSMChange object
         """
-        with open(path, "r") as fh:
-            xml = ElementTree.iterparse(fh, events=("start", "end"))
-            return cls.from_xml(xml)
+        if stream:
+            new_osmchange_obj = cls(filter=filter)
+            new_osmchange_obj._pending = str(path)
+            return new_osmchange_obj
+        new_osmchange_obj = cls(filter=filter)
+        new_osmchange_obj._store(new_osmchange_obj._parse_file(path))
+        return new_osmchange_obj
+
+    def dump(self, path) -> None:
+        """
+        Write the changes to a binary file, see `osmdiff.binary`.
+
+        Parameters:
+            path (str): path of the file to write
+
+        Raises:
+            TypeError: If an object cannot be serialized
+        """
+        meta = {
+            "sequence_number": getattr(self, "_sequence_number", None),
+            "frequency": getattr(self, "_frequency", None),
+        }
+        binary.dump(
+            path, binary.OSMCHANGE, (self.create, self.modify, self.delete), meta
+        )
+
+    @classmethod
+    def load(cls, path, lazy: bool = True) -> "OSMChange":
+        """
+        Initialize OSMChange object from a file written by `dump`.
+
+        No XML is parsed. The file is memory-mapped and, unless lazy is
+        False, objects are only decoded when they are accessed.
+
+        Parameters:
+            path (str): path to the binary file
+            lazy (bool): keep the changes in `osmdiff.binary.LazyList`
+                sequences instead of decoding them all up front
+
+        Returns:
+            OSMChange: OSMChange object
+
+        Raises:
+            ValueError: If the file is not a binary OSMChange file
+        """
+        meta, sections = binary.load(path, binary.OSMCHANGE, lazy)
+        new_osmchange_obj = cls(
+            frequency=meta["frequency"] or "minute",
+            sequence_number=meta["sequence_number"],
+        )
+        new_osmchange_obj.create, new_osmchange_obj.modify, new_osmchange_obj.delete = (
+            sections
+        )
+        return new_osmchange_obj
 
     @property
     def sequence_number(self) -> int:
@@ -219,6 +602,37 @@ class OSMChange(object):
         """Get all actions combined in a single list."""
         return {"create": self.create, "modify": self.modify, "delete": self.delete}
 
+    def to_columns(self) -> dict:
+        """Export the changes as columns, one row per object.
+
+        See `osmdiff.columns` for the layout.
+
+        Returns:
+            dict: ``array.array`` and list columns by name
+        """
+        return columns.to_columns(
+            (action, obj) for action in ACTIONS for obj in getattr(self, action)
+        )
+
+    def to_arrays(self) -> dict:
+        """Export the changes as NumPy arrays, see `to_columns`.
+
+        Returns:
+            dict: NumPy arrays by column name
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        return columns.to_arrays(self.to_columns())
+
+    def to_arrow(self):
+        """Export the changes as a ``pyarrow.Table``, see `to_columns`.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        return columns.to_arrow(self.to_columns())
+
     def __repr__(self):
         return "OSMChange ({create} created, {modify} modified, \
 {delete} deleted)".format(
@@ -233,3 +647,137 @@ class OSMChange(object):
         self.create.clear()
         self.modify.clear()
         self.delete.clear()
+
+
+class ContinuousOSMChange(ContinuousDiff):
+    """Iterator for continuously fetching replication diffs with backoff.
+
+    Yields OSMChange objects as new diffs of a replication frequency are
+    published. The state is read from the ``state.txt`` of the frequency,
+    the same replication tree the diffs are downloaded from. See
+    `osmdiff.continuous.ContinuousDiff` for catching up, prefetching and
+    scheduling.
+
+    Args:
+        url: Base URL of the replication server, defaults to
+            ``API_CONFIG["replication"]["base_url"]``
+        frequency: Replication frequency ('minute', 'hour', or 'day')
+        timeout: Request timeout in seconds
+        min_interval: Minimum seconds between checks (default: 30)
+        max_interval: Maximum seconds between checks (default: 120)
+        session: ``requests.Session`` to make requests with, instead of the
+            shared session from `osmdiff.session`
+        async_session: ``aiohttp.ClientSession`` for asynchronous iteration
+            with ``async for``, see `osmdiff.aio`. If omitted, a session is
+            opened for each request.
+        filter: `osmdiff.filters.Filter` for the changes to parse
+        prefetch: Number of diffs to retrieve ahead of the consumer, 0 to
+            retrieve them one at a time
+        scheduler: `osmdiff.schedule.PollScheduler` to plan state checks
+            after the predicted publish time of the next diff, instead of
+            every ``min_interval`` seconds
+        checkpoint: `osmdiff.checkpoint.CheckpointStore` to resume from and
+            to record processed sequences in
+        consumer: Name of the consumer in the checkpoint store
+
+    Raises:
+        ValueError: If the frequency is not one of the valid options
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        frequency: str = "minute",
+        timeout: Optional[int] = None,
+        min_interval: int = 30,
+        max_interval: int = 120,
+        session: Optional[requests.Session] = None,
+        async_session=None,
+        filter: Optional[Filter] = None,
+        prefetch: int = 0,
+        scheduler: Optional[PollScheduler] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        consumer: str = "default",
+    ):
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Frequency must be one of: {', '.join(FREQUENCIES)}")
+        super().__init__(
+            timeout=timeout,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            session=session,
+            async_session=async_session,
+            filter=filter,
+            prefetch=prefetch,
+            scheduler=scheduler,
+            checkpoint=checkpoint,
+            consumer=consumer,
+        )
+        self.base_url = url or API_CONFIG["replication"]["base_url"]
+        self.frequency = frequency
+
+    @property
+    def state_url(self) -> str:
+        """URL of the state file of the replication frequency."""
+        return urljoin(self.base_url, self.frequency, "state.txt")
+
+    def get_state(self) -> dict:
+        """Get the sequence number and timestamp of the newest diff.
+
+        Returns:
+            dict: ``sequence_number`` and ``timestamp``, see `parse_state`
+
+        Raises:
+            requests.RequestException: If the request fails
+            ValueError: If the state file is invalid
+        """
+        response = (self.session or get_session()).get(
+            self.state_url,
+            timeout=self.timeout or API_CONFIG["replication"]["timeout"],
+            headers=DEFAULT_HEADERS,
+        )
+        response.raise_for_status()
+        return parse_state(response.content)
+
+    async def aget_state(self) -> dict:
+        """Asynchronous version of `get_state`, see `osmdiff.aio`.
+
+        Returns:
+            dict: ``sequence_number`` and ``timestamp``, see `parse_state`
+        """
+        async with aio.open_session(self.async_session) as client:
+            async with client.get(
+                self.state_url,
+                timeout=aio.client_timeout(
+                    self.timeout or API_CONFIG["replication"]["timeout"]
+                ),
+                headers=DEFAULT_HEADERS,
+            ) as response:
+                response.raise_for_status()
+                content = await response.read()
+        return parse_state(content)
+
+    def _new_diff(self, sequence_number: Optional[int] = None) -> OSMChange:
+        """Create the diff object for the current or the given sequence."""
+        if sequence_number is None:
+            sequence_number = self._current_sequence
+        return OSMChange(
+            url=self.base_url,
+            frequency=self.frequency,
+            sequence_number=sequence_number,
+            timeout=self.timeout,
+            session=self.session,
+            filter=self.filter,
+        )
+
+    def _get_state(self) -> dict:
+        return self.get_state()
+
+    async def _aget_state(self) -> dict:
+        return await self.aget_state()
+
+    def _retrieve_diff(self, diff: OSMChange) -> int:
+        return diff.retrieve()
+
+    async def _aretrieve_diff(self, diff: OSMChange) -> int:
+        return await diff.aretrieve(session=self.async_session)
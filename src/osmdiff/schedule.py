@@ -0,0 +1,179 @@
+"""
+Poll scheduling aligned to the publish cadence of replication diffs.
+
+Diffs are published at a steady pace, once a minute for augmented diffs and
+minutely OSMChange files. Polling the state every ``min_interval`` seconds
+either wastes requests or adds up to an interval of latency. A
+`PollScheduler` learns when new sequences appear and plans the next state
+check just after the next one is expected:
+
+```python
+from osmdiff import ContinuousAugmentedDiff
+from osmdiff.schedule import PollScheduler
+
+monitor = ContinuousAugmentedDiff(scheduler=PollScheduler())
+for changes in monitor:
+    ...
+```
+
+Every state check narrows down the publish time of a sequence: it appeared
+after the last check that still returned the previous sequence and before
+the first check that returned it. The scheduler predicts the publish time of
+the next sequence from the period, and checks ``margin`` seconds after it,
+give or take ``jitter`` seconds. When a check planned early by the jitter
+finds the new sequence, the prediction moves earlier. When a check comes
+too early, the scheduler retries after ``retry`` seconds, doubling the wait
+while nothing new is published, up to ``max_interval``, and the prediction
+moves between the last two checks. The period is measured from the state
+timestamps when the server provides them, else from the sequences whose
+publish time is known to within a few seconds.
+"""
+
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+# Sequences to observe before the period is measured
+MIN_PERIOD_STEPS = 8
+
+
+class PollScheduler:
+    """Plans state checks from the observed publish cadence.
+
+    Args:
+        period: Initial estimate of the seconds between sequences
+        margin: Seconds to wait after the predicted publish time
+        jitter: Maximum random shift of a planned check, in seconds
+        retry: Seconds before checking again when nothing new was published
+            or the check failed, doubled on every further miss
+        max_interval: Maximum seconds between checks
+        history: Number of recent sequences to measure the period from
+
+    Raises:
+        ValueError: If period or retry is not positive, or margin or jitter
+            is negative
+    """
+
+    def __init__(
+        self,
+        period: float = 60.0,
+        margin: float = 1.0,
+        jitter: float = 2.0,
+        retry: float = 2.0,
+        max_interval: float = 120.0,
+        history: int = 32,
+    ) -> None:
+        if period <= 0 or retry <= 0:
+            raise ValueError("period and retry must be positive")
+        if margin < 0 or jitter < 0:
+            raise ValueError("margin and jitter must not be negative")
+        self.period = float(period)
+        self.margin = margin
+        self.jitter = jitter
+        self.retry = retry
+        self.max_interval = max_interval
+        self.sequence_number = None
+        self._expected = None  # Predicted publish time of the next sequence
+        # (sequence number, timestamp or time found) to measure the period
+        self._samples = deque(maxlen=max(history, 2))
+        self._seen = None  # Last check that returned the current sequence
+        self._misses = 0
+        self._failures = 0
+        self._next = None
+        self._random = random.Random()
+
+    def observe(self, state: Optional[dict], now: Optional[float] = None) -> None:
+        """Record the result of a state check and plan the next one.
+
+        Args:
+            state: Result of ``get_state``, with ``sequence_number`` and
+                ``timestamp``, or None if the check failed
+            now: Time of the check in seconds since the epoch, defaults to
+                the current time
+        """
+        now = time.time() if now is None else now
+        if state is None:
+            self._failures += 1
+            self._next = now + self._retry_delay(self._failures, self.max_interval)
+            return
+        self._failures = 0
+        sequence_number = state["sequence_number"]
+
+        if self.sequence_number is None or sequence_number > self.sequence_number:
+            if self.sequence_number is not None:
+                self._published(sequence_number, state.get("timestamp"), now)
+            self.sequence_number = sequence_number
+            self._misses = 0
+        else:
+            self._misses += 1
+        self._seen = now
+
+        planned = self._plan()
+        if planned is None or planned <= now:
+            # Not published yet, or not known when: retry soon, with short
+            # waits until the publish time has been observed once
+            limit = self.max_interval if self._expected is not None else self.period / 4
+            planned = now + self._retry_delay(max(self._misses, 1), limit)
+        self._next = min(planned, now + self.max_interval)
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds until the next planned check, 0 if it is due."""
+        if self._next is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return max(0.0, self._next - now)
+
+    def predict(self) -> Optional[float]:
+        """Predict when the sequence after the current one is published.
+
+        Returns:
+            float: Seconds since the epoch, or None until a change of
+                sequence has been observed
+        """
+        return self._expected
+
+    def _published(self, sequence_number: int, timestamp, now: float) -> None:
+        """Update the prediction from a newly published sequence."""
+        after, before = self._seen, now
+        steps = sequence_number - self.sequence_number
+        tight = before - after <= self.period / 4
+        if self._expected is None:
+            published = (after + before) / 2 if tight else before
+        else:
+            predicted = self._expected + (steps - 1) * self.period
+            if self._misses:
+                # Published between the last two checks
+                published = (after + before) / 2
+            else:
+                # Found by the planned check. If the jitter made it early,
+                # the sequence was published earlier than predicted.
+                published = max(after, min(predicted, before - self.margin))
+
+        # The period is measured from the timestamps, or else from the
+        # checks that found each sequence: they come at most a few seconds
+        # after the publish time once the scheduler is in step
+        if isinstance(timestamp, datetime):
+            self._samples.append((sequence_number, timestamp.timestamp()))
+        else:
+            self._samples.append((sequence_number, before))
+        first, last = self._samples[0], self._samples[-1]
+        if last[0] - first[0] >= MIN_PERIOD_STEPS:
+            period = (last[1] - first[1]) / (last[0] - first[0])
+            if period > 0:
+                self.period = period
+        self._expected = published + self.period
+
+    def _plan(self) -> Optional[float]:
+        """Time of the next check, just after the predicted publish time."""
+        if self._expected is None:
+            return None
+        return (
+            self._expected
+            + self.margin
+            + self._random.uniform(-self.jitter, self.jitter)
+        )
+
+    def _retry_delay(self, attempt: int, limit: float) -> float:
+        return min(self.retry * 2 ** (attempt - 1), limit)
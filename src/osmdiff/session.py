@@ -0,0 +1,77 @@
+"""
+Shared HTTP session for blocking requests.
+
+`AugmentedDiff`, `OSMChange` and `ContinuousAugmentedDiff` make their
+requests through a `requests.Session`, so connections to the Overpass and
+OSM servers are kept alive and reused between diffs and state polls instead
+of being set up for every request.
+
+By default a single session, configured from ``SESSION_CONFIG``, is shared
+by the whole process. A session of your own can be passed to the
+constructors with ``session=``, or installed process-wide with `set_session`:
+
+```python
+import requests
+from osmdiff import AugmentedDiff
+
+session = requests.Session()
+session.proxies = {"https": "http://proxy.example.com:3128"}
+adiff = AugmentedDiff(sequence_number=6509700, session=session)
+```
+"""
+
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from osmdiff.config import DEFAULT_HEADERS, SESSION_CONFIG
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_session(**options) -> requests.Session:
+    """Create a session configured for osmdiff.
+
+    Args:
+        **options: Overrides for ``SESSION_CONFIG``
+
+    Returns:
+        requests.Session: Session with the default headers, compression
+            negotiation and connection pools sized as configured
+    """
+    config = dict(SESSION_CONFIG, **options)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.headers["Accept-Encoding"] = config["accept_encoding"]
+    adapter = HTTPAdapter(
+        pool_connections=config["pool_connections"],
+        pool_maxsize=config["pool_maxsize"],
+        pool_block=config["pool_block"],
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get the session shared by the process, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def set_session(session: Optional[requests.Session]) -> None:
+    """Replace the shared session.
+
+    Args:
+        session: The new shared session, or None to create a fresh one from
+            ``SESSION_CONFIG`` on next use
+    """
+    global _session
+    with _session_lock:
+        _session = session
@@ -0,0 +1,245 @@
+"""
+Spatial index over the contents of a diff.
+
+To route the changes of a diff to regional consumers, build a `SpatialIndex`
+once and query it with the regions, instead of testing every change against
+every region:
+
+```python
+from osmdiff import OSMChange
+from osmdiff.spatial import SpatialIndex
+
+osmchange = OSMChange(sequence_number=6000000)
+osmchange.retrieve()
+index = SpatialIndex.from_diff(osmchange)
+for region, changes in zip(regions, index.query_regions([r.bbox for r in regions])):
+    region.send(changes)
+```
+
+The index is a static R-tree packed with the Sort-Tile-Recursive (STR)
+algorithm, in pure Python. Each change is indexed by its envelope: the
+bounds of the object if it has them, or else the extent of its coordinates
+(node location, way node and member coordinates). For augmented diffs the
+old and new versions are indexed separately, so a node moved from one region
+to another matches both, but not the regions in between. Changes without
+coordinates, such as ways in OSMChange files, are not indexed and never match
+a query.
+
+Bounding boxes are ``(minlon, minlat, maxlon, maxlat)`` tuples; boxes
+crossing the antimeridian have to be split in two.
+"""
+
+import math
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from osmdiff.augmenteddiff import AugmentedDiff
+from osmdiff.filters import _points
+from osmdiff.osm import Node, OSMObject
+
+NODE_SIZE = 16
+
+Envelope = Tuple[float, float, float, float]
+
+
+def envelope(obj: Optional[OSMObject]) -> Optional[Envelope]:
+    """Get the bounding box of an object.
+
+    Args:
+        obj: Node, Way or Relation
+
+    Returns:
+        tuple: ``(minlon, minlat, maxlon, maxlat)``, or None if the object has
+            no coordinates
+    """
+    if obj is None:
+        return None
+    if type(obj) is Node and not obj.bounds:
+        lon, lat = obj._get_typed("lon"), obj._get_typed("lat")
+        if lon is None or lat is None:
+            return None
+        return lon, lat, lon, lat
+    if obj.bounds:
+        try:
+            minlon, minlat, maxlon, maxlat = (float(c) for c in obj.bounds)
+            return minlon, minlat, maxlon, maxlat
+        except (TypeError, ValueError):
+            pass
+    lons, lats = [], []
+    for lon, lat in _points(obj):
+        if lon is None or lat is None:
+            continue
+        try:
+            lon, lat = float(lon), float(lat)
+        except ValueError:
+            continue
+        lons.append(lon)
+        lats.append(lat)
+    if not lons:
+        return None
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def diff_entries(diff) -> List[Tuple[tuple, Any]]:
+    """List the changes of a diff with their envelopes.
+
+    Args:
+        diff: AugmentedDiff or OSMChange with parsed changes
+
+    Returns:
+        list: ``(item, envelope)`` pairs as taken by `SpatialIndex`, where
+            items are ``(action, old, new)`` tuples for augmented diffs, with
+            the envelopes of both versions, and ``(action, object)`` pairs
+            for OSMChange
+    """
+    if isinstance(diff, AugmentedDiff):
+        entries = [(("create", None, obj), envelope(obj)) for obj in diff.create]
+        for action in ("modify", "delete"):
+            for change in getattr(diff, action):
+                old, new = change["old"], change["new"]
+                entries.append(((action, old, new), [envelope(old), envelope(new)]))
+        return entries
+    return [
+        ((action, obj), envelope(obj))
+        for action, objects in diff.actions.items()
+        for obj in objects
+    ]
+
+
+def _pack(entries: list, node_size: int) -> list:
+    """Group entries into nodes with Sort-Tile-Recursive packing.
+
+    Entries and nodes are lists starting with their minlon, minlat, maxlon
+    and maxlat. Nodes hold their children as fifth element.
+    """
+    if not entries:
+        return []
+    count = math.ceil(len(entries) / node_size)
+    slices = math.ceil(math.sqrt(count))
+    per_slice = slices * node_size
+    entries = sorted(entries, key=lambda e: e[0] + e[2])
+    nodes = []
+    for i in range(0, len(entries), per_slice):
+        tile = sorted(entries[i : i + per_slice], key=lambda e: e[1] + e[3])
+        for j in range(0, len(tile), node_size):
+            children = tile[j : j + node_size]
+            nodes.append(
+                [
+                    min(c[0] for c in children),
+                    min(c[1] for c in children),
+                    max(c[2] for c in children),
+                    max(c[3] for c in children),
+                    children,
+                ]
+            )
+    return nodes
+
+
+class SpatialIndex:
+    """Static R-tree of items and their envelopes.
+
+    Args:
+        entries: ``(item, envelope)`` pairs. The envelope can also be a list
+            of envelopes, for items made of several parts. Entries without
+            envelope are left out.
+        node_size: Maximum number of children of a tree node
+
+    Raises:
+        ValueError: If node_size is smaller than 2
+    """
+
+    def __init__(
+        self, entries: Iterable[Tuple[Any, Any]], node_size: int = NODE_SIZE
+    ) -> None:
+        if node_size < 2:
+            raise ValueError("node_size must be at least 2")
+        self.items = []
+        leaves = []
+        for item, envelopes in entries:
+            if envelopes is None or isinstance(envelopes, tuple):
+                envelopes = [envelopes]
+            position = len(self.items)
+            for env in envelopes:
+                if env is not None:
+                    leaves.append([*env, position])
+            if leaves and leaves[-1][4] == position:
+                self.items.append(item)
+        self.node_size = node_size
+        self.height = 0
+        level = leaves
+        while len(level) > 1 or self.height == 0:
+            level = _pack(level, node_size)
+            self.height += 1
+        self._root = level[0] if level else None
+
+    @classmethod
+    def from_diff(cls, diff, node_size: int = NODE_SIZE) -> "SpatialIndex":
+        """Index the changes of an AugmentedDiff or OSMChange.
+
+        Items are ``(action, old, new)`` tuples for augmented diffs, like
+        `AugmentedDiff.iter_actions`, and ``(action, object)`` pairs for
+        OSMChange.
+
+        Args:
+            diff: AugmentedDiff or OSMChange with parsed changes
+            node_size: Maximum number of children of a tree node
+
+        Returns:
+            SpatialIndex: The index
+        """
+        return cls(diff_entries(diff), node_size)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def query_bbox(self, bbox: Sequence[float]) -> list:
+        """Find the items whose envelope intersects a bounding box.
+
+        Args:
+            bbox: ``(minlon, minlat, maxlon, maxlat)``
+
+        Returns:
+            list: Matching items, in the order they were indexed
+        """
+        return self.query_regions([bbox])[0]
+
+    def query_regions(self, bboxes: Sequence[Sequence[float]]) -> List[list]:
+        """Find the items intersecting each of several bounding boxes.
+
+        The tree is traversed once for all regions: a subtree is only visited
+        with the regions it intersects, so regions close to each other share
+        the work.
+
+        Args:
+            bboxes: ``(minlon, minlat, maxlon, maxlat)`` of each region
+
+        Returns:
+            list: For each region, the matching items in the order they were
+                indexed
+        """
+        regions = [tuple(float(c) for c in bbox) for bbox in bboxes]
+        found = [[] for _ in regions]
+        root = self._root
+        if root is None:
+            return found
+        stack = [(root, range(len(regions)), self.height)]
+        while stack:
+            node, candidates, height = stack.pop()
+            for child in node[4]:
+                cminx, cminy, cmaxx, cmaxy = child[0], child[1], child[2], child[3]
+                hits = [
+                    r
+                    for r in candidates
+                    if regions[r][0] <= cmaxx
+                    and regions[r][2] >= cminx
+                    and regions[r][1] <= cmaxy
+                    and regions[r][3] >= cminy
+                ]
+                if not hits:
+                    continue
+                if height > 1:
+                    stack.append((child, hits, height - 1))
+                else:
+                    for r in hits:
+                        found[r].append(child[4])
+        items = self.items
+        return [[items[i] for i in sorted(set(positions))] for positions in found]
@@ -0,0 +1,130 @@
+"""
+Helpers for reading diffs incrementally from files and HTTP responses.
+
+Diffs are read in fixed-size chunks, gzip-compressed bodies are detected
+from their first bytes and decompressed on the fly, and the resulting XML
+is fed to a parser backend (see `osmdiff.backends`) chunk by chunk. At no
+point is the whole body held in memory.
+
+Example:
+    ```python
+    from osmdiff.backends import get_backend
+    from osmdiff.stream import decompress, iter_chunks
+
+    with open("612.osc.gz", "rb") as fh:
+        for event in get_backend()().parse(decompress(iter_chunks(fh))):
+            ...
+    ```
+"""
+
+import zlib
+from typing import Iterable, Iterator
+
+CHUNK_SIZE = 64 * 1024  # Bytes read from the source per chunk
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def iter_chunks(raw, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a file-like object in chunks until it is exhausted.
+
+    Args:
+        raw: File-like object, such as ``requests.Response.raw``. Text
+            streams are encoded as UTF-8.
+        chunk_size: Number of bytes to read at a time
+
+    Yields:
+        bytes: Chunks of the underlying stream
+    """
+    while True:
+        chunk = raw.read(chunk_size)
+        if not chunk:
+            return
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        yield chunk
+
+
+class Inflater:
+    """Incremental gzip detection and decompression.
+
+    The first bytes are inspected for the gzip magic number. Compressed
+    streams are inflated with zlib, uncompressed streams are passed through
+    unchanged. Concatenated gzip members are supported. Used by `decompress`
+    and by the async API, which receives its chunks from an event loop.
+    """
+
+    def __init__(self) -> None:
+        self._head = b""
+        self._gzip = None  # Unknown until enough bytes have been seen
+        self._inflater = None
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Decompress a chunk.
+
+        Args:
+            data: Raw bytes
+
+        Yields:
+            bytes: Decompressed chunks
+        """
+        if self._gzip is None:
+            # Peek until there are enough bytes to recognize the magic number
+            self._head += data
+            if len(self._head) < len(GZIP_MAGIC):
+                return
+            data, self._head = self._head, b""
+            self._gzip = data.startswith(GZIP_MAGIC)
+            if self._gzip:
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if not self._gzip:
+            yield data
+            return
+
+        pending = data
+        while pending:
+            inflater = self._inflater
+            # Cap the output so a small compressed chunk does not expand into
+            # the whole document at once
+            out = inflater.decompress(pending, CHUNK_SIZE)
+            if out:
+                yield out
+            if inflater.unconsumed_tail:
+                pending = inflater.unconsumed_tail
+            elif inflater.eof:
+                # Another gzip member may follow the one just finished
+                pending = inflater.unused_data
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                pending = b""
+
+    def flush(self) -> Iterator[bytes]:
+        """Signal the end of the stream.
+
+        Yields:
+            bytes: Remaining decompressed data
+        """
+        if self._gzip is None:
+            if self._head:
+                yield self._head
+                self._head = b""
+        elif self._gzip:
+            out = self._inflater.flush()
+            if out:
+                yield out
+
+
+def decompress(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Transparently gunzip a stream of chunks.
+
+    See `Inflater`.
+
+    Args:
+        chunks: Iterable of raw byte chunks
+
+    Yields:
+        bytes: Decompressed chunks
+    """
+    inflater = Inflater()
+    for chunk in chunks:
+        yield from inflater.feed(chunk)
+    yield from inflater.flush()
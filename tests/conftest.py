@@ -22,7 +22,7 @@ def mock_osm_api_response():
 
 @pytest.fixture
 def mock_osm_api(monkeypatch):
-    """Mock requests.get for OSM API calls"""
+    """Mock requests.Session.get for OSM API calls"""
     mock = Mock()
     mock.get.return_value.status_code = 200
     mock.get.return_value.json.return_value = {
@@ -30,7 +30,7 @@ def mock_osm_api(monkeypatch):
         "generator": "OpenStreetMap server",
         "elements": []
     }
-    monkeypatch.setattr("requests.get", mock.get)
+    monkeypatch.setattr("requests.Session.get", mock.get)
     return mock
 
 @pytest.fixture
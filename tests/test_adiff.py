@@ -27,7 +27,7 @@ class TestAugmentedDiff:
         augmented_diff.sequence_number = "12345"
         assert augmented_diff.sequence_number == 12345
 
-    @patch("osmdiff.augmenteddiff.requests.get")
+    @patch("requests.Session.get")
     def test_read_changeset_from_xml_file(
         self, mock_get, adiff_file_path, mock_adiff_response
     ):
@@ -96,7 +96,7 @@ class TestAugmentedDiff:
 </osm>"""
 
         # Mock the requests.get call
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
 
             def get_mock_response():
                 mock_response = Mock()
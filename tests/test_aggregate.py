@@ -0,0 +1,167 @@
+import io
+import json
+import os
+
+import pytest
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff.aggregate import ChangesetAggregator, tag_changes
+from osmdiff.osm import OSMObject
+from osmdiff.osm.tags import FrozenTags
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "test_osmchange.xml")
+
+META = 'user="alice" uid="1" timestamp="2024-01-01T00:{minute:02d}:00Z"'
+
+ADIFF = """<osm version="0.6" generator="Overpass API">
+  <action type="create">
+    <node id="1" lat="1.0" lon="2.0" version="1" changeset="10" {m0}>
+      <tag k="shop" v="bakery"/><tag k="name" v="Bread"/>
+    </node>
+  </action>
+  <action type="modify">
+    <old><node id="5" lat="3.0" lon="4.0" version="1" changeset="9" {m0}>
+      <tag k="shop" v="deli"/><tag k="fixme" v="yes"/></node></old>
+    <new><node id="5" lat="3.5" lon="5.0" version="2" changeset="10" {m1}>
+      <tag k="shop" v="cafe"/><tag k="name" v="Beans"/></node></new>
+  </action>
+  <action type="modify">
+    <old><way id="7" version="3" changeset="4"><bounds minlat="0" minlon="0" maxlat="9" maxlon="9"/></way></old>
+    <new><way id="7" version="3" changeset="4"><bounds minlat="0" minlon="0" maxlat="9" maxlon="9"/></way></new>
+  </action>
+  <action type="delete">
+    <old><relation id="3" version="4" changeset="8" {m0}>
+      <bounds minlat="10" minlon="10" maxlat="20" maxlon="20"/><tag k="type" v="route"/></relation></old>
+    <new><relation id="3" version="5" visible="false" changeset="11" user="bob" uid="2" timestamp="2024-01-01T00:{minute2:02d}:00Z"/></new>
+  </action>
+</osm>"""
+
+
+def adiff_xml(minute=0):
+    return ADIFF.format(
+        m0=META.format(minute=minute),
+        m1=META.format(minute=minute + 1),
+        minute2=minute + 2,
+    ).encode()
+
+
+def augmented_diff(sequence_number, minute=0):
+    adiff = AugmentedDiff(sequence_number=sequence_number)
+    adiff._parse_stream(io.BytesIO(adiff_xml(minute)))
+    return adiff
+
+
+def test_tag_changes():
+    assert tag_changes({"a": "1", "b": "2"}, {"a": "3", "c": "4"}) == (1, 1, 1)
+    assert tag_changes({}, {"a": "1"}) == (1, 0, 0)
+    tags = FrozenTags({"a": "1"})
+    assert tag_changes(tags, tags) == (0, 0, 0)
+
+
+def test_changeset_summaries():
+    aggregator = ChangesetAggregator()
+    assert aggregator.add(augmented_diff(100)) == []
+    assert sorted(aggregator.changesets) == [10, 11]  # Way 7 did not change
+    summary = aggregator.changesets[10]
+    assert (summary.uid, summary.user) == (1, "alice")
+    assert summary.count("create", "node") == 1
+    assert summary.count("modify") == 1
+    assert summary.changes == 2
+    assert (summary.tags_added, summary.tags_removed, summary.tags_modified) == (
+        3,
+        1,
+        1,
+    )
+    assert summary.bbox == [2.0, 1.0, 5.0, 3.5]
+    assert summary.first_timestamp == 1704067200
+    assert summary.last_timestamp == 1704067260
+    assert summary.first_sequence == summary.last_sequence == 100
+
+    deleted = aggregator.changesets[11]
+    assert deleted.count("delete", "relation") == 1
+    assert deleted.tags_removed == 1
+    assert deleted.bbox == [10.0, 10.0, 20.0, 20.0]  # From the old version
+
+    aggregator.add(augmented_diff(101, minute=10))
+    assert summary.changes == 4
+    assert summary.count("create") == 2
+    assert summary.bbox == [2.0, 1.0, 5.0, 3.5]
+    assert summary.last_sequence == 101
+    assert aggregator.users[1].changesets == 1
+    assert aggregator.users[1].changes == 4
+    assert aggregator.users[2].count("delete") == 2
+    assert aggregator.sequence_number == 101
+
+
+def test_window_eviction():
+    aggregator = ChangesetAggregator(window=600)
+    aggregator.add(augmented_diff(100))
+    evicted = aggregator.add(augmented_diff(101, minute=30))
+    assert evicted == []  # Both changesets had changes in diff 101
+    xml = adiff_xml(minute=45).replace(b'changeset="11"', b'changeset="12"')
+    aggregator.add_changes(AugmentedDiff().iter_actions(io.BytesIO(xml)), 102)
+    # Changeset 11 last changed at 00:32, more than 600 s before 00:47
+    assert sorted(aggregator.changesets) == [10, 12]
+    evicted = aggregator.evict(before=1704067200 + 3600)
+    assert sorted(s.id for s in evicted) == [10, 12]
+    assert not aggregator.changesets and not aggregator.users
+
+
+def node_change(changeset, minute=None, uid="1"):
+    attrib = {"id": "1", "version": "1", "changeset": str(changeset), "uid": uid}
+    if minute is not None:
+        attrib["timestamp"] = f"2024-01-01T00:{minute:02d}:00Z"
+    return "create", None, OSMObject._from_attrib("node", attrib)
+
+
+def test_evict_out_of_order_timestamps():
+    aggregator = ChangesetAggregator()
+    aggregator.add_changes([node_change(1, 50), node_change(3, 5, uid="3")], 1)
+    # Changeset 2 is updated last, with changes older than those of 1
+    aggregator.add_changes([node_change(2, 10, uid="2")], 2)
+    aggregator.add_changes([node_change(3, 55, uid="3")], 3)
+    evicted = aggregator.evict(before=1704067200 + 30 * 60)
+    assert [s.id for s in evicted] == [2]
+    assert sorted(aggregator.changesets) == [1, 3]
+    assert sorted(aggregator.users) == [1, 3]
+
+
+def test_evict_keeps_summaries_without_timestamps():
+    aggregator = ChangesetAggregator(window=600)
+    assert aggregator.add_changes([node_change(1), node_change(2, 0)], 1) == []
+    evicted = aggregator.add_changes([node_change(3, 30)], 2)
+    assert [s.id for s in evicted] == [2]
+    assert sorted(aggregator.changesets) == [1, 3]
+    restored = ChangesetAggregator.from_snapshot(aggregator.snapshot())
+    assert [s.id for s in restored.evict(before=1704067200 + 3600)] == [3]
+    assert list(restored.changesets) == [1]
+
+
+def test_osmchange():
+    aggregator = ChangesetAggregator()
+    osmchange = OSMChange.from_xml_file(DATA)
+    aggregator.add(osmchange)
+    objects = [obj for objects in osmchange.actions.values() for obj in objects]
+    assert sum(s.changes for s in aggregator.changesets.values()) == len(objects)
+    assert sum(s.tags_modified for s in aggregator.changesets.values()) == 0
+    assert sum(s.changesets for s in aggregator.users.values()) == len(aggregator)
+
+
+def test_snapshot():
+    aggregator = ChangesetAggregator()
+    aggregator.add(augmented_diff(100))
+    snapshot = json.loads(json.dumps(aggregator.snapshot()))
+    assert snapshot["sequence_number"] == 100
+    assert snapshot["changesets"][0]["counts"]["create"]["node"] == 1
+    restored = ChangesetAggregator.from_snapshot(snapshot)
+    assert restored.snapshot() == aggregator.snapshot()
+    restored.add(augmented_diff(101))
+    aggregator.add(augmented_diff(101))
+    assert restored.snapshot() == aggregator.snapshot()
+
+
+def test_count_unknown_action():
+    aggregator = ChangesetAggregator()
+    aggregator.add(augmented_diff(100))
+    with pytest.raises(ValueError):
+        aggregator.changesets[10].count("move")
@@ -0,0 +1,267 @@
+import asyncio
+import gzip
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from osmdiff import AugmentedDiff, ContinuousAugmentedDiff, ContinuousOSMChange, OSMChange
+from osmdiff import aio
+from osmdiff.config import API_CONFIG
+
+ADIFF = b"""<?xml version='1.0'?>
+<osm version='0.6'>
+<remark>runtime remark</remark>
+<meta osm_base='2024-01-01T00:00:00Z'/>
+<action type='create'>
+<node id='1' version='1' lat='1.0' lon='2.0'/>
+</action>
+<action type='modify'>
+<old><node id='2' version='1' lat='1.0' lon='2.0'/></old>
+<new><node id='2' version='2' lat='1.5' lon='2.5'/></new>
+</action>
+<action type='delete' user='TestUser' changeset='42'>
+<old><node id='3' version='4' lat='1.0' lon='2.0'/></old>
+</action>
+</osm>"""
+
+
+def serve(handlers, test):
+    """Run test(server) against a local server with the given GET handlers."""
+
+    async def run():
+        app = web.Application()
+        for path, handler in handlers.items():
+            app.router.add_get(path, handler)
+        async with TestServer(app) as server:
+            return await test(server)
+
+    return asyncio.run(run())
+
+
+async def adiff_handler(request):
+    if request.query["id"] == "404":
+        return web.Response(status=404)
+    return web.Response(body=ADIFF, content_type="text/xml")
+
+
+@pytest.fixture
+def overpass_state(monkeypatch):
+    """Point the augmented diff state URL at the test server."""
+
+    def patch(server):
+        monkeypatch.setitem(
+            API_CONFIG["overpass"], "state_url", str(server.make_url("/state"))
+        )
+
+    return patch
+
+
+def test_aretrieve():
+    async def test(server):
+        url = str(server.make_url("/adiff")) + "?id={sequence_number}"
+        adiff = AugmentedDiff(sequence_number=100, base_url=url)
+        status = await adiff.aretrieve()
+        return adiff, status
+
+    adiff, status = serve({"/adiff": adiff_handler}, test)
+    assert status == 200
+    assert adiff.sequence_number == 101
+    assert len(adiff.create) == 1 and len(adiff.modify) == 1
+    assert adiff.delete[0]["meta"]["changeset"] == "42"
+    assert adiff.remarks == ["runtime remark"]
+
+
+def test_aretrieve_error_status():
+    async def test(server):
+        url = str(server.make_url("/adiff")) + "?id={sequence_number}"
+        adiff = AugmentedDiff(sequence_number=404, base_url=url)
+        return adiff, await adiff.aretrieve()
+
+    adiff, status = serve({"/adiff": adiff_handler}, test)
+    assert status == 404
+    assert adiff.sequence_number == 404
+    assert adiff.create == []
+
+
+def test_aretrieve_concurrent_with_shared_session():
+    async def test(server):
+        url = str(server.make_url("/adiff")) + "?id={sequence_number}"
+        diffs = [AugmentedDiff(sequence_number=n, base_url=url) for n in range(1, 9)]
+        async with aiohttp.ClientSession() as session:
+            statuses = await asyncio.gather(
+                *(d.aretrieve(session=session) for d in diffs)
+            )
+        return diffs, statuses
+
+    diffs, statuses = serve({"/adiff": adiff_handler}, test)
+    assert statuses == [200] * 8
+    assert all(len(d.create) == 1 for d in diffs)
+
+
+def test_aget_state(overpass_state):
+    async def state(request):
+        return web.Response(text="6509700")
+
+    async def test(server):
+        overpass_state(server)
+        return await AugmentedDiff.aget_state()
+
+    assert serve({"/state": state}, test) == {
+        "sequence_number": 6509700,
+        "timestamp": None,
+    }
+
+
+def test_continuous_async_iteration(overpass_state):
+    async def state(request):
+        return web.Response(text="100")
+
+    async def test(server):
+        overpass_state(server)
+        url = str(server.make_url("/adiff")) + "?id={sequence_number}"
+        continuous = ContinuousAugmentedDiff(base_url=url, min_interval=0)
+        diffs = []
+        async for diff in continuous:
+            diffs.append(diff)
+            break
+        return continuous, diffs
+
+    continuous, diffs = serve({"/state": state, "/adiff": adiff_handler}, test)
+    assert diffs[0].sequence_number == 100
+    assert len(diffs[0].create) == 1
+    assert continuous._current_sequence == 101
+
+
+def test_osmchange_aretrieve_gzip():
+    with open("tests/data/test_osmchange.xml", "rb") as fh:
+        body = gzip.compress(fh.read())
+    expected = OSMChange.from_xml_file("tests/data/test_osmchange.xml")
+
+    async def osc(request):
+        return web.Response(body=body, content_type="application/octet-stream")
+
+    async def test(server):
+        osmchange = OSMChange(url=str(server.make_url("/")), sequence_number=2604001)
+        return osmchange, await osmchange.aretrieve()
+
+    osmchange, status = serve({"/minute/002/604/001.osc.gz": osc}, test)
+    assert status == 200
+    assert len(osmchange.create) == len(expected.create)
+    assert len(osmchange.modify) == len(expected.modify)
+    assert len(osmchange.delete) == len(expected.delete)
+
+
+def test_osmchange_aget_state():
+    async def state(request):
+        return web.Response(body=b"sequenceNumber=2604001\n", content_type="text/plain")
+
+    async def test(server):
+        osmchange = OSMChange(url=str(server.make_url("/")))
+        return osmchange, await osmchange.aget_state()
+
+    osmchange, ok = serve({"/minute/state.txt": state}, test)
+    assert ok is True
+    assert osmchange.sequence_number == 2604001
+
+
+def test_aretrieve_uses_cache():
+    from osmdiff.cache import MemoryCache
+
+    cache = MemoryCache()
+
+    async def test(server):
+        url = str(server.make_url("/adiff")) + "?id={sequence_number}"
+        first = AugmentedDiff(sequence_number=100, base_url=url, cache=cache)
+        await first.aretrieve()
+        await server.close()
+        second = AugmentedDiff(sequence_number=100, base_url=url, cache=cache)
+        return await second.aretrieve(), second
+
+    status, adiff = serve({"/adiff": adiff_handler}, test)
+    assert status == 200
+    assert len(adiff.create) == 1 and len(adiff.modify) == 1
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_continuous_async_prefetch(overpass_state):
+    requested = []
+
+    async def state(request):
+        return web.Response(text="105")
+
+    async def adiff(request):
+        requested.append(request.query["id"])
+        if requested.count("102") == 1 and request.query["id"] == "102":
+            return web.Response(status=503)
+        return web.Response(body=ADIFF, content_type="text/xml")
+
+    async def test(server):
+        overpass_state(server)
+        url = str(server.make_url("/adiff")) + "?id={sequence_number}"
+        continuous = ContinuousAugmentedDiff(
+            base_url=url, min_interval=0, max_interval=0, prefetch=3
+        )
+        continuous._current_sequence = 100
+        diffs = []
+        async for diff in continuous:
+            diffs.append(diff)
+            if len(diffs) == 6:
+                break
+        continuous.close()
+        return diffs
+
+    diffs = serve({"/state": state, "/adiff": adiff}, test)
+    assert [d.sequence_number for d in diffs] == list(range(100, 106))
+    assert all(len(d.create) == 1 for d in diffs)
+    assert requested.count("102") == 2
+
+
+def test_continuous_osmchange_async():
+    with open("tests/data/test_osmchange.xml", "rb") as fh:
+        body = gzip.compress(fh.read())
+
+    async def state(request):
+        return web.Response(text="sequenceNumber=2604002\ntimestamp=2024-01-01T00\\:00\\:00Z\n")
+
+    async def osc(request):
+        return web.Response(body=body, content_type="application/octet-stream")
+
+    async def test(server):
+        continuous = ContinuousOSMChange(
+            url=str(server.make_url("/")), min_interval=0, prefetch=2
+        )
+        continuous._current_sequence = 2604001
+        diffs = []
+        async for diff in continuous:
+            diffs.append(diff)
+            if len(diffs) == 2:
+                break
+        continuous.close()
+        return diffs
+
+    diffs = serve(
+        {
+            "/minute/state.txt": state,
+            "/minute/002/604/001.osc.gz": osc,
+            "/minute/002/604/002.osc.gz": osc,
+        },
+        test,
+    )
+    assert [d.sequence_number for d in diffs] == [2604001, 2604002]
+    assert all(len(d.create) > 0 for d in diffs)
+
+
+def test_missing_aiohttp(monkeypatch):
+    monkeypatch.setattr(aio, "aiohttp", None)
+    with pytest.raises(ImportError):
+        aio.client_timeout(10)
+
+    async def open():
+        async with aio.open_session():
+            pass
+
+    with pytest.raises(ImportError):
+        asyncio.run(open())
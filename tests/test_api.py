@@ -10,24 +10,18 @@ class TestApi:
 
     @pytest.fixture
     def mock_osm_state_response(self):
-        """Fixture providing a mock OSM state API response."""
+        """Fixture providing a mock replication state.txt response."""
         from io import BytesIO
 
-        xml_content = """<?xml version='1.0'?>
-        <osm version='0.6'>
-            <state>
-                <sequenceNumber>12345</sequenceNumber>
-                <timestamp>2024-01-01T00:00:00Z</timestamp>
-            </state>
-        </osm>"""
+        state_content = "sequenceNumber=12345\ntimestamp=2024-01-01T00\\:00\\:00Z\n"
 
         mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = 200
-        mock_response.text = xml_content
-        mock_response.content = xml_content.encode()
+        mock_response.text = state_content
+        mock_response.content = state_content.encode()
 
         # Create a raw attribute with a read method
-        mock_raw = BytesIO(xml_content.encode())
+        mock_raw = BytesIO(state_content.encode())
         mock_raw.decode_content = True
         mock_response.raw = mock_raw
 
@@ -86,7 +80,7 @@ class TestApi:
     def test_osm_diff_api_state(self, mock_osm_state_response):
         """Test getting state from OSM API returns valid sequence number."""
         with patch(
-            "osmdiff.osmchange.requests.get", return_value=mock_osm_state_response
+            "requests.Session.get", return_value=mock_osm_state_response
         ):
             osm_change = OSMChange()
             osm_change.base_url = "http://example.com/api"
@@ -98,7 +92,7 @@ class TestApi:
     @pytest.mark.integration
     def test_osm_diff_retrieve(self, mock_osm_diff_response):
         """Test retrieving OSM diff returns successful status."""
-        with patch("requests.get", return_value=mock_osm_diff_response):
+        with patch("requests.Session.get", return_value=mock_osm_diff_response):
             osm_change = OSMChange(sequence_number=12345)
             status = osm_change.retrieve()
             assert status == 200
@@ -111,7 +105,7 @@ class TestApi:
         mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = 500
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             with pytest.raises(Exception):
                 osm_change = OSMChange()
                 osm_change.retrieve()
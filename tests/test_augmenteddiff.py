@@ -25,7 +25,7 @@ class TestAugmentedDiff:
         mock_response = MagicMock()
         mock_response.status_code = 404
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             with pytest.raises(requests.exceptions.HTTPError) as excinfo:
                 AugmentedDiff.get_state()
 
@@ -36,7 +36,7 @@ class TestAugmentedDiff:
 
         # Missing sequence_number
         adiff = AugmentedDiff()
-        with patch("requests.get"):
+        with patch("requests.Session.get"):
             try:
                 adiff.retrieve()
             except Exception as e:
@@ -56,7 +56,7 @@ class TestAugmentedDiff:
         mock_response.raw = io.BytesIO(b"<osm></osm>")
         mock_response.raw.decode_content = True
         mock_response.content = b"<osm></osm>"
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             adiff.retrieve(clear_cache=True)
         assert adiff.create == []
         assert adiff.modify == []
@@ -68,7 +68,7 @@ class TestAugmentedDiff:
         mock_response.status_code = 404
         mock_response.raw = MagicMock()
         mock_response.raw.decode_content = True
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             status = adiff.retrieve()
         assert status == 404
 
@@ -205,7 +205,7 @@ class TestAugmentedDiff:
     ):
         """Test successful retry after timeout."""
         with patch(
-            "requests.get", side_effect=[mock_timeout_response, mock_adiff_response]
+            "requests.Session.get", side_effect=[mock_timeout_response, mock_adiff_response]
         ) as mock_get:
             status = augmented_diff.retrieve()
             assert status == 200
@@ -213,7 +213,7 @@ class TestAugmentedDiff:
 
     def test_multiple_timeouts(self, augmented_diff, mock_timeout_response):
         """Test max retries on consecutive timeouts."""
-        with patch("requests.get", return_value=mock_timeout_response) as mock_get:
+        with patch("requests.Session.get", return_value=mock_timeout_response) as mock_get:
             with pytest.raises(requests.exceptions.ReadTimeout):
                 augmented_diff.retrieve()
             assert mock_get.call_count == 3  # Verify it tried 3 times
@@ -231,7 +231,7 @@ class TestAugmentedDiff:
             return mock_response
 
         with patch(
-            "requests.get", side_effect=[new_mock_response(), new_mock_response()]
+            "requests.Session.get", side_effect=[new_mock_response(), new_mock_response()]
         ) as mock_get:
             # Retrieve first diff
             status1 = augmented_diff.retrieve(auto_increment=True)
@@ -245,3 +245,66 @@ class TestAugmentedDiff:
             assert augmented_diff.sequence_number == 12347
             assert len(augmented_diff.create) == initial_create_count * 2
             assert mock_get.call_count == 2
+
+    @pytest.fixture
+    def streaming_xml(self):
+        """Augmented diff XML with one action of each type."""
+        return b"""<?xml version='1.0'?>
+<osm version='0.6'>
+<remark>runtime remark</remark>
+<meta osm_base='2024-01-01T00:00:00Z'/>
+<action type='create'>
+<node id='1' version='1' lat='1.0' lon='2.0'/>
+</action>
+<action type='modify'>
+<old><node id='2' version='1' lat='1.0' lon='2.0'/></old>
+<new><node id='2' version='2' lat='1.5' lon='2.5'/></new>
+</action>
+<action type='delete' user='TestUser' changeset='42'>
+<old><node id='3' version='4' lat='1.0' lon='2.0'/></old>
+</action>
+</osm>"""
+
+    def test_iter_actions_from_stream(self, streaming_xml):
+        """iter_actions yields tuples without filling the action lists."""
+        adiff = AugmentedDiff()
+        actions = list(adiff.iter_actions(BytesIO(streaming_xml)))
+
+        assert [a[0] for a in actions] == ["create", "modify", "delete"]
+        action, old, new = actions[0]
+        assert old is None and new.attribs["id"] == "1"
+        action, old, new = actions[1]
+        assert old.attribs["version"] == "1" and new.attribs["version"] == "2"
+        action, old, new = actions[2]
+        assert old.attribs["id"] == "3" and new is None
+
+        assert adiff.create == [] and adiff.modify == [] and adiff.delete == []
+        assert adiff.remarks == ["runtime remark"]
+        assert adiff.timestamp is not None
+
+    def test_parse_stream_keeps_delete_meta(self, streaming_xml):
+        """The eager parser still stores deletion metadata."""
+        adiff = AugmentedDiff()
+        adiff._parse_stream(BytesIO(streaming_xml))
+        assert len(adiff.create) == 1
+        assert len(adiff.modify) == 1
+        assert adiff.delete[0]["meta"]["changeset"] == "42"
+
+    def test_retrieve_stream(self, augmented_diff, streaming_xml):
+        """retrieve(stream=True) defers parsing to iter_actions."""
+        mock_response = MagicMock(spec=requests.Response)
+        mock_response.status_code = 200
+        mock_response.raw = BytesIO(streaming_xml)
+        with patch("requests.Session.get", return_value=mock_response):
+            status = augmented_diff.retrieve(stream=True)
+
+        assert status == 200
+        assert augmented_diff.sequence_number == 12346
+        assert augmented_diff.create == []
+        actions = list(augmented_diff.iter_actions())
+        assert len(actions) == 3
+        mock_response.close.assert_called_once()
+
+        # The pending response is consumed by the first iteration
+        with pytest.raises(Exception, match="retrieve\\(stream=True\\)"):
+            list(augmented_diff.iter_actions())
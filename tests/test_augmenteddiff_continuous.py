@@ -7,7 +7,9 @@ class TestContinuousAugmentedDiff:
     @pytest.fixture
     def mock_state_sequence(self):
         # Simulate state endpoint returning increasing sequence numbers
-        return [12345, 12346, 12347]
+        return [
+            {"sequence_number": n, "timestamp": None} for n in (12345, 12346, 12347)
+        ]
 
     @pytest.fixture
     def mock_adiff_response(self):
@@ -43,7 +45,7 @@ class TestContinuousAugmentedDiff:
     def test_iterator_handles_backoff(self, mock_state_sequence, mock_adiff_response):
         # Simulate get_state returning None (API error) first, then a valid sequence
         with (
-            patch.object(AugmentedDiff, "get_state", side_effect=[None, 12345, 12346]),
+            patch.object(AugmentedDiff, "get_state", side_effect=[None, {"sequence_number": 12345, "timestamp": None}]),
             patch.object(AugmentedDiff, "retrieve", return_value=200),
             patch("time.sleep", return_value=None),
         ):
@@ -54,3 +56,135 @@ class TestContinuousAugmentedDiff:
             diff = next(gen)
             assert isinstance(diff, AugmentedDiff)
             assert diff.sequence_number == 12345
+
+
+ADIFF = b"""<osm version='0.6'><meta osm_base='2024-01-01T00:00:00Z'/>
+<action type='create'><node id='1' version='1' lat='1.0' lon='2.0'/></action></osm>"""
+
+
+def test_prefetch_retrieves_ahead_in_order():
+    import threading
+    import time
+
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def download(diff):
+        with lock:
+            active.append(diff.sequence_number)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(diff.sequence_number)
+        return ADIFF
+
+    states = [{"sequence_number": 100, "timestamp": None}] + [
+        {"sequence_number": 110, "timestamp": None}
+    ] * 20
+    with (
+        patch.object(AugmentedDiff, "get_state", side_effect=states),
+        patch.object(AugmentedDiff, "_download_body", download),
+    ):
+        fetcher = ContinuousAugmentedDiff(min_interval=0, max_interval=0, prefetch=4)
+        diffs = [next(fetcher) for _ in range(11)]
+        fetcher.close()
+    assert [d.sequence_number for d in diffs] == list(range(100, 111))
+    assert all(len(d.create) == 1 for d in diffs)
+    assert 1 < max(peak) <= 4
+    assert fetcher._current_sequence == 111
+
+
+def test_prefetch_retries_failed_sequence():
+    calls = []
+
+    def download(diff):
+        calls.append(diff.sequence_number)
+        if diff.sequence_number == 6 and calls.count(6) == 1:
+            raise Exception("connection reset")
+        return ADIFF
+
+    state = {"sequence_number": 8, "timestamp": None}
+    with (
+        patch.object(AugmentedDiff, "get_state", return_value=state),
+        patch.object(AugmentedDiff, "_download_body", download),
+        patch("time.sleep", return_value=None),
+    ):
+        fetcher = ContinuousAugmentedDiff(min_interval=0, max_interval=0, prefetch=2)
+        fetcher._current_sequence = 5
+        diffs = [next(fetcher) for _ in range(4)]
+        fetcher.close()
+    assert [d.sequence_number for d in diffs] == [5, 6, 7, 8]
+    assert calls.count(6) == 2
+
+
+def test_prefetch_retry_uses_backoff_with_scheduler():
+    calls = []
+
+    def download(diff):
+        calls.append(diff.sequence_number)
+        if diff.sequence_number == 6 and calls.count(6) == 1:
+            raise Exception("connection reset")
+        return ADIFF
+
+    scheduler = MagicMock()
+    scheduler.delay.return_value = 45.0
+    state = {"sequence_number": 8, "timestamp": None}
+    with (
+        patch.object(AugmentedDiff, "get_state", return_value=state),
+        patch.object(AugmentedDiff, "_download_body", download),
+        patch("time.sleep") as sleep,
+    ):
+        fetcher = ContinuousAugmentedDiff(
+            min_interval=2, max_interval=8, prefetch=2, scheduler=scheduler
+        )
+        fetcher._current_sequence = 5
+        diffs = [next(fetcher) for _ in range(4)]
+        fetcher.close()
+    assert [d.sequence_number for d in diffs] == [5, 6, 7, 8]
+    # The first check follows the scheduler, the retry of 6 the backoff
+    waits = [c[0][0] for c in sleep.call_args_list]
+    assert waits[0] == 45.0
+    assert len(waits) == 2 and 3 < waits[1] <= 4
+    assert fetcher._retry is False
+
+
+def test_catches_up_without_waiting():
+    states = [{"sequence_number": n, "timestamp": None} for n in (100, 103, 103)]
+    with (
+        patch.object(AugmentedDiff, "get_state", side_effect=states) as get_state,
+        patch.object(AugmentedDiff, "retrieve", return_value=200),
+        patch("time.sleep") as sleep,
+    ):
+        fetcher = ContinuousAugmentedDiff(min_interval=30)
+        fetcher._current_sequence = 97
+        assert fetcher.lag is None
+        diffs = []
+        for diff in fetcher:
+            diffs.append(diff.sequence_number)
+            if len(diffs) == 7:
+                break
+        assert diffs == list(range(97, 104))
+        assert fetcher.lag == 0
+        # One state check per drained backlog, and a single wait between them
+        assert get_state.call_count == 2
+        sleep.assert_called_once()
+        assert 29 < sleep.call_args[0][0] <= 30
+
+
+def test_catch_up_backs_off_on_errors():
+    state = {"sequence_number": 12, "timestamp": None}
+    with (
+        patch.object(AugmentedDiff, "get_state", return_value=state) as get_state,
+        patch.object(AugmentedDiff, "retrieve", side_effect=[200, 503, 200, 200]),
+        patch("time.sleep") as sleep,
+    ):
+        fetcher = ContinuousAugmentedDiff(min_interval=1, max_interval=8)
+        fetcher._current_sequence = 10
+        assert [next(fetcher).sequence_number for _ in range(3)] == [10, 11, 12]
+        assert fetcher.lag == 0
+        assert get_state.call_count == 1
+        # Only the failed retrieval of 11 was retried after a wait
+        sleep.assert_called_once()
+        assert 1 < sleep.call_args[0][0] <= 2
+        assert fetcher._current_interval == 1
@@ -0,0 +1,170 @@
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from osmdiff import AugmentedDiff, Node, OSMChange, Relation, Way
+from osmdiff.backends import BACKENDS, ElementEvents, get_backend
+from osmdiff.config import PARSER_CONFIG
+from osmdiff.osm import OSMObject
+from osmdiff.stream import iter_chunks
+
+AVAILABLE = [name for name, backend in BACKENDS.items() if backend.available()]
+
+ADIFF = b"""<?xml version='1.0' encoding='UTF-8'?>
+<osm version="0.6" generator="Overpass API">
+  <remark>diff remark</remark>
+  <meta osm_base="2024-01-01T00:00:00Z"/>
+  <action type="create">
+    <node id="1" lat="1.0" lon="2.0" version="1"><tag k="amenity" v="cafe"/></node>
+  </action>
+  <action type="modify">
+    <old>
+      <way id="2" version="1">
+        <bounds minlat="1" minlon="2" maxlat="3" maxlon="4"/>
+        <nd ref="10" lat="1.0" lon="2.0"/><nd ref="11" lat="3.0" lon="4.0"/>
+        <tag k="highway" v="track"/>
+      </way>
+    </old>
+    <new>
+      <way id="2" version="2">
+        <nd ref="10" lat="1.0" lon="2.0"/><nd ref="11" lat="3.0" lon="4.0"/>
+        <tag k="highway" v="residential"/>
+      </way>
+    </new>
+  </action>
+  <action type="delete" user="TestUser" changeset="42">
+    <old>
+      <relation id="3" version="4">
+        <member type="way" ref="2" role="outer">
+          <nd lat="1.0" lon="2.0"/><nd lat="3.0" lon="4.0"/>
+        </member>
+        <member type="node" ref="1" role="label"/>
+        <tag k="type" v="multipolygon"/>
+      </relation>
+    </old>
+    <new><relation id="3" version="5" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+def snapshot(obj):
+    "Comparable representation of an OSM object, including its children"
+    out = (type(obj).__name__, dict(obj.attribs), dict(obj.tags), obj.bounds)
+    if isinstance(obj, Way):
+        out += (tuple(snapshot(n) for n in obj.nodes),)
+    if isinstance(obj, Relation):
+        out += (tuple(snapshot(m) for m in obj.members),)
+    return out
+
+
+@pytest.fixture(params=AVAILABLE)
+def backend(request, monkeypatch):
+    monkeypatch.setitem(PARSER_CONFIG, "backend", request.param)
+    return request.param
+
+
+def test_get_backend_default_is_available():
+    assert get_backend().available()
+    assert get_backend().name in AVAILABLE
+
+
+def test_get_backend_by_name():
+    assert get_backend("etree").name == "etree"
+    assert get_backend("expat").name == "expat"
+
+
+def test_get_backend_unknown():
+    with pytest.raises(ValueError, match="Unknown parser backend"):
+        get_backend("sax")
+
+
+def test_get_backend_unavailable(monkeypatch):
+    monkeypatch.setattr(BACKENDS["lxml"], "available", classmethod(lambda cls: False))
+    with pytest.raises(ImportError):
+        get_backend("lxml")
+
+
+def test_events(backend):
+    events = list(get_backend()().parse([ADIFF[:100], ADIFF[100:]]))
+    assert events[0] == ("start", "osm", {"version": "0.6", "generator": "Overpass API"})
+    assert ("end", "remark", "diff remark") in events
+    assert events[-1][:2] == ("end", "osm")
+    objects = [e[1] for e in events if e[0] == "object"]
+    assert [type(o) for o in objects] == [Node, Way, Way, Relation, Relation]
+
+
+def test_objects_match_from_xml(backend):
+    "Every backend builds the same objects as OSMObject.from_xml"
+    root = ET.fromstring(ADIFF)
+    expected = [
+        snapshot(OSMObject.from_xml(elem))
+        for elem in root.iter()
+        if elem.tag in ("node", "way", "relation")
+    ]
+    objects = [e[1] for e in get_backend()().parse([ADIFF]) if e[0] == "object"]
+    assert [snapshot(o) for o in objects] == expected
+
+    relation = objects[3]
+    assert relation.osmtype == "r"
+    assert [type(m) for m in relation.members] == [Way, Node]
+    assert len(relation.members[0].nodes) == 2
+    assert objects[1].bounds == ["2", "1", "4", "3"]
+
+
+def test_osmchange_file(backend, osmchange_file_path):
+    oc = OSMChange.from_xml_file(osmchange_file_path)
+    with open(osmchange_file_path, "rb") as fh:
+        events = ET.iterparse(fh, events=("start", "end"))
+        reference = OSMChange.from_xml(events)
+    for action in ("create", "modify", "delete"):
+        got = getattr(oc, action)
+        expected = getattr(reference, action)
+        assert len(got) == len(expected)
+        assert [snapshot(o) for o in got[:50]] == [snapshot(o) for o in expected[:50]]
+
+
+def test_augmented_diff(backend):
+    adiff = AugmentedDiff()
+    adiff._parse_stream(io.BytesIO(ADIFF))
+    assert len(adiff.create) == 1
+    assert adiff.modify[0]["old"].tags["highway"] == "track"
+    assert adiff.modify[0]["new"].tags["highway"] == "residential"
+    assert adiff.delete[0]["meta"] == {
+        "type": "delete",
+        "user": "TestUser",
+        "changeset": "42",
+    }
+    assert adiff.delete[0]["new"].attribs["visible"] == "false"
+    assert adiff.remarks == ["diff remark"]
+
+
+def test_from_file(backend, tmp_path):
+    path = tmp_path / "way.xml"
+    path.write_bytes(b'<osm><way id="5"><nd ref="1"/><tag k="a" v="b"/></way></osm>')
+    way = OSMObject.from_file(str(path))
+    assert isinstance(way, Way)
+    assert way.tags == {"a": "b"}
+
+    path.write_bytes(b"<osm/>")
+    with pytest.raises(ValueError, match="No OSM object"):
+        OSMObject.from_file(str(path))
+
+
+def test_parse_error(backend):
+    with pytest.raises(ET.ParseError):
+        list(get_backend()().parse([b"<osm><node id='1'></osm>"]))
+
+
+def test_text_chunks(backend):
+    chunks = iter_chunks(io.StringIO("<osm><node id='1' lat='1' lon='2'/></osm>"))
+    events = list(get_backend()().parse(chunks))
+    assert events[1][1].attribs["id"] == "1"
+
+
+def test_element_events_remove_finished_elements():
+    events = list(ET.iterparse(io.BytesIO(ADIFF), events=("start", "end")))
+    root = events[0][1]
+    converted = list(ElementEvents().convert(iter(events)))
+    assert len([e for e in converted if e[0] == "object"]) == 5
+    assert len(root) == 0
@@ -0,0 +1,129 @@
+import gzip
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff.backfill import host_slot
+from osmdiff.config import BACKFILL_CONFIG, PARSER_CONFIG
+from osmdiff.osm.tags import FrozenTags
+
+ADIFF = """<osm version='0.6'>
+<action type='create'><node id='{n}' version='1' lat='1.0' lon='2.0'/></action>
+</osm>"""
+
+
+def adiff_response(url, **kwargs):
+    """Respond with a diff creating node <sequence number>, later ones first."""
+    n = int(url.rsplit("=", 1)[1])
+    time.sleep(0.01 * (10 - n % 10))
+    response = MagicMock()
+    response.status_code = 200
+    response.content = ADIFF.format(n=n).encode()
+    return response
+
+
+@pytest.mark.parametrize("processes", [0, 2])
+def test_augmenteddiff_fetch_range_in_order(processes):
+    with patch("requests.Session.get", side_effect=adiff_response):
+        diffs = list(
+            AugmentedDiff.fetch_range(
+                1,
+                12,
+                workers=4,
+                processes=processes,
+                base_url="https://example.com/adiff?id={sequence_number}",
+            )
+        )
+    assert [d.sequence_number for d in diffs] == list(range(1, 13))
+    assert [d.create[0].id for d in diffs] == list(range(1, 13))
+
+
+def test_fetch_range_processes_use_parser_config(monkeypatch):
+    def tagged_response(url, **kwargs):
+        response = adiff_response(url)
+        response.content = response.content.replace(
+            b"/></action>", b"><tag k='shop' v='deli'/></node></action>"
+        )
+        return response
+
+    def fetch():
+        with patch("requests.Session.get", side_effect=tagged_response):
+            return list(
+                AugmentedDiff.fetch_range(
+                    1,
+                    2,
+                    workers=2,
+                    processes=1,
+                    base_url="https://example.com/adiff?id={sequence_number}",
+                )
+            )
+
+    monkeypatch.setitem(PARSER_CONFIG, "share_tags", True)
+    diffs = fetch()
+    assert [type(d.create[0]._tags) for d in diffs] == [FrozenTags, FrozenTags]
+    monkeypatch.setitem(PARSER_CONFIG, "backend", "nonexistent")
+    with pytest.raises(ValueError, match="nonexistent"):
+        fetch()
+
+
+def test_osmchange_fetch_range(osmchange_file_path):
+    with open(osmchange_file_path, "rb") as fh:
+        body = gzip.compress(fh.read())
+    response = MagicMock(status_code=200, content=body)
+    with patch("requests.Session.get", return_value=response) as mock_get:
+        diffs = list(
+            OSMChange.fetch_range(
+                10, 12, workers=2, processes=0, url="https://example.com/replication"
+            )
+        )
+    assert [d.sequence_number for d in diffs] == [10, 11, 12]
+    assert len(diffs[0].create) == len(OSMChange(file=osmchange_file_path).create)
+    assert mock_get.call_args_list[0][0][0] == (
+        "https://example.com/replication/minute/000/000/010.osc.gz"
+    )
+
+
+def test_fetch_range_raises_when_failed_diff_is_due():
+    def respond(url, **kwargs):
+        response = MagicMock()
+        if url.endswith("=3"):
+            response.raise_for_status.side_effect = requests.HTTPError("404")
+        else:
+            response.content = ADIFF.format(n=1).encode()
+        return response
+
+    with patch("requests.Session.get", side_effect=respond):
+        diffs = AugmentedDiff.fetch_range(
+            1, 5, workers=2, processes=0, base_url="https://example.com/?id={sequence_number}"
+        )
+        assert next(diffs).sequence_number == 1
+        assert next(diffs).sequence_number == 2
+        with pytest.raises(requests.HTTPError):
+            next(diffs)
+
+
+def test_host_slot_limits_concurrency(monkeypatch):
+    monkeypatch.setitem(BACKFILL_CONFIG, "host_limits", {"limited.example.com": 2})
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def download():
+        with host_slot("https://limited.example.com/diff/1"):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=download) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
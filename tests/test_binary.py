@@ -0,0 +1,160 @@
+import io
+import math
+import os
+
+import pytest
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff.binary import BLOCK_SIZE, DiffFile, LazyList
+from osmdiff.osm import Node, Relation, Way
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "test_osmchange.xml")
+
+ADIFF = """<osm version="0.6" generator="Overpass API">
+  <remark>runtime remark</remark>
+  <meta osm_base="2024-01-01T00:00:00Z"/>
+  <action type="create">
+    <node id="1" lat="1.5" lon="-2.5" version="1" changeset="7" uid="3" user="a" timestamp="2024-01-01T00:00:00Z">
+      <tag k="amenity" v="cafe"/><tag k="name" v="Koffie"/>
+    </node>
+  </action>
+  <action type="modify">
+    <old><way id="2" version="1"><bounds minlat="1" minlon="2" maxlat="3" maxlon="4"/><nd ref="10" lat="1.0" lon="2.0"/><nd ref="11"/><tag k="highway" v="track"/></way></old>
+    <new><way id="2" version="2" changeset="8"><nd ref="10" lat="1.0" lon="2.0"/><nd ref="9" lat="1.123456789" lon="2.0"/><tag k="highway" v="residential"/></way></new>
+  </action>
+  <action type="delete" user="b" changeset="9">
+    <old><relation id="3" version="4"><member type="way" ref="2" role="outer"><nd ref="10" lat="1.0" lon="2.0"/></member><member type="node" ref="1" role="" lat="1.5" lon="2.5"/><tag k="type" v="route"/></relation></old>
+    <new><relation id="3" version="5" changeset="9" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+def assert_same(a, b):
+    assert type(a) is type(b)
+    assert a.attribs == b.attribs
+    assert a.tags == b.tags
+    assert a.bounds == b.bounds
+    if isinstance(a, Way):
+        assert [n.attribs for n in a.nodes] == [n.attribs for n in b.nodes]
+    if isinstance(a, Relation):
+        assert len(a.members) == len(b.members)
+        for x, y in zip(a.members, b.members):
+            assert_same(x, y)
+
+
+@pytest.fixture
+def adiff():
+    a = AugmentedDiff(sequence_number=42)
+    a._parse_stream(io.StringIO(ADIFF))
+    return a
+
+
+def test_augmenteddiff_roundtrip(adiff, tmp_path):
+    path = tmp_path / "adiff.bin"
+    adiff.dump(path)
+    for lazy in (True, False):
+        loaded = AugmentedDiff.load(path, lazy=lazy)
+        assert loaded.sequence_number == 42
+        assert loaded.timestamp == adiff.timestamp
+        assert loaded.remarks == ["runtime remark"]
+        assert_same(loaded.create[0], adiff.create[0])
+        assert set(loaded.modify[0]) == {"old", "new"}
+        assert_same(loaded.modify[0]["old"], adiff.modify[0]["old"])
+        assert_same(loaded.modify[0]["new"], adiff.modify[0]["new"])
+        assert loaded.delete[0]["meta"] == adiff.delete[0]["meta"]
+        assert_same(loaded.delete[0]["old"], adiff.delete[0]["old"])
+        assert_same(loaded.delete[0]["new"], adiff.delete[0]["new"])
+
+
+def test_coordinates(adiff, tmp_path):
+    path = tmp_path / "adiff.bin"
+    adiff.dump(path)
+    loaded = AugmentedDiff.load(path)
+    assert (loaded.create[0].lon, loaded.create[0].lat) == (-2.5, 1.5)
+    old = loaded.modify[0]["old"]
+    assert old.coords() == [[2.0, 1.0], [0.0, 0.0]]
+    assert math.isnan(old._coords[2])
+    # More precise than fixed-point, kept exactly
+    assert loaded.modify[0]["new"].nodes[1].attribs["lat"] == "1.123456789"
+
+
+def test_osmchange_roundtrip(tmp_path):
+    osmchange = OSMChange.from_xml_file(DATA)
+    osmchange.sequence_number = 5
+    path = tmp_path / "osc.bin"
+    osmchange.dump(path)
+    loaded = OSMChange.load(path)
+    assert loaded.sequence_number == 5
+    assert loaded.frequency == "minute"
+    for action in ("create", "modify", "delete"):
+        original, restored = getattr(osmchange, action), getattr(loaded, action)
+        assert len(restored) == len(original)
+        for a, b in zip(original, restored):
+            assert_same(a, b)
+    restored, original = loaded.to_columns(), osmchange.to_columns()
+    for name in ("lat", "lon"):  # NaN for ways
+        assert restored.pop(name).tobytes() == original.pop(name).tobytes()
+    assert restored == original
+
+
+def test_dict_attribs_roundtrip(tmp_path):
+    node = Node(attribs={"id": "x1", "version": "2", "lat": "1.5", "lon": "2.5"})
+    way = Way(attribs={"id": "7"}, nodes=[Node(attribs={"ref": "1"})])
+    osmchange = OSMChange()
+    osmchange.create = [node, way]
+    osmchange.dump(tmp_path / "osc.bin")
+    loaded = OSMChange.load(tmp_path / "osc.bin")
+    assert loaded.create[0].attribs == {"id": "x1", "version": "2", "lat": "1.5", "lon": "2.5"}
+    assert loaded.create[1].id == 7
+    assert loaded.create[1].nodes[0].attribs == {"ref": "1"}
+
+
+def test_lazy_list(tmp_path):
+    osmchange = OSMChange()
+    osmchange.create = [Node(attribs={"id": str(i)}) for i in range(2 * BLOCK_SIZE + 5)]
+    osmchange.dump(tmp_path / "osc.bin")
+    loaded = OSMChange.load(tmp_path / "osc.bin")
+    create = loaded.create
+    assert isinstance(create, LazyList)
+    assert len(create) == 2 * BLOCK_SIZE + 5
+    assert create[-1].id == 2 * BLOCK_SIZE + 4
+    assert list(create._decoded) == [0, 0, 1]
+    assert create[-1] is create[2 * BLOCK_SIZE + 4]
+    assert [n.id for n in create[1:4]] == [1, 2, 3]
+    assert [n.id for n in create] == list(range(2 * BLOCK_SIZE + 5))
+    with pytest.raises(IndexError):
+        create[2 * BLOCK_SIZE + 5]
+
+    create.append(Node(attribs={"id": "1000"}))
+    assert create._file is None
+    assert create[-1].id == 1000
+    assert len(create + []) == len(create)
+    assert create == create.copy()
+    create.clear()
+    assert len(create) == 0
+
+
+def test_dump_over_loaded_file(tmp_path):
+    path = tmp_path / "osc.bin"
+    OSMChange.from_xml_file(DATA).dump(path)
+    loaded = OSMChange.load(path)
+    loaded.dump(path)
+    assert_same(OSMChange.load(path).modify[-1], loaded.modify[-1])
+
+
+def test_load_errors(adiff, tmp_path):
+    path = tmp_path / "adiff.bin"
+    adiff.dump(path)
+    with pytest.raises(ValueError, match="another kind"):
+        OSMChange.load(path)
+    (tmp_path / "other").write_bytes(b"<osm/>")
+    with pytest.raises(ValueError, match="not an osmdiff binary file"):
+        DiffFile(tmp_path / "other")
+
+
+def test_unsupported_object(tmp_path):
+    osmchange = OSMChange()
+    osmchange.create = [object()]
+    with pytest.raises(TypeError):
+        osmchange.dump(tmp_path / "osc.bin")
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,141 @@
+import gzip
+import io
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff import cache as shared
+from osmdiff.cache import DiskCache, MemoryCache, cache_key
+
+ADIFF = b"""<osm version='0.6'>
+<action type='create'><node id='1' version='1' lat='1.0' lon='2.0'/></action>
+</osm>"""
+
+OSC = b"""<osmChange version='0.6'>
+<create><node id='7' version='1' lat='1.0' lon='2.0'/></create>
+</osmChange>"""
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_cache():
+    yield
+    shared.set_cache(None)
+
+
+def mock_response(body, encoding=None):
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"Content-Encoding": encoding} if encoding else {}
+    response.raw = io.BytesIO(body)
+    response.content = body
+    return response
+
+
+def test_cache_key():
+    assert cache_key("a", 1) == cache_key("a", "1")
+    assert cache_key("a", 1) == cache_key("a", 1, (None, None, None, None))
+    assert cache_key("a", 1) != cache_key("a", 2)
+    assert cache_key("a", 1) != cache_key("a", 1, (0, 0, 1, 1))
+    assert cache_key("a", 1) != cache_key("b", 1)
+
+
+def test_disk_cache_roundtrip(tmp_path):
+    cache = DiskCache(tmp_path)
+    key = cache_key("a", 1)
+    assert cache.get(key) is None
+    cache.put(key, b"<osm/>")
+    assert gzip.decompress(cache.get(key)) == b"<osm/>"
+    assert cache.stats == {"hits": 1, "misses": 1}
+    # Nothing but the entry is left in the directory
+    assert os.listdir(tmp_path / key[:2]) == [key + ".gz"]
+
+
+def test_disk_cache_keeps_gzip_as_is(tmp_path):
+    cache = DiskCache(tmp_path)
+    body = gzip.compress(b"<osm/>")
+    cache.put("ab", body)
+    assert cache.get("ab") == body
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=2500)
+    for i, key in enumerate(["aa", "bb"]):
+        cache.put(key, os.urandom(1000))
+        os.utime(cache._file(key), (1000 + i, 1000 + i))
+    assert cache.get("aa") is not None  # Now the most recently used
+    cache.put("cc", os.urandom(1000))
+    assert cache.get("bb") is None
+    assert cache.get("aa") is not None
+    assert cache.get("cc") is not None
+    assert cache._size <= 2500
+
+
+def test_disk_cache_clear(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.put("aa", b"x")
+    cache.clear()
+    assert cache.get("aa") is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    size = len(gzip.compress(b"x"))
+    cache = MemoryCache(max_bytes=2 * size)
+    cache.put("a", b"x")
+    cache.put("b", b"x")
+    cache.get("a")
+    cache.put("c", b"x")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_augmenteddiff_retrieve_uses_cache():
+    shared.set_cache(MemoryCache())
+    with patch("requests.Session.get", return_value=mock_response(ADIFF)) as get:
+        first = AugmentedDiff(sequence_number=5)
+        assert first.retrieve(auto_increment=False) == 200
+        second = AugmentedDiff(sequence_number=5)
+        assert second.retrieve(auto_increment=False) == 200
+    assert get.call_count == 1
+    assert [n.id for n in second.create] == [n.id for n in first.create] == [1]
+    assert shared.get_cache().stats == {"hits": 1, "misses": 1}
+
+
+def test_augmenteddiff_cache_keyed_by_bbox():
+    cache = MemoryCache()
+    with patch("requests.Session.get", side_effect=lambda *a, **k: mock_response(ADIFF)) as get:
+        AugmentedDiff(sequence_number=5, cache=cache).retrieve()
+        AugmentedDiff(
+            sequence_number=5, minlon=0, minlat=0, maxlon=1, maxlat=1, cache=cache
+        ).retrieve()
+    assert get.call_count == 2
+
+
+def test_augmenteddiff_stream_bypasses_cache():
+    cache = MemoryCache()
+    with patch("requests.Session.get", return_value=mock_response(ADIFF)):
+        AugmentedDiff(sequence_number=5, cache=cache).retrieve(stream=True)
+    assert cache.stats == {"hits": 0, "misses": 0}
+
+
+def test_osmchange_retrieve_keeps_gzip_body():
+    cache = MemoryCache()
+    body = gzip.compress(OSC)
+    with patch("requests.Session.get", return_value=mock_response(body, "gzip")) as get:
+        assert OSMChange(sequence_number=3, cache=cache).retrieve() == 200
+        osmchange = OSMChange(sequence_number=3, cache=cache)
+        assert osmchange.retrieve() == 200
+    assert get.call_count == 1
+    assert [n.id for n in osmchange.create] == [7]
+    assert cache.get(osmchange._cache_key()) == body
+
+
+def test_fetch_range_uses_cache(tmp_path):
+    cache = DiskCache(tmp_path)
+    with patch("requests.Session.get", side_effect=lambda *a, **k: mock_response(OSC)) as get:
+        for _ in range(2):
+            diffs = list(OSMChange.fetch_range(1, 3, processes=0, cache=cache))
+            assert [d.create[0].id for d in diffs] == [7, 7, 7]
+    assert get.call_count == 3
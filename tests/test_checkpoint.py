@@ -0,0 +1,163 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from osmdiff import AugmentedDiff, ContinuousAugmentedDiff, ContinuousOSMChange
+from osmdiff.checkpoint import FileCheckpointStore, SQLiteCheckpointStore
+
+from .test_osmchange_continuous import Replication
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(**kwargs):
+        if request.param == "file":
+            store = FileCheckpointStore(tmp_path / "checkpoints.json", **kwargs)
+        else:
+            store = SQLiteCheckpointStore(tmp_path / "checkpoints.db", **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_load_and_save(make_store):
+    store = make_store(commit_every=1)
+    assert store.load("a") is None
+    store.save("a", 10)
+    store.save("b", 20)
+    store.save("a", 11)
+    store.close()
+    store = make_store()
+    assert store.load("a") == 11
+    assert store.load("b") == 20
+    store.close()
+
+
+def test_batched_commits(make_store):
+    store = make_store(commit_every=3, commit_interval=3600)
+    other = make_store()
+    store.save("a", 1)
+    store.save("a", 2)
+    assert store.load("a") == 2  # Pending checkpoints are visible locally
+    assert other.load("a") is None
+    store.save("a", 3)
+    assert other.load("a") == 3
+    store.save("a", 4)
+    store.commit()
+    assert other.load("a") == 4
+    store.close()
+    other.close()
+
+
+def test_commit_interval(make_store):
+    with patch("time.monotonic", return_value=995.0):
+        store = make_store(commit_every=100, commit_interval=5)
+    other = make_store()
+    with patch("time.monotonic", return_value=1000.0):
+        store.save("a", 1)
+    assert other.load("a") == 1  # Interval elapsed since creation
+    with patch("time.monotonic", return_value=1002.0):
+        store.save("a", 2)
+    assert other.load("a") == 1
+    with patch("time.monotonic", return_value=1005.0):
+        store.save("a", 3)
+    assert other.load("a") == 3
+    store.close()
+    other.close()
+
+
+def test_file_store_is_replaced_atomically(tmp_path):
+    path = tmp_path / "checkpoints.json"
+    path.write_text(json.dumps({"other": 5}))
+    store = FileCheckpointStore(path, commit_every=1)
+    with patch("json.dump", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            store.save("a", 1)
+    assert json.loads(path.read_text()) == {"other": 5}
+    assert list(tmp_path.iterdir()) == [path]
+    store.save("a", 2)
+    assert json.loads(path.read_text()) == {"a": 2, "other": 5}
+
+
+def test_invalid_commit_every(tmp_path):
+    with pytest.raises(ValueError):
+        FileCheckpointStore(tmp_path / "checkpoints.json", commit_every=0)
+
+
+def test_resumes_after_restart(make_store):
+    session = Replication(newest=14)
+    store = make_store(commit_every=2)
+    replication = ContinuousOSMChange(session=session, checkpoint=store)
+    replication._current_sequence = 10
+    with patch("time.sleep"):
+        processed = [next(replication).sequence_number for _ in range(4)]
+    # Stopped while handling 13: 10 to 12 were processed, 12 is not committed
+    assert processed == [10, 11, 12, 13]
+    assert make_store().load("default") == 11
+    replication.close()
+    assert make_store().load("default") == 12
+
+    resumed = ContinuousOSMChange(session=session, checkpoint=make_store())
+    with patch("time.sleep"):
+        assert next(resumed).sequence_number == 13
+        assert next(resumed).sequence_number == 14
+    resumed.commit()
+    assert make_store().load("default") == 14
+
+
+def test_consumers_are_independent(make_store):
+    store = make_store(commit_every=1)
+    store.save("a", 100)
+    with (
+        patch.object(
+            AugmentedDiff,
+            "get_state",
+            return_value={"sequence_number": 200, "timestamp": None},
+        ),
+        patch.object(AugmentedDiff, "retrieve", return_value=200),
+    ):
+        a = ContinuousAugmentedDiff(checkpoint=store, consumer="a")
+        b = ContinuousAugmentedDiff(checkpoint=store, consumer="b")
+        assert next(a).sequence_number == 101
+        assert next(b).sequence_number == 200
+        a.commit()
+        b.commit()
+    assert store.load("a") == 101
+    assert store.load("b") == 200
+
+
+def test_prefetch_records_yielded_sequences(make_store):
+    session = Replication(newest=14)
+    store = make_store(commit_every=1)
+    replication = ContinuousOSMChange(
+        session=session, checkpoint=store, prefetch=3, min_interval=0
+    )
+    replication._current_sequence = 10
+    with patch("time.sleep"):
+        assert [next(replication).sequence_number for _ in range(3)] == [10, 11, 12]
+    replication.close()
+    # 13 and 14 may have been prefetched, but were not handed out
+    assert make_store().load("default") == 11
+
+
+def test_commits_before_waiting(make_store):
+    session = Replication(newest=10)
+    store = make_store(commit_every=100, commit_interval=3600)
+    replication = ContinuousOSMChange(session=session, checkpoint=store)
+    replication._current_sequence = 9
+    with patch("time.sleep") as sleep:
+        next(replication)
+        next(replication)
+        session.newest = 11
+        assert make_store().load("default") is None
+        assert next(replication).sequence_number == 11
+    assert sleep.call_count == 1
+    # Caught up after 10: 9 and 10 were committed before waiting for 11
+    assert make_store().load("default") == 10
+    store.close()
@@ -0,0 +1,94 @@
+import io
+import math
+
+import pytest
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff.columns import ACTION_CODES, TYPE_CODES, to_arrays, to_arrow, to_columns
+
+ADIFF = """<osm version="0.6" generator="Overpass API">
+  <meta osm_base="2024-01-01T00:00:00Z"/>
+  <action type="create">
+    <node id="1" lat="1.5" lon="2.5" version="1" changeset="7" uid="3" user="a" timestamp="2024-01-01T00:00:00Z">
+      <tag k="amenity" v="cafe"/><tag k="name" v="Koffie"/>
+    </node>
+  </action>
+  <action type="modify">
+    <old><way id="2" version="1"><nd ref="10"/><nd ref="11"/><tag k="highway" v="track"/></way></old>
+    <new><way id="2" version="2" changeset="8"><nd ref="10"/><nd ref="11"/><tag k="highway" v="residential"/></way></new>
+  </action>
+  <action type="delete">
+    <old><relation id="3" version="4"><tag k="type" v="route"/></relation></old>
+    <new><relation id="3" version="5" changeset="9" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+@pytest.fixture
+def adiff():
+    a = AugmentedDiff()
+    a._parse_stream(io.StringIO(ADIFF))
+    return a
+
+
+def test_to_columns(adiff):
+    columns = adiff.to_columns()
+    assert list(columns["action"]) == [0, 1, 2]
+    assert list(columns["type"]) == [TYPE_CODES[t] for t in "nwr"]
+    assert list(columns["id"]) == [1, 2, 3]
+    assert list(columns["version"]) == [1, 2, 5]
+    assert list(columns["changeset"]) == [7, 8, 9]
+    assert list(columns["uid"]) == [3, -1, -1]
+    assert list(columns["timestamp"]) == [1704067200, -1, -1]
+    assert columns["lat"][0] == 1.5 and columns["lon"][0] == 2.5
+    assert math.isnan(columns["lat"][1])
+    assert columns["user"] == ["a", "", ""]
+    assert list(columns["tag_offsets"]) == [0, 2, 3, 3]
+    assert columns["tag_keys"] == ["amenity", "name", "highway"]
+    assert columns["tag_values"] == ["cafe", "Koffie", "residential"]
+
+
+def test_osmchange_to_columns():
+    osmchange = OSMChange.from_xml_file("tests/data/test_osmchange.xml")
+    columns = osmchange.to_columns()
+    total = len(osmchange.create) + len(osmchange.modify) + len(osmchange.delete)
+    assert len(columns["id"]) == total
+    assert len(columns["tag_offsets"]) == total + 1
+    assert columns["tag_offsets"][-1] == len(columns["tag_keys"])
+    assert list(columns["action"]).count(ACTION_CODES["modify"]) == len(
+        osmchange.modify
+    )
+
+
+def test_to_columns_empty():
+    columns = to_columns([])
+    assert len(columns["id"]) == 0
+    assert list(columns["tag_offsets"]) == [0]
+
+
+def test_to_arrays(adiff):
+    np = pytest.importorskip("numpy")
+    arrays = adiff.to_arrays()
+    assert arrays["id"].dtype == np.int64
+    assert arrays["action"].dtype == np.uint8
+    assert arrays["lat"].dtype == np.float64
+    assert list(arrays["tag_keys"][arrays["tag_offsets"][0] : arrays["tag_offsets"][1]]) == [
+        "amenity",
+        "name",
+    ]
+    columns = adiff.to_columns()
+    arrays = to_arrays(columns)
+    columns["id"][0] = 42
+    assert arrays["id"][0] == 42  # Shares memory with the column
+
+
+def test_to_arrow(adiff):
+    pytest.importorskip("pyarrow")
+    table = adiff.to_arrow()
+    assert table.num_rows == 3
+    assert table.column("id").to_pylist() == [1, 2, 3]
+    assert table.column("tags").to_pylist()[0] == [
+        ("amenity", "cafe"),
+        ("name", "Koffie"),
+    ]
+    assert to_arrow(to_columns([])).num_rows == 0
@@ -0,0 +1,153 @@
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from osmdiff import AugmentedDiff
+from osmdiff.backends import BACKENDS
+from osmdiff.config import PARSER_CONFIG
+from osmdiff.delta import ModifyDelta
+from osmdiff.filters import Filter
+from osmdiff.osm import Node, OSMObject, Way
+
+AVAILABLE = [name for name, backend in BACKENDS.items() if backend.available()]
+
+ADIFF = b"""<osm version="0.6" generator="Overpass API">
+  <action type="create">
+    <node id="1" lat="1.0" lon="2.0" version="1"><tag k="amenity" v="cafe"/></node>
+  </action>
+  <action type="modify">
+    <old><node id="5" lat="50.0" lon="50.0" version="1" changeset="7">
+      <tag k="shop" v="deli"/><tag k="fixme" v="yes"/><tag k="name" v="A"/></node></old>
+    <new><node id="5" lat="50.0" lon="50.0" version="2" changeset="8">
+      <tag k="shop" v="cafe"/><tag k="name" v="A"/><tag k="opening_hours" v="24/7"/></node></new>
+  </action>
+  <action type="modify">
+    <old><node id="6" lat="1.0" lon="2.0" version="3"/></old>
+    <new><node id="6" lat="1.5" lon="2.0" version="4"/></new>
+  </action>
+  <action type="modify">
+    <old><way id="2" version="1">
+      <nd ref="10" lat="1.0" lon="2.0"/><nd ref="11" lat="1.0" lon="3.0"/><nd ref="12" lat="2.0" lon="3.0"/>
+      <tag k="highway" v="track"/></way></old>
+    <new><way id="2" version="2">
+      <nd ref="10" lat="1.0" lon="2.0"/><nd ref="13" lat="1.5" lon="3.0"/><nd ref="12" lat="2.0" lon="3.0"/>
+      <tag k="highway" v="track"/></way></new>
+  </action>
+  <action type="modify">
+    <old><way id="3" version="5"><nd ref="10" lat="1.0" lon="2.0"/><nd ref="11" lat="1.0" lon="3.0"/></way></old>
+    <new><way id="3" version="5"><nd ref="10" lat="1.0" lon="2.0"/><nd ref="11" lat="1.2" lon="3.0"/></way></new>
+  </action>
+  <action type="modify">
+    <old><relation id="4" version="1">
+      <member type="way" ref="2" role="outer"/><member type="node" ref="5" role=""/>
+      <tag k="type" v="multipolygon"/></relation></old>
+    <new><relation id="4" version="2">
+      <member type="way" ref="2" role="outer"/><member type="way" ref="3" role="inner"/>
+      <tag k="type" v="multipolygon"/></relation></new>
+  </action>
+  <action type="delete">
+    <old><node id="9" lat="1.0" lon="2.0" version="1"/></old>
+    <new><node id="9" version="2" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+@pytest.fixture(params=AVAILABLE)
+def backend(request, monkeypatch):
+    monkeypatch.setitem(PARSER_CONFIG, "backend", request.param)
+    return request.param
+
+
+def test_iter_deltas(backend):
+    deltas = {d.id: d for d in AugmentedDiff().iter_deltas(io.BytesIO(ADIFF))}
+    assert sorted(deltas) == [2, 3, 4, 5, 6]
+
+    retagged = deltas[5]
+    assert (retagged.type, retagged.old_version, retagged.new_version) == ("node", 1, 2)
+    assert retagged.changeset == 8
+    assert retagged.tags_added == {"opening_hours": "24/7"}
+    assert retagged.tags_removed == {"fixme": "yes"}
+    assert retagged.tags_changed == {"shop": ("deli", "cafe")}
+    assert retagged.tags_only and not retagged.geometry_only
+
+    moved = deltas[6]
+    assert moved.geometry_only and not moved.retagged
+
+    way = deltas[2]
+    assert way.geometry_only
+    assert way.nodes_added == [13]
+    assert way.nodes_removed == [11]
+
+    indirect = deltas[3]
+    assert indirect.indirect and indirect.geometry_changed
+    assert indirect.nodes_added == indirect.nodes_removed == []
+
+    relation = deltas[4]
+    assert relation.type == "relation"
+    assert relation.geometry_changed and not relation.retagged
+    assert relation.members_added == [("way", 3, "inner")]
+    assert relation.members_removed == [("node", 5, "")]
+
+
+def test_iter_deltas_skips_other_actions(backend):
+    built = []
+    from_attrib = OSMObject._from_attrib.__func__
+
+    def record(cls, tag, attrib):
+        built.append(attrib.get("id"))
+        return from_attrib(cls, tag, attrib)
+
+    with patch.object(OSMObject, "_from_attrib", classmethod(record)):
+        list(AugmentedDiff().iter_deltas(io.BytesIO(ADIFF)))
+    assert "5" in built
+    assert "1" not in built and "9" not in built  # Created and deleted nodes
+
+
+def test_iter_deltas_keeps_diff_filter():
+    adiff = AugmentedDiff(filter=Filter(types=["way"]))
+    assert [d.id for d in adiff.iter_deltas(io.BytesIO(ADIFF))] == [2, 3]
+    adiff = AugmentedDiff(filter=Filter(actions=["create"]))
+    assert list(adiff.iter_deltas(io.BytesIO(ADIFF))) == []
+
+
+def test_deltas_of_parsed_diff():
+    adiff = AugmentedDiff()
+    adiff._parse_stream(io.BytesIO(ADIFF))
+    deltas = adiff.deltas()
+    assert [d.id for d in deltas] == [m["new"].id for m in adiff.modify]
+    assert all(set(m) == {"old", "new"} for m in adiff.modify)
+    streamed = AugmentedDiff().iter_deltas(io.BytesIO(ADIFF))
+    assert [d.to_dict() for d in deltas] == [d.to_dict() for d in streamed]
+    json.dumps([d.to_dict() for d in deltas])
+
+
+def test_shared_tags(monkeypatch):
+    monkeypatch.setitem(PARSER_CONFIG, "share_tags", True)
+    deltas = {d.id: d for d in AugmentedDiff().iter_deltas(io.BytesIO(ADIFF))}
+    assert not deltas[2].retagged
+    assert deltas[5].tags_changed == {"shop": ("deli", "cafe")}
+
+
+def test_materialized_way_nodes():
+    old = Way(
+        nodes=[Node(attribs={"ref": "1", "lon": "0", "lat": "0"})],
+        attribs={"id": "2", "version": "1"},
+    )
+    new = Way(
+        nodes=[
+            Node(attribs={"ref": "1", "lon": "0", "lat": "0"}),
+            Node(attribs={"ref": "2", "lon": "1", "lat": "0"}),
+        ],
+        attribs={"id": "2", "version": "2"},
+    )
+    delta = ModifyDelta.from_versions(old, new)
+    assert delta.geometry_changed
+    assert (delta.nodes_added, delta.nodes_removed) == ([2], [])
+    assert ModifyDelta.from_versions(new, new).geometry_changed is False
+
+
+def test_mismatched_types():
+    with pytest.raises(TypeError):
+        ModifyDelta.from_versions(Node(), Way())
@@ -0,0 +1,168 @@
+import asyncio
+import io
+import os
+import queue
+
+import pytest
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff.dispatch import Dispatcher, Subscription
+from osmdiff.filters import Filter
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "test_osmchange.xml")
+
+ADIFF = b"""<osm version="0.6" generator="Overpass API">
+  <action type="create">
+    <node id="1" lat="1.0" lon="2.0" version="1"><tag k="shop" v="bakery"/></node>
+  </action>
+  <action type="create"><node id="2" lat="40.0" lon="40.0" version="1"/></action>
+  <action type="modify">
+    <old><node id="5" lat="50.0" lon="50.0" version="1"/></old>
+    <new><node id="5" lat="1.5" lon="2.5" version="2"><tag k="shop" v="deli"/></node></new>
+  </action>
+  <action type="delete">
+    <old><relation id="3" version="4"><bounds minlat="10" minlon="10" maxlat="20" maxlon="20"/></relation></old>
+    <new><relation id="3" version="5" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+def augmented_diff(sequence_number=1):
+    adiff = AugmentedDiff(sequence_number=sequence_number)
+    adiff._parse_stream(io.BytesIO(ADIFF))
+    return adiff
+
+
+def ids(changes):
+    return [(action, (new or old).id) for action, old, new in changes]
+
+
+def test_match():
+    dispatcher = Dispatcher()
+    for filter in [
+        Filter(bbox=(0, 0, 3, 3)),
+        Filter(bbox=(49, 49, 51, 51)),
+        Filter(bbox=(0, 0, 60, 60), tags={"shop": "bakery"}),
+        Filter(tags={"shop": None}),
+        Filter(actions=["delete"]),
+        None,
+        Filter(bbox=(100, 0, 101, 1)),
+    ]:
+        dispatcher.subscribe(filter, callback=print)
+    near, far, bakery, shops, deleted, everything, empty = dispatcher.match(
+        augmented_diff()
+    )
+    assert ids(near) == [("create", 1), ("modify", 5)]
+    assert ids(far) == [("modify", 5)]  # Old version of node 5
+    assert ids(bakery) == [("create", 1)]
+    assert ids(shops) == [("create", 1), ("modify", 5)]
+    assert ids(deleted) == [("delete", 3)]
+    assert len(everything) == 4
+    assert empty == []
+
+
+def test_match_osmchange():
+    osmchange = OSMChange.from_xml_file(DATA)
+    dispatcher = Dispatcher()
+    dispatcher.subscribe(Filter(bbox=(-180, -90, 180, 90)), callback=print)
+    dispatcher.subscribe(Filter(types=["way"]), callback=print)
+    dispatcher.subscribe(callback=print)
+    located, ways, everything = dispatcher.match(osmchange)
+    # Only nodes have coordinates in OSMChange files
+    assert located == [
+        (action, obj)
+        for action, obj in everything
+        if obj.osmtype == "n" and obj.attribs.get("lat")
+    ]
+    assert ways == [(action, obj) for action, obj in everything if obj.osmtype == "w"]
+    assert ways and located
+
+
+def test_dispatch_to_callbacks_and_queues():
+    received = []
+    inbox = queue.Queue()
+    dispatcher = Dispatcher()
+    dispatcher.subscribe(
+        Filter(bbox=(0, 0, 3, 3)),
+        callback=lambda diff, changes: received.append((diff, ids(changes))),
+    )
+    london = dispatcher.subscribe(Filter(bbox=(-1, 51, 0, 52)), queue=inbox)
+    amsterdam = dispatcher.subscribe(Filter(bbox=(49, 49, 51, 51)), queue=inbox)
+    adiff = augmented_diff()
+    assert dispatcher.dispatch(adiff) == 2
+    assert received == [(adiff, [("create", 1), ("modify", 5)])]
+    diff, changes = inbox.get_nowait()
+    assert diff is adiff and ids(changes) == [("modify", 5)]
+    assert inbox.empty()  # Nothing in London
+    assert (london.delivered, amsterdam.delivered) == (0, 1)
+
+    dispatcher.unsubscribe(amsterdam)
+    assert dispatcher.dispatch(adiff) == 1
+    assert inbox.empty()
+
+
+def test_failing_subscriber_does_not_stop_others(caplog):
+    def fail(diff, changes):
+        raise RuntimeError("consumer down")
+
+    received = []
+    dispatcher = Dispatcher()
+    failing = dispatcher.subscribe(callback=fail, name="failing")
+    dispatcher.subscribe(callback=lambda diff, changes: received.append(diff))
+    assert dispatcher.dispatch(augmented_diff()) == 1
+    assert len(received) == 1
+    assert failing.errors == 1 and failing.delivered == 0
+    assert "Error delivering diff 1 to failing" in caplog.text
+
+
+def test_run():
+    received = []
+    source = [augmented_diff(n) for n in (1, 2, 3)]
+    dispatcher = Dispatcher(source)
+    dispatcher.subscribe(
+        callback=lambda diff, changes: received.append(diff.sequence_number)
+    )
+    dispatcher.run(limit=2)
+    assert received == [1, 2]
+    dispatcher.run()
+    assert received == [1, 2, 1, 2, 3]
+
+
+def test_arun():
+    class Source:
+        def __init__(self, diffs):
+            self.diffs = iter(diffs)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self.diffs)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    async def run():
+        received = []
+        inbox = asyncio.Queue(maxsize=1)
+
+        async def callback(diff, changes):
+            received.append(diff.sequence_number)
+
+        dispatcher = Dispatcher(Source([augmented_diff(n) for n in (1, 2)]))
+        dispatcher.subscribe(callback=callback)
+        dispatcher.subscribe(Filter(actions=["delete"]), queue=inbox)
+        task = asyncio.ensure_future(dispatcher.arun())
+        first = await inbox.get()
+        second = await inbox.get()
+        await task
+        return received, [first[0].sequence_number, second[0].sequence_number]
+
+    assert asyncio.run(run()) == ([1, 2], [1, 2])
+
+
+def test_subscription_needs_one_target():
+    with pytest.raises(ValueError):
+        Subscription(Filter())
+    with pytest.raises(ValueError):
+        Subscription(Filter(), callback=print, queue=queue.Queue())
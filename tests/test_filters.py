@@ -0,0 +1,168 @@
+import io
+import os
+import pickle
+from unittest.mock import patch
+
+import pytest
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff.backends import BACKENDS, get_backend
+from osmdiff.config import PARSER_CONFIG
+from osmdiff.filters import Filter
+from osmdiff.osm import Node, OSMObject, Way
+
+AVAILABLE = [name for name, backend in BACKENDS.items() if backend.available()]
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "test_osmchange.xml")
+
+ADIFF = b"""<osm version="0.6" generator="Overpass API">
+  <meta osm_base="2024-01-01T00:00:00Z"/>
+  <action type="create">
+    <node id="1" lat="1.0" lon="2.0" version="1"><tag k="amenity" v="cafe"/></node>
+    <node id="4" lat="50.0" lon="50.0" version="1"><tag k="amenity" v="pub"/></node>
+  </action>
+  <action type="modify">
+    <old><node id="5" lat="50.0" lon="50.0" version="1"/></old>
+    <new><node id="5" lat="1.5" lon="2.5" version="2"/></new>
+  </action>
+  <action type="modify">
+    <old><way id="2" version="1"><nd ref="10" lat="1.0" lon="2.0"/><tag k="highway" v="track"/></way></old>
+    <new><way id="2" version="2"><nd ref="10" lat="1.0" lon="2.0"/><tag k="highway" v="residential"/></way></new>
+  </action>
+  <action type="delete">
+    <old><relation id="3" version="4"><bounds minlat="0" minlon="0" maxlat="60" maxlon="60"/><tag k="type" v="route"/></relation></old>
+    <new><relation id="3" version="5" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+@pytest.fixture(params=AVAILABLE)
+def backend(request, monkeypatch):
+    monkeypatch.setitem(PARSER_CONFIG, "backend", request.param)
+    return request.param
+
+
+def parse(adiff):
+    adiff._parse_stream(io.BytesIO(ADIFF))
+    return (
+        [n.id for n in adiff.create],
+        [m["new"].id for m in adiff.modify],
+        [d["old"].id for d in adiff.delete],
+    )
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"bbox": (0, 0, 3, 3)},
+        {"tags": {"highway": None}},
+        {"tags": {"amenity": ["pub", "bar"]}},
+        {"tags": {"highway": lambda v: v.startswith("res")}, "types": ["w"]},
+        {"types": ["node"], "actions": ["create", "delete"]},
+        {"bbox": (2.5, 1.5, 2.6, 1.6), "tags": {"amenity": "cafe"}},
+    ],
+)
+def test_osmchange_matches_post_filter(backend, spec):
+    full = OSMChange.from_xml_file(DATA)
+    filter = Filter(**spec)
+    filtered = OSMChange.from_xml_file(DATA, filter=filter)
+    for action in ("create", "modify", "delete"):
+        expected = [
+            o.attribs
+            for o in getattr(full, action)
+            if filter.matches(o) and not filter.rejects(action, type(o).__name__.lower())
+        ]
+        assert [o.attribs for o in getattr(filtered, action)] == expected
+
+
+def test_osmchange_streaming(backend):
+    filter = Filter(types=["way"], tags={"highway": None})
+    osmchange = OSMChange.from_xml_file(DATA, stream=True, filter=filter)
+    changes = list(osmchange.iter_changes())
+    assert changes
+    assert all(isinstance(o, Way) and "highway" in o.tags for _, o in changes)
+
+
+def test_augmented_diff(backend):
+    assert parse(AugmentedDiff()) == ([1, 4], [5, 2], [3])
+    assert parse(AugmentedDiff(filter=Filter(bbox=(0, 0, 3, 3)))) == ([1], [5, 2], [3])
+    # Bbox of the diff itself
+    assert parse(AugmentedDiff(minlon=40, minlat=40, maxlon=60, maxlat=60)) == (
+        [4],
+        [5],
+        [3],
+    )
+    adiff = AugmentedDiff(filter=Filter(tags={"highway": "track"}))
+    assert parse(adiff) == ([], [2], [])
+    assert adiff.modify[0]["new"].tags == {"highway": "residential"}
+    assert parse(AugmentedDiff(filter=Filter(actions=["delete"]))) == ([], [], [3])
+    assert parse(AugmentedDiff(filter=Filter(types=["n"]))) == ([1, 4], [5], [])
+
+
+def test_rejected_objects_not_built(monkeypatch):
+    monkeypatch.setitem(PARSER_CONFIG, "backend", "expat")
+    built = []
+    original = OSMObject._from_attrib.__func__
+
+    def from_attrib(cls, tag, attrib):
+        built.append(tag)
+        return original(cls, tag, attrib)
+
+    with patch.object(OSMObject, "_from_attrib", classmethod(from_attrib)):
+        filter = Filter(tags={"amenity": "pub"}, types=["node"])
+        osmchange = OSMChange.from_xml_file(DATA, filter=filter)
+    assert built == [] and osmchange.create == []
+
+    with patch.object(OSMObject, "_from_attrib", classmethod(from_attrib)):
+        adiff = AugmentedDiff(filter=Filter(bbox=(40, 40, 60, 60), types=["node"]))
+        parse(adiff)
+    assert built == ["node", "node", "node"]  # The pub, old and new of node 5
+
+
+def test_buffered_object_rebuilt(backend):
+    events = get_backend()(Filter(tags={"a": "b"})).parse(
+        [
+            b"<osmChange><create><node id='1' lat='1' lon='2'><tag k='a' v='b'/></node>",
+            b"<node id='2'><tag k='a' v='c'/></node>",
+            b"<relation id='3'><member type='node' ref='1' role=''/><tag k='a' v='b'/>",
+            b"</relation></create></osmChange>",
+        ]
+    )
+    objects = [e[1] for e in events if e[0] == "object"]
+    assert [o.id for o in objects] == [1, 3]
+    assert isinstance(objects[0], Node) and objects[0].lat == 1.0
+    assert objects[1].members[0].attribs["ref"] == "1"
+
+
+def test_filter_spec():
+    with pytest.raises(ValueError):
+        Filter(types=["changeset"])
+    with pytest.raises(ValueError):
+        Filter(actions=["update"])
+    with pytest.raises(ValueError):
+        Filter(bbox=(10, 0, 5, 5))
+    with pytest.raises(TypeError):
+        Filter(tags={"a": 1})
+    filter = Filter(tags={"a": None})
+    assert filter.with_bbox((0, 0, 1, 1)).bbox == (0.0, 0.0, 1.0, 1.0)
+    assert Filter(bbox=(0, 0, 2, 2)).with_bbox((0, 0, 1, 1)).bbox[2] == 2.0
+    assert repr(Filter(types=["n"], actions=["create"])) == (
+        "Filter(types=['node'], actions=['create'])"
+    )
+    assert not filter.matches(None)
+    # No coordinates: never in a bbox
+    assert not Filter(bbox=(0, 0, 1, 1)).matches(Way(attribs={"id": "1"}))
+
+
+def starts_with_x(value):
+    return value.startswith("x")
+
+
+def test_filter_pickles():
+    filter = Filter(
+        bbox=(0, 0, 1, 1), tags={"a": starts_with_x, "b": "c", "d": ["e"]}
+    )
+    copy = pickle.loads(pickle.dumps(filter))
+    assert copy.test({"a": "x", "b": "c", "d": "e"}, [("0.5", "0.5")])
+    assert not copy.test({"a": "y", "b": "c", "d": "e"}, [("0.5", "0.5")])
+    assert not copy.test({"a": "x", "b": "c", "d": "f"}, [("0.5", "0.5")])
@@ -0,0 +1,142 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+from osmdiff import OSMChange
+from osmdiff.index import DiffIndex
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "test_osmchange.xml")
+
+ADIFF = b"""<?xml version='1.0'?>
+<osm version="0.6" generator="Overpass API">
+  <meta osm_base="2024-01-01T00:00:00Z"/>
+  <action type="create">
+    <node id="1" version="1" lat="1.0" lon="2.0"/>
+  </action>
+  <action type="modify">
+    <old><way id="2" version="1"><nd ref="1"/><tag k="highway" v="track"/></way></old>
+    <new><way id="2" version="2"><nd ref="1"/><tag k="highway" v="residential"/></way  ></new>
+  </action>
+  <action type="delete">
+    <old><node id="3" version="4" lat="1.0" lon="2.0"><tag k="a" v="b"/></node></old>
+    <new><node id="3" version="5" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+@pytest.fixture
+def osc(tmp_path):
+    path = tmp_path / "diff.osc"
+    shutil.copy(DATA, path)
+    return path
+
+
+def test_lookup_osmchange(osc):
+    expected = [
+        (action, obj.attribs)
+        for action in ("create", "modify", "delete")
+        for obj in getattr(OSMChange.from_xml_file(DATA), action)
+        if obj.osmtype == "w" and obj.id == 4332477
+    ]
+    with DiffIndex(osc) as index:
+        assert os.path.exists(str(osc) + ".idx")
+        found = index.lookup("way", 4332477)
+        assert [(action, way.attribs) for action, way in found] == expected
+        assert len(expected) == 2
+        assert index.lookup("w", 4332477)[0][1].tags == found[0][1].tags
+        assert index.lookup("node", 4332477) == []
+        assert len(index) == 4751
+
+
+def test_lookup_augmented_diff(tmp_path):
+    path = tmp_path / "diff.adiff"
+    path.write_bytes(ADIFF)
+    with DiffIndex(path) as index:
+        [(action, old, new)] = index.lookup("way", 2)
+        assert action == "modify"
+        assert old.tags == {"highway": "track"}
+        assert new.version == 2
+        [(action, old, new)] = index.lookup("node", 3)
+        assert action == "delete" and old.version == 4 and new.version == 5
+        [(action, old, new)] = index.lookup("node", 1)
+        assert action == "create" and old is None and new.lat == 1.0
+        assert len(index) == 3
+
+
+def test_lookup_action_with_several_objects(tmp_path):
+    path = tmp_path / "diff.adiff"
+    path.write_bytes(
+        b'<osm version="0.6"><action type="create">'
+        b'<node id="1" version="1" lat="1.0" lon="2.0"/>'
+        b'<node id="2" version="1" lat="3.0" lon="4.0"/>'
+        b'<way id="1" version="1"><nd ref="1"/><nd ref="2"/></way>'
+        b"</action></osm>"
+    )
+    with DiffIndex(path) as index:
+        [(action, old, new)] = index.lookup("node", 1)
+        assert (action, new.osmtype, new.id, new.lat) == ("create", "n", 1, 1.0)
+        [(_, _, new)] = index.lookup("node", 2)
+        assert (new.id, new.lat) == (2, 3.0)
+        [(_, _, new)] = index.lookup("way", 1)
+        assert new.osmtype == "w"
+        assert index.lookup("relation", 1) == []
+
+
+def test_index_reused_and_rebuilt(osc, tmp_path):
+    index_path = str(tmp_path / "custom.idx")
+    DiffIndex(osc, index_path).close()
+    mtime = os.stat(index_path).st_mtime_ns
+    DiffIndex(osc, index_path).close()
+    assert os.stat(index_path).st_mtime_ns == mtime
+
+    osc.write_bytes(
+        b"<osmChange><create><node id='5' version='1' lat='1' lon='2'/></create></osmChange>"
+    )
+    with DiffIndex(osc, index_path) as index:
+        assert len(index) == 1
+        [(action, node)] = index.lookup("node", 5)
+        assert action == "create" and node.version == 1
+
+
+def test_errors(tmp_path):
+    path = tmp_path / "diff.osc.gz"
+    with open(DATA, "rb") as fh:
+        path.write_bytes(gzip.compress(fh.read()))
+    with pytest.raises(ValueError, match="gzip"):
+        DiffIndex(path)
+    path = tmp_path / "diff.osc"
+    path.write_bytes(b"<osmChange/>")
+    with DiffIndex(path) as index:
+        with pytest.raises(ValueError):
+            index.lookup("changeset", 1)
+
+
+@pytest.mark.parametrize(
+    "content, message",
+    [
+        (b"", "empty"),
+        (b"id,version\n1,2\n", "not a valid XML diff"),
+        (b"<?xml version='1.0'?>\n", "not a valid XML diff"),
+        (b"<osmChange><create>", "not a valid XML diff"),
+    ],
+)
+def test_invalid_diff_file(tmp_path, content, message):
+    path = tmp_path / "diff.osc"
+    path.write_bytes(content)
+    with pytest.raises(ValueError, match=message):
+        DiffIndex(path)
+    assert not os.path.exists(str(path) + ".idx")
+
+
+def test_fragment_boundaries(tmp_path):
+    path = tmp_path / "diff.osc"
+    path.write_bytes(
+        b"<osmChange><modify><node id='1' version='2'><tag k='a' v='b'/></node>"
+        b"<node id='2' version='1'></node><node id='3'/></modify></osmChange>"
+    )
+    with DiffIndex(path) as index:
+        assert index.lookup("node", 1)[0][1].tags == {"a": "b"}
+        assert index.lookup("node", 2)[0][1].version == 1
+        assert index.lookup("node", 3)[0][1].id == 3
@@ -1,3 +1,6 @@
+import xml.etree.ElementTree as ET
+
+import pytest
 from osmdiff import Node
 from osmdiff.osm import OSMObject
 from typing_extensions import assert_type
@@ -14,6 +17,7 @@ def test_node_init():
     assert node.lat == 0.0
     assert node.lon == 0.0
 
+
 def test_node_geo_interface_and_equality():
     node1 = Node(attribs={"lat": 10.0, "lon": 20.0})
     node2 = Node(attribs={"lat": 10.0, "lon": 20.0})
@@ -24,8 +28,8 @@ def test_node_geo_interface_and_equality():
     assert node1 == node2
     assert node1 != node3
 
+
 def test_node_from_xml():
-    import xml.etree.ElementTree as ET
     xml = '<node id="1" lat="10.0" lon="20.0"><tag k="name" v="TestNode"/></node>'
     elem = ET.fromstring(xml)
     node = Node.from_xml(elem)
@@ -33,3 +37,29 @@ def test_node_from_xml():
     assert node.attribs["id"] == "1"
     assert node.attribs["lat"] == "10.0"
     assert node.tags["name"] == "TestNode"
+
+
+def test_node_coords_validated_once():
+    node = Node.from_xml(ET.fromstring('<node id="1" lat="10.5" lon="20.5"/>'))
+    assert node._checked is False
+    assert node.lon == 20.5
+    assert node._checked
+    assert node.lat == 10.5
+    node.lat = 95
+    with pytest.raises(ValueError):
+        node.lat
+
+
+def test_node_coords_follow_attribs():
+    node = Node(attribs={"lat": "10.0", "lon": "20.0"})
+    assert node.lat == 10.0
+    node.attribs["lat"] = "11.0"
+    assert node.lat == 11.0
+
+
+def test_node_coords_after_attribs_built():
+    node = Node.from_xml(ET.fromstring('<node id="1" lat="10.5" lon="20.5"/>'))
+    assert node.lat == 10.5
+    node.attribs["lon"] = "-30.5"
+    assert node.lon == -30.5
+    assert node.lat == 10.5
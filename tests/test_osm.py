@@ -1,5 +1,7 @@
+import pickle
 import pytest
 from osmdiff.osm.osm import Member, OSMObject, Way, Relation, Node
+from osmdiff import OSMChange
 
 
 def test_osmobject_init_defaults():
@@ -219,3 +221,75 @@ def test_member_class():
         "geometry": None,
         "properties": {"type": "node", "ref": 123, "role": "point"},
     }
+
+
+def test_osmobject_typed_fields_from_xml():
+    xml = """<node id="1" version="3" changeset="7" uid="9" user="someone" timestamp="2017-11-10T13:49:50Z" visible="true" lat="10.5" lon="20.25"/>"""
+    node = OSMObject.from_xml(ET.fromstring(xml))
+    assert node.osmtype == "n"
+    assert (node.id, node.version, node.changeset, node.uid) == (1, 3, 7, 9)
+    assert node.user == "someone"
+    assert node.timestamp == 1510321790
+    assert node.lat == 10.5 and node.lon == 20.25
+    assert node.attribs == {
+        "id": "1",
+        "version": "3",
+        "changeset": "7",
+        "uid": "9",
+        "user": "someone",
+        "timestamp": "2017-11-10T13:49:50Z",
+        "visible": "true",
+        "lat": "10.5",
+        "lon": "20.25",
+    }
+
+
+def test_node_attribs_keep_coordinate_strings():
+    node = OSMObject._from_attrib("node", {"id": "1", "lat": "51.5000000", "lon": "-0.1250000"})
+    assert node._extra is None  # Written like OSM does, nothing kept
+    assert (node.attribs["lat"], node.attribs["lon"]) == ("51.5000000", "-0.1250000")
+
+    node = OSMObject._from_attrib("node", {"id": "1", "lat": "51.5", "lon": "-0.125"})
+    assert (node.lat, node.lon) == (51.5, -0.125)
+    assert node._get_attrib("lat") == "51.5"
+    node.lon = 2
+    assert node.attribs == {"id": "1", "lat": "51.5", "lon": "2.0000000"}
+
+
+def test_osmobject_typed_fields_follow_attribs():
+    obj = OSMObject(attribs={"id": "42"})
+    assert obj.id == 42
+    obj.attribs["id"] = "43"
+    assert obj.id == 43
+    obj.version = 2
+    assert obj.attribs == {"id": "43", "version": "2"}
+    obj.version = None
+    assert "version" not in obj.attribs
+
+
+def test_osmobject_unparsable_attribute_kept_as_string():
+    obj = OSMObject._from_attrib("way", {"id": "1", "timestamp": "yesterday"})
+    assert obj.timestamp is None
+    assert obj.attribs == {"id": "1", "timestamp": "yesterday"}
+
+
+def test_osmobject_unparsable_attribs_read_as_none(tmp_path):
+    node = Node(attribs={"id": "x", "version": "x", "timestamp": "yesterday", "lat": "n/a"})
+    assert (node.id, node.version, node.timestamp) == (None, None, None)
+    node.attribs["version"] = "3"
+    assert node.version == 3
+    osmchange = OSMChange()
+    osmchange.create = [node]
+    columns = osmchange.to_columns()
+    assert list(columns["version"]) == [3]
+    osmchange.dump(tmp_path / "osc.bin")
+    assert OSMChange.load(tmp_path / "osc.bin").create[0].attribs == node.attribs
+
+
+def test_osmobject_accepts_arbitrary_attributes():
+    node = OSMObject._from_attrib("node", {"id": "1", "lat": "1.5", "lon": "2.5"})
+    node.note = "checked"
+    assert node.note == "checked"
+    copy = pickle.loads(pickle.dumps(node))
+    assert copy.note == "checked"
+    assert (copy.id, copy.lat, copy.lon) == (1, 1.5, 2.5)
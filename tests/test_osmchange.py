@@ -29,7 +29,7 @@ class TestOSMChange:
         osm_change.sequence_number = "12345"
         assert osm_change.sequence_number == 12345
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
     def test_read_changeset_from_xml_file(self, mock_get, osmchange_file_path):
         """Test initializing from an XML object with mocked response"""
         # Mock the response if testing remote file
@@ -63,32 +63,48 @@ class TestOSMChange:
             assert hasattr(node, 'lat')
             assert hasattr(node, 'lon')
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
     def test_get_state_success(self, mock_get):
-        # Simulate a valid state response with sequenceNumber
-        xml = b'''<osm><state><sequenceNumber>123</sequenceNumber></state></osm>'''
+        # Simulate a valid state.txt with sequenceNumber
+        state = b"#Mon Jan 01 00:01:02 UTC 2024\nsequenceNumber=123\ntimestamp=2024-01-01T00\\:01\\:00Z\n"
         mock_get.return_value.status_code = 200
-        mock_get.return_value.content = xml
-        oc = OSMChange()
+        mock_get.return_value.content = state
+        oc = OSMChange(frequency="hour")
         assert oc.get_state() is True
         assert oc.sequence_number == 123
+        assert mock_get.call_args[0][0] == (
+            "https://planet.openstreetmap.org/replication/hour/state.txt"
+        )
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
     def test_get_state_missing_seq(self, mock_get):
-        # Simulate state response without sequenceNumber
-        xml = b'''<osm><state></state></osm>'''
+        # Simulate state.txt without sequenceNumber
         mock_get.return_value.status_code = 200
-        mock_get.return_value.content = xml
+        mock_get.return_value.content = b"timestamp=2024-01-01T00\\:01\\:00Z\n"
         oc = OSMChange()
         assert oc.get_state() is False
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
+    def test_get_state_then_retrieve(self, mock_get):
+        state = MagicMock(status_code=200, content=b"sequenceNumber=5890123\n")
+        gzipped = gzip.compress(b'<osmChange></osmChange>')
+        diff = MagicMock(status_code=200, content=gzipped, raw=io.BytesIO(gzipped))
+        mock_get.side_effect = [state, diff]
+        oc = OSMChange()
+        assert oc.get_state() is True
+        assert oc.retrieve() == 200
+        assert [c[0][0] for c in mock_get.call_args_list] == [
+            "https://planet.openstreetmap.org/replication/minute/state.txt",
+            "https://planet.openstreetmap.org/replication/minute/005/890/123.osc.gz",
+        ]
+
+    @patch('requests.Session.get')
     def test_get_state_fail(self, mock_get):
         mock_get.return_value.status_code = 404
         oc = OSMChange()
         assert oc.get_state() is False
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
     def test_retrieve_non_200(self, mock_get):
         oc = OSMChange(sequence_number=1)
         mock_get.return_value.status_code = 404
@@ -96,7 +112,7 @@ class TestOSMChange:
         status = oc.retrieve()
         assert status == 404
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
     def test_retrieve_gzip(self, mock_get):
         # Simulate a gzip-compressed XML response
         xml = b'<osmChange></osmChange>'
@@ -108,13 +124,13 @@ class TestOSMChange:
         status = oc.retrieve()
         assert status == 200
 
-    @patch('osmdiff.osmchange.requests.get', side_effect=ConnectionError)
+    @patch('requests.Session.get', side_effect=ConnectionError)
     def test_retrieve_connection_error(self, mock_get):
         oc = OSMChange(sequence_number=1)
         status = oc.retrieve()
         assert status == 0
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
     def test_retrieve_clear_cache(self, mock_get):
         oc = OSMChange(sequence_number=1)
         oc.create = [1]
@@ -195,7 +211,7 @@ class TestOSMChange:
             oc.retrieve()
         assert "invalid sequence number" in str(exc.value)
 
-    @patch('osmdiff.osmchange.requests.get')
+    @patch('requests.Session.get')
     def test_retrieve_non_gzip_xml(self, mock_get):
         xml = b'<osmChange></osmChange>'
         mock_get.return_value.status_code = 200
@@ -204,3 +220,90 @@ class TestOSMChange:
         oc = OSMChange(sequence_number=1)
         status = oc.retrieve()
         assert status == 200
+
+    def test_iter_changes_from_xml_file(self, osmchange_file_path):
+        "Streaming from a file yields the same objects as eager parsing"
+        eager = OSMChange.from_xml_file(osmchange_file_path)
+        streaming = OSMChange.from_xml_file(osmchange_file_path, stream=True)
+        assert streaming.create == []
+
+        counts = {"create": 0, "modify": 0, "delete": 0}
+        first = {}
+        for action, obj in streaming.iter_changes():
+            assert isinstance(obj, (Node, Way, Relation))
+            counts[action] += 1
+            first.setdefault(action, obj)
+
+        assert counts["create"] == len(eager.create)
+        assert counts["modify"] == len(eager.modify)
+        assert counts["delete"] == len(eager.delete)
+        assert first["modify"].attribs == eager.modify[0].attribs
+        assert first["modify"].tags == eager.modify[0].tags
+        assert streaming.create == []
+
+    def test_iter_changes_clears_elements(self):
+        "Objects are removed from the tree once they have been yielded"
+        import xml.etree.ElementTree as ET
+
+        xml = b"""<osmChange version="0.6">
+        <create><node id="1" lat="1" lon="1"/><node id="2" lat="2" lon="2"/></create>
+        <modify><way id="3"><nd ref="1"/><nd ref="2"/><tag k="a" v="b"/></way></modify>
+        </osmChange>"""
+        events = list(ET.iterparse(io.BytesIO(xml), events=("start", "end")))
+        root = events[0][1]
+        changes = list(OSMChange().iter_changes(iter(events)))
+        assert [(a, o.attribs["id"]) for a, o in changes] == [
+            ("create", "1"),
+            ("create", "2"),
+            ("modify", "3"),
+        ]
+        assert changes[2][1].tags == {"a": "b"}
+        assert len(root) == 0
+
+    def test_from_xml_end_events_only(self):
+        "Event streams without start events are still parsed per action"
+        import xml.etree.ElementTree as ET
+
+        xml = b"""<osmChange><delete><node id="1" lat="1" lon="1"/></delete></osmChange>"""
+        oc = OSMChange.from_xml(ET.iterparse(io.BytesIO(xml)))
+        assert len(oc.delete) == 1
+
+    def test_iter_changes_without_pending_source(self):
+        oc = OSMChange()
+        with pytest.raises(Exception, match="stream=True"):
+            next(oc.iter_changes())
+
+    @patch('requests.Session.get')
+    def test_retrieve_stream(self, mock_get):
+        xml = b'<osmChange><create><node id="1" lat="1" lon="1"/></create></osmChange>'
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = xml
+        mock_get.return_value.raw = io.BytesIO(xml)
+        oc = OSMChange(sequence_number=1)
+        assert oc.retrieve(stream=True) == 200
+        assert oc.create == []
+        changes = list(oc.iter_changes())
+        assert len(changes) == 1 and changes[0][0] == "create"
+        mock_get.return_value.close.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_retrieve_gzip_streams_body(self, mock_get, osmchange_file_path):
+        "Gzipped bodies are decompressed from the raw stream, not from content"
+        with open(osmchange_file_path, "rb") as fh:
+            gzipped = gzip.compress(fh.read())
+
+        class StreamingResponse:
+            status_code = 200
+            raw = io.BytesIO(gzipped)
+
+            @property
+            def content(self):
+                raise AssertionError("response body must not be buffered")
+
+        mock_get.return_value = StreamingResponse()
+        oc = OSMChange(sequence_number=1)
+        assert oc.retrieve() == 200
+        expected = OSMChange.from_xml_file(osmchange_file_path)
+        assert len(oc.create) == len(expected.create)
+        assert len(oc.modify) == len(expected.modify)
+        assert len(oc.delete) == len(expected.delete)
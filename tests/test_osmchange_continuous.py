@@ -0,0 +1,105 @@
+import gzip
+import io
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from osmdiff import ContinuousOSMChange, OSMChange
+from osmdiff.osmchange import parse_state
+
+with open("tests/data/test_osmchange.xml", "rb") as fh:
+    OSC = gzip.compress(fh.read())
+
+STATE = b"""#Mon Jan 01 00:01:02 UTC 2024\r
+sequenceNumber=5890002\r
+timestamp=2024-01-01T00\\:01\\:00Z\r
+"""
+
+
+def response(status, content=b""):
+    r = MagicMock()
+    r.status_code = status
+    r.content = content
+    r.raw = io.BytesIO(content)
+    if status != 200:
+        r.raise_for_status.side_effect = Exception(f"HTTP {status}")
+    return r
+
+
+class Replication:
+    """Session serving replication files, the newest sequence is settable."""
+
+    def __init__(self, newest, failures=()):
+        self.newest = newest
+        self.failures = list(failures)
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if url.endswith("state.txt"):
+            return response(200, b"sequenceNumber=%d\n" % self.newest)
+        if url in self.failures:
+            self.failures.remove(url)
+            return response(503)
+        return response(200, OSC)
+
+
+def test_parse_state():
+    assert parse_state(STATE) == {
+        "sequence_number": 5890002,
+        "timestamp": datetime(2024, 1, 1, 0, 1, tzinfo=timezone.utc),
+    }
+    assert parse_state(b"sequenceNumber=12\n") == {
+        "sequence_number": 12,
+        "timestamp": None,
+    }
+    with pytest.raises(ValueError):
+        parse_state(b"<html>Not found</html>")
+    with pytest.raises(ValueError):
+        parse_state(b"sequenceNumber=x\n")
+
+
+def test_follows_replication():
+    session = Replication(newest=5890002)
+    expected = OSMChange.from_xml_file("tests/data/test_osmchange.xml")
+    continuous = ContinuousOSMChange(
+        url="https://example.com/replication", frequency="hour", session=session
+    )
+    with patch("time.sleep") as sleep:
+        first = next(continuous)
+        session.newest = 5890004
+        rest = [next(continuous), next(continuous)]
+    assert [d.sequence_number for d in [first] + rest] == [5890002, 5890003, 5890004]
+    assert all(isinstance(d, OSMChange) and d.frequency == "hour" for d in rest)
+    assert len(first.create) == len(expected.create)
+    assert len(rest[1].modify) == len(expected.modify)
+    assert session.urls == [
+        "https://example.com/replication/hour/state.txt",
+        "https://example.com/replication/hour/005/890/002.osc.gz",
+        "https://example.com/replication/hour/state.txt",
+        "https://example.com/replication/hour/005/890/003.osc.gz",
+        "https://example.com/replication/hour/005/890/004.osc.gz",
+    ]
+    assert sleep.call_count == 1
+    assert continuous.lag == 0
+
+
+def test_prefetch_retries_failed_sequence():
+    failed = "https://planet.openstreetmap.org/replication/minute/000/000/012.osc.gz"
+    session = Replication(newest=14, failures=[failed])
+    continuous = ContinuousOSMChange(
+        session=session, min_interval=0, max_interval=0, prefetch=2
+    )
+    continuous._current_sequence = 10
+    with patch("time.sleep"):
+        diffs = [next(continuous) for _ in range(5)]
+    continuous.close()
+    assert [d.sequence_number for d in diffs] == [10, 11, 12, 13, 14]
+    assert all(d.create for d in diffs)
+    assert session.urls.count(failed) == 2
+
+
+def test_invalid_frequency():
+    with pytest.raises(ValueError):
+        ContinuousOSMChange(frequency="week")
@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from osmdiff import AugmentedDiff, ContinuousAugmentedDiff
+from osmdiff.schedule import PollScheduler
+
+
+def published(n, delay=20.0, period=60.0):
+    return n * period + delay
+
+
+def run(scheduler, checks, delay=20.0, period=60.0, timestamps=False, start=130.0):
+    """Check the state of a server publishing sequence n at n * period + delay.
+
+    Returns the seconds each sequence took to be noticed, and the check times.
+    """
+    now, known = start, None
+    latencies, times = [], []
+    for _ in range(checks):
+        n = int((now - delay) // period)
+        state = {"sequence_number": n, "timestamp": None}
+        if timestamps:
+            state["timestamp"] = datetime.fromtimestamp(n * period, timezone.utc)
+        scheduler.observe(state, now)
+        if known is not None:
+            latencies += [now - published(s, delay, period) for s in range(known + 1, n + 1)]
+        known = n
+        times.append(now)
+        now += scheduler.delay(now)
+    return latencies, times
+
+
+def test_learns_publish_time():
+    scheduler = PollScheduler()
+    scheduler._random.seed(0)
+    latencies, times = run(scheduler, 300)
+    hours = (times[-1] - times[0]) / 3600
+    # Once in step: just after each publish, with few extra checks
+    assert sum(latencies[-100:]) / 100 < 4
+    assert max(latencies[-100:]) < 10
+    assert len(times) / hours < 90
+    assert scheduler.period == pytest.approx(60, abs=0.5)
+    assert scheduler.predict() == pytest.approx(
+        published(scheduler.sequence_number + 1), abs=4
+    )
+
+
+@pytest.mark.parametrize("period", [30.0, 75.0])
+def test_learns_period(period):
+    scheduler = PollScheduler(period=60)
+    scheduler._random.seed(0)
+    latencies, _ = run(scheduler, 400, period=period)
+    assert scheduler.period == pytest.approx(period, abs=0.5)
+    assert sum(latencies[-50:]) / 50 < 5
+
+
+def test_period_from_timestamps():
+    scheduler = PollScheduler(period=50, jitter=0)
+    run(scheduler, 40, period=60, timestamps=True)
+    assert scheduler.period == 60
+
+
+def test_retries_and_backoff():
+    scheduler = PollScheduler(retry=2, max_interval=20)
+    assert scheduler.delay(0) == 0
+    scheduler.observe({"sequence_number": 1, "timestamp": None}, now=100)
+    # Publish time unknown yet: short waits
+    assert scheduler.delay(100) == 2
+    scheduler.observe({"sequence_number": 1, "timestamp": None}, now=102)
+    assert scheduler.delay(102) == 2
+    scheduler.observe({"sequence_number": 1, "timestamp": None}, now=104)
+    assert scheduler.delay(104) == 4
+    scheduler.observe(None, now=106)
+    scheduler.observe(None, now=108)
+    scheduler.observe(None, now=112)
+    assert scheduler.delay(112) == 8
+    for i in range(5):
+        scheduler.observe(None, now=120)
+    assert scheduler.delay(120) == 20
+    assert scheduler.delay() == 0
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        PollScheduler(period=0)
+    with pytest.raises(ValueError):
+        PollScheduler(jitter=-1)
+
+
+def test_continuous_waits_for_scheduler():
+    scheduler = PollScheduler()
+    states = [{"sequence_number": n, "timestamp": None} for n in (10, 10, 11)]
+    with (
+        patch.object(AugmentedDiff, "get_state", side_effect=states),
+        patch.object(AugmentedDiff, "retrieve", return_value=200),
+        patch.object(PollScheduler, "delay", side_effect=[0, 7, 5]) as delay,
+        patch("time.sleep") as sleep,
+    ):
+        fetcher = ContinuousAugmentedDiff(min_interval=30, scheduler=scheduler)
+        assert next(fetcher).sequence_number == 10
+        assert next(fetcher).sequence_number == 11
+    assert [c[0][0] for c in sleep.call_args_list] == [7, 5]
+    assert delay.call_count == 3
+    assert scheduler.sequence_number == 11
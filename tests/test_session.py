@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from osmdiff import AugmentedDiff, ContinuousAugmentedDiff, OSMChange
+from osmdiff import session as shared
+from osmdiff.config import DEFAULT_HEADERS
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_session():
+    yield
+    shared.set_session(None)
+
+
+def test_create_session():
+    session = shared.create_session(pool_maxsize=3)
+    assert session.headers["User-Agent"] == DEFAULT_HEADERS["User-Agent"]
+    assert session.headers["Accept-Encoding"] == "gzip, deflate"
+    adapter = session.get_adapter("https://overpass-api.de/")
+    assert adapter._pool_maxsize == 3
+    assert session.get_adapter("http://example.com/") is adapter
+
+
+def test_get_session_is_shared():
+    assert shared.get_session() is shared.get_session()
+    replacement = shared.create_session()
+    shared.set_session(replacement)
+    assert shared.get_session() is replacement
+
+
+def test_injected_session_used_for_augmenteddiff():
+    session = MagicMock()
+    session.get.return_value.status_code = 200
+    session.get.return_value.text = "42"
+    session.get.return_value.raw = MagicMock(read=MagicMock(side_effect=[b"<osm/>", b""]))
+    adiff = AugmentedDiff(sequence_number=1, session=session)
+    assert adiff.retrieve() == 200
+    assert AugmentedDiff.get_state(session=session)["sequence_number"] == 42
+    assert session.get.call_count == 2
+
+
+def test_injected_session_used_for_osmchange():
+    session = MagicMock()
+    session.get.return_value.status_code = 404
+    osmchange = OSMChange(sequence_number=1, session=session)
+    assert osmchange.get_state() is False
+    assert osmchange.retrieve() == 404
+    assert session.get.call_count == 2
+
+
+def test_continuous_passes_session_to_diffs():
+    session = MagicMock()
+    continuous = ContinuousAugmentedDiff(session=session)
+    continuous._current_sequence = 5
+    assert continuous._new_diff().session is session
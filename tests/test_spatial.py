@@ -0,0 +1,100 @@
+import io
+import os
+import random
+
+import pytest
+
+from osmdiff import AugmentedDiff, OSMChange
+from osmdiff.osm import Node, Relation, Way
+from osmdiff.spatial import SpatialIndex, envelope
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "test_osmchange.xml")
+
+ADIFF = b"""<osm version="0.6" generator="Overpass API">
+  <action type="create"><node id="1" lat="1.0" lon="2.0" version="1"/></action>
+  <action type="modify">
+    <old><node id="5" lat="50.0" lon="50.0" version="1"/></old>
+    <new><node id="5" lat="1.5" lon="2.5" version="2"/></new>
+  </action>
+  <action type="delete">
+    <old><relation id="3" version="4"><bounds minlat="10" minlon="10" maxlat="20" maxlon="20"/></relation></old>
+    <new><relation id="3" version="5" visible="false"/></new>
+  </action>
+</osm>"""
+
+
+def brute_force(entries, bbox):
+    minlon, minlat, maxlon, maxlat = bbox
+    return [
+        item
+        for item, env in entries
+        if env is not None
+        and env[0] <= maxlon
+        and env[2] >= minlon
+        and env[1] <= maxlat
+        and env[3] >= minlat
+    ]
+
+
+@pytest.mark.parametrize("node_size", [2, 4, 16])
+def test_matches_brute_force(node_size):
+    rng = random.Random(1)
+    entries = []
+    for i in range(1000):
+        lon, lat = rng.uniform(-180, 170), rng.uniform(-90, 85)
+        size = rng.choice([0, 0, 0.5, 5])
+        entries.append((i, (lon, lat, lon + size, lat + size)))
+    entries.append((1000, None))
+    index = SpatialIndex(entries, node_size=node_size)
+    assert len(index) == 1000
+    regions = []
+    for _ in range(50):
+        lon, lat = rng.uniform(-180, 150), rng.uniform(-90, 60)
+        regions.append((lon, lat, lon + rng.uniform(0, 30), lat + rng.uniform(0, 30)))
+    results = index.query_regions(regions)
+    for region, found in zip(regions, results):
+        assert found == brute_force(entries, region)
+    assert index.query_bbox(regions[0]) == results[0]
+
+
+def test_augmented_diff():
+    adiff = AugmentedDiff()
+    adiff._parse_stream(io.BytesIO(ADIFF))
+    index = SpatialIndex.from_diff(adiff)
+    assert len(index) == 3
+    regions = [(0, 0, 3, 3), (49, 49, 51, 51), (15, 15, 16, 16), (0, 0, 60, 60)]
+    near, far, relation, everything = index.query_regions(regions)
+    assert [(a, new.id) for a, _, new in near] == [("create", 1), ("modify", 5)]
+    assert [a for a, _, _ in far] == ["modify"]  # Old version of node 5
+    assert [(a, old.id) for a, old, _ in relation] == [("delete", 3)]
+    assert [a for a, _, _ in everything] == ["create", "modify", "delete"]
+
+
+def test_osmchange():
+    osmchange = OSMChange.from_xml_file(DATA)
+    index = SpatialIndex.from_diff(osmchange)
+    nodes = [
+        (action, obj)
+        for action, objects in osmchange.actions.items()
+        for obj in objects
+        if isinstance(obj, Node) and obj.attribs.get("lat")
+    ]
+    assert len(index) == len(nodes)  # Ways and relations have no coordinates
+    assert index.query_bbox((-180, -90, 180, 90)) == nodes
+
+
+def test_envelope():
+    assert envelope(None) is None
+    assert envelope(Way(attribs={"id": "1"})) is None
+    way = Way(nodes=[Node(attribs={"lon": "1", "lat": "2"}), Node(attribs={"lon": "3", "lat": "-1"})])
+    assert envelope(way) == (1.0, -1.0, 3.0, 2.0)
+    relation = Relation(attribs={"id": "1"}, bounds=["0", "1", "2", "3"])
+    assert envelope(relation) == (0.0, 1.0, 2.0, 3.0)
+
+
+def test_empty_index():
+    index = SpatialIndex([])
+    assert len(index) == 0
+    assert index.query_regions([(0, 0, 1, 1)]) == [[]]
+    with pytest.raises(ValueError):
+        SpatialIndex([], node_size=1)
@@ -0,0 +1,50 @@
+import gzip
+import io
+
+from osmdiff.stream import decompress, iter_chunks
+
+
+class TrickleReader(io.BytesIO):
+    "BytesIO that returns at most one byte per read, like a slow socket"
+
+    def read(self, size=-1):
+        return super().read(1)
+
+
+def test_iter_chunks():
+    chunks = list(iter_chunks(io.BytesIO(b"abcdefg"), chunk_size=3))
+    assert chunks == [b"abc", b"def", b"g"]
+
+
+def test_iter_chunks_encodes_text():
+    chunks = list(iter_chunks(io.StringIO("<osm/>")))
+    assert chunks == [b"<osm/>"]
+
+
+def test_decompress_plain_passthrough():
+    chunks = [b"<osm", b"Change/>"]
+    assert b"".join(decompress(chunks)) == b"<osmChange/>"
+
+
+def test_decompress_empty():
+    assert list(decompress([])) == []
+
+
+def test_decompress_gzip_incremental():
+    xml = b"<osmChange>" + b"<create/>" * 1000 + b"</osmChange>"
+    gzipped = gzip.compress(xml)
+    chunks = iter_chunks(io.BytesIO(gzipped), chunk_size=7)
+    out = list(decompress(chunks))
+    assert b"".join(out) == xml
+    assert len(out) > 1
+
+
+def test_decompress_peeks_across_short_reads():
+    xml = b"<osmChange/>"
+    out = decompress(iter_chunks(TrickleReader(gzip.compress(xml))))
+    assert b"".join(out) == xml
+
+
+def test_decompress_concatenated_members():
+    data = gzip.compress(b"<osm>") + gzip.compress(b"</osm>")
+    assert b"".join(decompress([data])) == b"<osm></osm>"
@@ -0,0 +1,86 @@
+import json
+import pickle
+
+import pytest
+
+from osmdiff.backends import BACKENDS, get_backend
+from osmdiff.config import PARSER_CONFIG
+from osmdiff.osm import Node
+from osmdiff.osm.tags import EMPTY, FrozenTags, TagsView, TagTable
+
+AVAILABLE = [name for name, backend in BACKENDS.items() if backend.available()]
+
+DOCUMENT = b"""<osmChange><create>
+<way id="1"><nd ref="1"/><tag k="building" v="yes"/><tag k="name" v="A very long name for a building, not interned"/></way>
+<way id="2"><nd ref="2"/><tag k="building" v="yes"/><tag k="name" v="A very long name for a building, not interned"/></way>
+<way id="3"><nd ref="3"/><tag k="building" v="yes"/></way>
+<node id="4" lat="1" lon="2"/>
+</create></osmChange>"""
+
+
+@pytest.fixture(params=AVAILABLE)
+def backend(request, monkeypatch):
+    monkeypatch.setitem(PARSER_CONFIG, "backend", request.param)
+    return request.param
+
+
+def parse():
+    return [e[1] for e in get_backend()().parse([DOCUMENT]) if e[0] == "object"]
+
+
+def test_strings_interned(backend):
+    a, b, c, _ = parse()
+    assert isinstance(a.tags, dict)
+    assert a.tags == b.tags and a.tags is not b.tags
+    [key_a] = [k for k in a.tags if k == "building"]
+    [key_c] = [k for k in c.tags if k == "building"]
+    assert key_a is key_c
+    assert a.tags["building"] is c.tags["building"]
+    assert a.tags["name"] is not b.tags["name"]  # Too long to intern
+
+
+def test_shared_tags(backend, monkeypatch):
+    monkeypatch.setitem(PARSER_CONFIG, "share_tags", True)
+    a, b, c, node = parse()
+    assert a._tags is b._tags
+    assert isinstance(a._tags, FrozenTags)
+    assert node._tags is EMPTY
+    assert isinstance(a.tags, TagsView)
+    assert a.tags == b.tags and a.tags != c.tags
+    assert a.tags == {"building": "yes", "name": b.tags["name"]}
+    assert a.tags.get("building") == "yes" and "name" in a.tags
+    assert hash(a.tags.freeze()) == hash(b.tags.freeze())
+    assert json.loads(json.dumps(a.to_dict()))["tags"]["building"] == "yes"
+
+    a.tags["building"] = "house"
+    assert type(a._tags) is dict
+    assert isinstance(a.tags, dict)
+    assert a.tags["building"] == "house" and b.tags["building"] == "yes"
+    view = b.tags
+    del view["name"]
+    assert b.tags == c.tags and b._tags is not c._tags
+    c.tags.clear()
+    assert c.tags == {} and node.tags == {}
+
+
+def test_frozen_tags():
+    tags = FrozenTags({"a": "b"})
+    with pytest.raises(TypeError):
+        tags["c"] = "d"
+    with pytest.raises(TypeError):
+        tags.update(c="d")
+    assert tags == {"a": "b"} and tags != {"a": "c"}
+    assert {tags: 1}[FrozenTags({"a": "b"})] == 1
+    assert pickle.loads(pickle.dumps(tags)) == tags
+    assert repr(tags) == "FrozenTags({'a': 'b'})"
+
+
+def test_tag_table():
+    table = TagTable(share=True)
+    first = table.rebuild({"highway": "residential"})
+    second = table.rebuild({"highway": "residential"})
+    assert first is second
+    assert table.intern("x" * 40) is not None
+    assert TagTable().finish({"a": "b"}) == {"a": "b"}
+    node = Node(tags={"a": "b"})
+    assert isinstance(node.tags, dict)
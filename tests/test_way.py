@@ -1,4 +1,7 @@
-from osmdiff import Way
+import xml.etree.ElementTree as ET
+
+import pytest
+from osmdiff import Node, OSMChange, Way
 from osmdiff.osm import OSMObject
 from typing_extensions import assert_type
 
@@ -14,6 +17,7 @@ def test_way_init():
     assert isinstance(way.nodes, list)
     assert len(way.nodes) == 0
 
+
 def test_way_is_closed():
     way = Way()
     way.nodes = [1, 2, 1]
@@ -21,8 +25,8 @@ def test_way_is_closed():
     way.nodes = [1, 2, 3]
     assert way.is_closed() is False
 
+
 def test_way_from_xml():
-    import xml.etree.ElementTree as ET
     xml = '<way id="1"><nd ref="1"/><nd ref="2"/><tag k="highway" v="residential"/></way>'
     elem = ET.fromstring(xml)
     way = Way.from_xml(elem)
@@ -30,4 +34,64 @@ def test_way_from_xml():
     assert way.attribs["id"] == "1"
     assert way.tags["highway"] == "residential"
 
-# Optionally, add test for geo interface if implemented
+
+def test_way_stores_refs_in_arrays():
+    xml = '<way id="1"><nd ref="10"/><nd ref="11"/><nd ref="10"/></way>'
+    way = Way.from_xml(ET.fromstring(xml))
+    assert list(way._refs) == [10, 11, 10]
+    assert way._coords is None
+    assert way.is_closed() is True
+    assert repr(way) == "Way 1 (3 nodes)"
+    assert way._nodes is None
+    assert [n.attribs["ref"] for n in way.nodes] == ["10", "11", "10"]
+    assert way._refs is None
+
+
+def test_way_geo_interface_from_arrays():
+    xml = (
+        '<way id="1"><nd ref="1" lat="1.5" lon="2.5"/><nd ref="2"/>'
+        '<nd ref="3" lat="3.5" lon="4.5"/></way>'
+    )
+    way = Way.from_xml(ET.fromstring(xml))
+    assert way.__geo_interface__ == {
+        "type": "LineString",
+        "coordinates": [[2.5, 1.5], [0.0, 0.0], [4.5, 3.5]],
+    }
+    assert way.nodes[2].lat == 3.5
+    assert "lat" not in way.nodes[1].attribs
+    assert way.__geo_interface__["coordinates"][2] == [4.5, 3.5]
+
+
+def test_way_invalid_nd_ref_kept_as_node():
+    way = Way()
+    way._add_nd({"ref": "1"})
+    way._add_nd({"ref": "abc"})
+    way._add_nd({"ref": "2"})
+    assert [n.attribs["ref"] for n in way.nodes] == ["1", "abc", "2"]
+
+
+def test_way_coords():
+    way = Way()
+    way.nodes = [
+        Node(attribs={"lon": "1", "lat": "2"}),
+        Node(attribs={"lon": "3", "lat": "4"}),
+    ]
+    assert way.coords() == [[1.0, 2.0], [3.0, 4.0]]
+    way = Way()
+    way._add_nd({"ref": "1", "lat": "2", "lon": "1"})
+    way._add_nd({"ref": "2", "lat": "95", "lon": "1"})
+    with pytest.raises(ValueError):
+        way.coords()
+
+
+def test_way_is_closed_after_reading_nodes():
+    osmchange = OSMChange.from_xml_file("tests/data/test_osmchange.xml")
+    way = next(w for w in osmchange.create if w.osmtype == "w" and w.id == 539647898)
+    assert way.is_closed() is False
+    assert way.__geo_interface__["type"] == "LineString"
+    nodes = way.nodes  # Materialized nodes, all at (0, 0) without lat/lon
+    assert nodes[0] == nodes[-1]
+    assert way.is_closed() is False
+    assert way.__geo_interface__["type"] == "LineString"
+    way.nodes.append(way.nodes[0])
+    assert way.is_closed() is True